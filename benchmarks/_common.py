@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def isolate_app_dir() -> Path:
+    """Point HOME at a temp dir so core.config_store's ~/.askdb is never the user's real one.
+
+    Must run before anything imports core.config_store (APP_DIR is computed at import).
+    """
+    if "core.config_store" in sys.modules:
+        raise RuntimeError("isolate_app_dir() must be called before importing core.config_store")
+    home = Path(tempfile.mkdtemp(prefix="askdb-bench-home-"))
+    os.environ["HOME"] = str(home)
+    os.environ["USERPROFILE"] = str(home)
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    return home
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Run ``fn`` and return wall-time stats in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "repeat": repeat,
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.fmean(times),
+        "max_ms": max(times),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def write_results(suite: str, results: Dict[str, Any], out: Optional[str]) -> Dict[str, Any]:
+    """Wrap results with run metadata and write them as JSON (stdout when ``out`` is None)."""
+    payload = {
+        "suite": suite,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(payload, indent=2, default=str)
+    if out:
+        Path(out).write_text(text)
+    else:
+        print(text)
+    return payload
+
+
+def log(msg: str) -> None:
+    print(msg, file=sys.stderr, flush=True)
@@ -0,0 +1,177 @@
+"""Offline end-to-end agent benchmarks using the scripted LLM backend.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_agent --out agent.json
+    python -m benchmarks.bench_agent --quick --latency-ms 50
+
+The scripted model (services.fake_llm) sleeps a fixed time per call, so
+everything above ``llm_calls * latency_ms`` is AskDB/LangChain overhead: tool
+dispatch, SQL, streaming to _AgentStreamWorker and UI updates.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks._common import isolate_app_dir, log, write_results
+from benchmarks.bench_core import make_sqlite_fixture
+
+
+QUESTIONS = [
+    "How many items are there per category?",
+    "What are the ten most expensive items?",
+    "Show the newest items",
+    "Which categories have the highest total amount?",
+]
+
+
+def _summary(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "runs": len(ordered),
+        "median_ms": ordered[len(ordered) // 2],
+        "min_ms": ordered[0],
+        "max_ms": ordered[-1],
+    }
+
+
+def bench_agent_stream(db_path: str, questions: int, latency_ms: float, fast: bool = False) -> Dict[str, Any]:
+    """agent.stream() directly, as _AgentStreamWorker consumes it (no Qt); ``fast`` uses single-shot mode."""
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from db_util import create_engine_from_dict
+    from services.agent_service import create_agent
+
+    class CountLLM(BaseCallbackHandler):
+        def __init__(self) -> None:
+            self.calls = 0
+
+        def on_chat_model_start(self, *args: Any, **kwargs: Any) -> None:
+            self.calls += 1
+
+    engine = create_engine_from_dict({"db_type": "sqlite", "name": db_path})
+    start = time.perf_counter()
+    agent = create_agent(engine, "scripted", "", None, {"name": "fake", "latency_ms": latency_ms}, fast)
+    init_ms = (time.perf_counter() - start) * 1000.0
+
+    walls: List[float] = []
+    overheads: List[float] = []
+    calls_total = 0
+    for i in range(questions):
+        counter = CountLLM()
+        start = time.perf_counter()
+        for _ in agent.stream({"input": QUESTIONS[i % len(QUESTIONS)]}, config={"callbacks": [counter]}):
+            pass
+        wall = (time.perf_counter() - start) * 1000.0
+        walls.append(wall)
+        overheads.append(wall - counter.calls * latency_ms)
+        calls_total += counter.calls
+    log(f"agent.stream{' (fast)' if fast else ''}: {questions} questions")
+    return {
+        "agent_init_ms": init_ms,
+        "llm_calls_per_question": calls_total / max(1, questions),
+        "wall": _summary(walls),
+        "overhead": _summary(overheads),
+    }
+
+
+def bench_workspace(db_path: str, questions: int, latency_ms: float, token_ms: float = 0.0) -> Dict[str, Any]:
+    """A real QueryTab (offscreen): _on_send → worker → streamed UI updates → final answer.
+
+    Also records the time until the first answer text (not a status line) reaches the bubble.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6 import QtWidgets
+
+    from core.config_store import SettingsManager
+    from db_util import create_engine_from_dict
+    from ui.query_tab import QueryTab
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+    settings = SettingsManager()
+    settings.data.update(llm_backend="fake", fake_llm_latency_ms=latency_ms)
+    engine = create_engine_from_dict({"db_type": "sqlite", "name": db_path})
+    tab = QueryTab(engine, settings)
+    tab.resize(1400, 900)
+    tab.show()
+
+    def wait(cond: Any, timeout_s: float = 120.0) -> None:
+        deadline = time.perf_counter() + timeout_s
+        while not cond():
+            if time.perf_counter() > deadline:
+                raise TimeoutError("workspace benchmark timed out")
+            app.processEvents()
+            time.sleep(0.001)
+
+    start = time.perf_counter()
+    wait(lambda: tab.agent is not None)
+    init_ms = (time.perf_counter() - start) * 1000.0
+    if token_ms:
+        # Settings have no per-token latency; swap in an agent with one
+        from services.agent_service import create_agent
+
+        tab.agent = create_agent(engine, "scripted", "", None, {"name": "fake", "latency_ms": latency_ms, "token_latency_ms": token_ms})
+
+    first_answer: Dict[int, float] = {}
+    render = tab._on_stream_output
+
+    def on_output(ai_index: int, text: str) -> None:
+        # Status lines ("Running: …", "Analyzing: …") are not answer text
+        if ai_index not in first_answer and not text.startswith(("Running", "Analyzing", "Thinking", "Planning", "Initializing")):
+            first_answer[ai_index] = (time.perf_counter() - start) * 1000.0
+        render(ai_index, text)
+
+    tab._on_stream_output = on_output  # type: ignore[method-assign]
+    walls: List[float] = []
+    for i in range(questions):
+        tab.chat_input.setText(QUESTIONS[i % len(QUESTIONS)])
+        start = time.perf_counter()
+        tab._on_send()
+        wait(lambda: tab._worker is None)
+        # Let the final answer render
+        app.processEvents()
+        walls.append((time.perf_counter() - start) * 1000.0)
+    log(f"workspace: {questions} questions")
+    result = {
+        "agent_init_ms": init_ms,
+        "wall": _summary(walls),
+        "first_answer_text": _summary(list(first_answer.values())) if first_answer else None,
+        "queries_listed": len(tab.all_queries),
+    }
+    tab.shutdown()
+    return result
+
+
+def main(argv: Any = None) -> None:
+    parser = argparse.ArgumentParser(description="AskDB offline agent benchmarks (scripted LLM)")
+    parser.add_argument("--out", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="fewer questions and a small fixture")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="scripted model latency per call")
+    parser.add_argument("--token-latency-ms", type=float, default=0.0, help="scripted delay between streamed answer tokens (workspace only)")
+    args = parser.parse_args(argv)
+
+    isolate_app_dir()
+    rows = 10_000 if args.quick else 100_000
+    questions = 4 if args.quick else 20
+    db_path = str(Path(tempfile.mkdtemp(prefix="askdb-bench-agent-")) / "agent.db")
+    make_sqlite_fixture(Path(db_path), rows)
+
+    results: Dict[str, Any] = {"latency_ms": args.latency_ms, "token_latency_ms": args.token_latency_ms, "fixture_rows": rows}
+    results["agent_stream"] = bench_agent_stream(db_path, questions, args.latency_ms)
+    results["agent_stream_fast"] = bench_agent_stream(db_path, questions, args.latency_ms, fast=True)
+    results["workspace"] = bench_workspace(db_path, questions, args.latency_ms, args.token_latency_ms)
+    results["workspace"]["overhead_vs_agent_ms"] = results["workspace"]["wall"]["median_ms"] - results["agent_stream"]["wall"]["median_ms"]
+    write_results("agent", results, args.out)
+    sys.stdout.flush()
+    # Skip PySide teardown during interpreter shutdown; results are written
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
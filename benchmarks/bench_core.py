@@ -0,0 +1,229 @@
+"""Offline benchmarks for AskDB's non-UI hot paths.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_core --out core.json
+    python -m benchmarks.bench_core --quick            # smaller sizes, prints JSON
+
+Everything runs against temporary SQLite files and a temporary ~/.askdb, so no
+network, database server or user data is touched.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+from benchmarks._common import isolate_app_dir, log, measure, write_results
+
+
+# --------
+# Fixtures
+# --------
+
+
+def make_sqlite_fixture(path: Path, rows: int, seed: int = 7) -> str:
+    """Create ``items`` with ``rows`` rows of mixed types; returns the table name."""
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(str(path))
+    conn.execute("DROP TABLE IF EXISTS items")
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT, category TEXT, amount REAL, created TEXT, flag INTEGER)")
+    categories = [f"cat_{i}" for i in range(50)]
+    batch: List[tuple] = []
+    for i in range(rows):
+        batch.append((i, f"item-{i:07d}", rnd.choice(categories), rnd.random() * 1000, f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}", i % 2))
+        if len(batch) >= 50_000:
+            conn.executemany("INSERT INTO items VALUES (?,?,?,?,?,?)", batch)
+            batch = []
+    if batch:
+        conn.executemany("INSERT INTO items VALUES (?,?,?,?,?,?)", batch)
+    conn.commit()
+    conn.close()
+    return "items"
+
+
+def generate_sql(target_chars: int, seed: int = 11) -> str:
+    """A large analytical query (CTEs, joins, CASE, IN-lists, string literals)."""
+    rnd = random.Random(seed)
+    parts: List[str] = []
+    i = 0
+    while sum(len(p) for p in parts) < target_chars:
+        cols = ", ".join(
+            f"case when t{i}.amount > {rnd.randint(1, 999)} then 'high {i}' else 'low' end as c{i}_{j}"
+            for j in range(5)
+        )
+        ids = ", ".join(str(rnd.randint(1, 10_000)) for _ in range(20))
+        parts.append(
+            f"cte_{i} as (select t{i}.id, {cols}, sum(t{i}.amount) as total\n"
+            f"  from items t{i} left join items u{i} on u{i}.id = t{i}.id\n"
+            f"  where t{i}.category = 'cat_{i % 50}' and t{i}.id in ({ids})\n"
+            f"  group by t{i}.id order by total desc limit {rnd.randint(10, 500)})"
+        )
+        i += 1
+    return "with " + ",\n".join(parts) + "\nselect * from cte_0"
+
+
+def generate_markdown(target_chars: int) -> str:
+    """A long agent-style answer: paragraphs with bold, lists, code and tables."""
+    blocks: List[str] = []
+    i = 0
+    while sum(len(b) for b in blocks) < target_chars:
+        blocks.append(
+            f"**Finding {i}:** the *top* category by revenue is `cat_{i % 50}` with **{i * 37} orders**.\n"
+            f"- item one for {i}\n- item two with **bold** text\n\n"
+            "```sql\nSELECT category, SUM(amount) FROM items GROUP BY category ORDER BY 2 DESC LIMIT 10;\n```\n\n"
+            "| category | total |\n|---|---|\n" + "".join(f"| cat_{k} | {k * 10.5:.2f} |\n" for k in range(5)) + "\n"
+        )
+        i += 1
+    return "".join(blocks)
+
+
+# ----------
+# Benchmarks
+# ----------
+
+
+def bench_sql_utils(sizes: List[int]) -> Dict[str, Any]:
+    from services.sql_utils import fingerprint_sql, format_sql, normalize_sql
+
+    out: Dict[str, Any] = {}
+    for size in sizes:
+        sql = generate_sql(size)
+        out[f"format_sql/{size}"] = measure(lambda: format_sql(sql))
+        out[f"normalize_sql/{size}"] = measure(lambda: normalize_sql(sql))
+        out[f"fingerprint_sql/{size}"] = measure(lambda: fingerprint_sql(sql))
+        log(f"sql_utils {size} chars done")
+    return out
+
+
+def bench_engine_cache(tmp: Path, threads: int = 8, calls: int = 500) -> Dict[str, Any]:
+    from db_util import _EngineCache
+
+    url = f"sqlite:///{tmp / 'cache.db'}"
+    options = {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30, "pool_pre_ping": True}
+    _EngineCache.get_engine(url, **options)
+
+    def contended() -> None:
+        barrier = threading.Barrier(threads)
+
+        def worker() -> None:
+            barrier.wait()
+            for _ in range(calls):
+                _EngineCache.get_engine(url, **options)
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        for t in pool:
+            t.start()
+        for t in pool:
+            t.join()
+
+    stats = measure(contended, repeat=5)
+    stats["calls"] = threads * calls
+    stats["per_call_us"] = stats["median_ms"] * 1000.0 / (threads * calls)
+
+    counter = iter(range(1_000_000))
+
+    def cold() -> None:
+        _EngineCache.get_engine(f"sqlite:///{tmp / f'cold_{next(counter)}.db'}", **options)
+
+    log("engine cache done")
+    return {f"get_engine/hot/{threads}threads": stats, "get_engine/cold": measure(cold, repeat=20)}
+
+
+def bench_fetch(tmp: Path, sizes: List[int]) -> Dict[str, Any]:
+    from db_util import create_engine_from_dict
+    from services.db_service import fetch_rows
+
+    out: Dict[str, Any] = {}
+    for rows in sizes:
+        path = tmp / f"fetch_{rows}.db"
+        start = time.perf_counter()
+        table = make_sqlite_fixture(path, rows)
+        log(f"fixture {rows} rows built in {time.perf_counter() - start:.1f}s")
+        engine = create_engine_from_dict({"db_type": "sqlite", "name": str(path)})
+        repeat = 5 if rows <= 100_000 else 2
+        out[f"fetch_rows/{rows}"] = measure(lambda: fetch_rows(engine, f"SELECT * FROM {table}"), repeat=repeat)
+        # Cell-to-text conversion the results grid does for every painted cell
+        data, _ = fetch_rows(engine, f"SELECT * FROM {table}")
+        out[f"stringify/{rows}"] = measure(lambda: [[str(v) for v in r] for r in data], repeat=repeat)
+        del data
+        engine.dispose()
+    return out
+
+
+def bench_config_store(counts: List[int]) -> Dict[str, Any]:
+    from core.config_store import ConnectionManager, RecentsManager, SettingsManager
+    from core.plan_store import PlanStore
+
+    out: Dict[str, Any] = {}
+    for n in counts:
+        mgr = ConnectionManager()
+        mgr.connections = [
+            {"saved_name": f"conn {i}", "db_type": "postgres", "host": f"db{i}.example", "port": 5432, "name": f"db{i}", "user": "u"}
+            for i in range(n)
+        ]
+        out[f"connections/save/{n}"] = measure(mgr.save)
+        out[f"connections/load/{n}"] = measure(ConnectionManager)
+        out[f"connections/add_or_update/{n}"] = measure(lambda: mgr.add_or_update(f"conn {n // 2}", {"db_type": "sqlite"}))
+
+        path = str(Path(tempfile.mkdtemp(prefix="askdb-plans-")) / "plans.db")
+        plans = PlanStore(path=path, max_per_connection=n)
+        for i in range(n):
+            plans.record("sqlite:///bench.db", f"{i:016x}", {"dialect": "sqlite", "rows": i, "cost": None, "shape": ["SCAN items"], "duration_ms": 1.0})
+        out[f"plans/load/{n}"] = measure(lambda: PlanStore(path=path, max_per_connection=n).close())
+        out[f"plans/record/{n}"] = measure(lambda: plans.record("sqlite:///bench.db", "ffffffffffffffff", {"shape": []}))
+        out[f"plans/entries/{n}"] = measure(lambda: plans.entries("sqlite:///bench.db"))
+        plans.close()
+        log(f"config_store {n} entries done")
+    out["settings/load"] = measure(SettingsManager)
+    out["recents/load"] = measure(RecentsManager)
+    return out
+
+
+def bench_markdown(sizes: List[int]) -> Dict[str, Any]:
+    from ui.utils import markdown_to_html
+
+    out: Dict[str, Any] = {}
+    for size in sizes:
+        text = generate_markdown(size)
+        out[f"markdown_to_html/{size}"] = measure(lambda: markdown_to_html(text))
+    log("markdown done")
+    return out
+
+
+def main(argv: Any = None) -> None:
+    parser = argparse.ArgumentParser(description="AskDB core benchmarks (offline)")
+    parser.add_argument("--out", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--only", nargs="*", choices=["sql", "engine", "fetch", "config", "markdown"], help="run a subset")
+    args = parser.parse_args(argv)
+
+    isolate_app_dir()
+    tmp = Path(tempfile.mkdtemp(prefix="askdb-bench-"))
+    only = set(args.only or ["sql", "engine", "fetch", "config", "markdown"])
+    if args.quick:
+        sql_sizes, fetch_sizes, counts, md_sizes = [10_000], [10_000], [1_000], [10_000]
+    else:
+        sql_sizes, fetch_sizes, counts, md_sizes = [10_000, 100_000], [10_000, 100_000, 1_000_000], [1_000, 10_000], [10_000, 100_000]
+
+    results: Dict[str, Any] = {}
+    if "sql" in only:
+        results.update(bench_sql_utils(sql_sizes))
+    if "engine" in only:
+        results.update(bench_engine_cache(tmp))
+    if "fetch" in only:
+        results.update(bench_fetch(tmp, fetch_sizes))
+    if "config" in only:
+        results.update(bench_config_store(counts))
+    if "markdown" in only:
+        results.update(bench_markdown(md_sizes))
+    write_results("core", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Headless Qt benchmarks for the workspace (QueryTab).
+
+Run from the repository root:
+
+    python -m benchmarks.bench_ui --out ui.json
+    python -m benchmarks.bench_ui --quick
+
+Uses QT_QPA_PLATFORM=offscreen, a temporary ~/.askdb and an empty SQLite
+file; the agent is never initialized, so no network access is needed. Each
+scenario runs twice, each time in a fresh process on a new QueryTab: once for
+wall time and max RSS (which covers Qt's C++ allocations), once under
+tracemalloc for peak Python memory.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+from benchmarks._common import isolate_app_dir, log, write_results
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+def _max_rss_mb() -> float:
+    if resource is None:
+        return 0.0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+class Workspace:
+    """A shown QueryTab on an empty SQLite database, with agent init disabled."""
+
+    def __init__(self) -> None:
+        from PySide6 import QtWidgets
+
+        from core.config_store import SettingsManager
+        from db_util import create_engine_from_dict
+        from ui.query_tab import QueryTab
+
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+        QueryTab._start_agent_init = lambda self: None  # type: ignore[method-assign]
+        db_path = os.path.join(tempfile.mkdtemp(prefix="askdb-bench-ui-"), "workspace.db")
+        engine = create_engine_from_dict({"db_type": "sqlite", "name": db_path})
+        self.tab = QueryTab(engine, SettingsManager())
+        self.tab.resize(1400, 900)
+        self.tab.show()
+        self.pump()
+
+    def pump(self) -> None:
+        """Let Qt process pending layout/paint events, as the event loop would."""
+        self.app.processEvents()
+
+    def close(self) -> None:
+        try:
+            self.tab.shutdown()
+        except Exception:
+            pass
+        from PySide6 import QtCore
+
+        self.tab.close()
+        self.tab.deleteLater()
+        # Destroy the widget tree now rather than during interpreter shutdown
+        QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        self.pump()
+        self.tab = None
+
+
+# ---------
+# Scenarios
+# ---------
+
+
+def fill_grid(rows: int) -> Callable[[Workspace], Dict[str, Any]]:
+    cols = ["id", "name", "category", "amount", "created", "flag"]
+    data = [[i, f"item-{i:07d}", f"cat_{i % 50}", i * 1.5, f"2024-{1 + i % 12:02d}-01", i % 2] for i in range(rows)]
+
+    def run(ws: Workspace) -> Dict[str, Any]:
+        ws.tab._pager = None
+        ws.tab._on_sql_result(data, cols)
+        ws.pump()
+        return {"rows": rows}
+
+    return run
+
+
+def chat_messages(messages: int, updates_per_answer: int = 3) -> Callable[[Workspace], Dict[str, Any]]:
+    def run(ws: Workspace) -> Dict[str, Any]:
+        tab = ws.tab
+        per_hundred: List[float] = []
+        output_ms: List[float] = []
+        batch_start = time.perf_counter()
+        for i in range(messages // 2):
+            # A question (user row + AI placeholder, as _on_send does), then streamed updates
+            tab.chat_input.setText(f"Question {i}: what are the top categories by revenue this month?")
+            tab._on_send()
+            ai_idx = len(tab._ai_messages) - 1
+            for k in range(updates_per_answer):
+                t0 = time.perf_counter()
+                tab._on_stream_status(ai_idx, f"Analyzing: step {k} of question {i}")
+                output_ms.append((time.perf_counter() - t0) * 1000.0)
+            t0 = time.perf_counter()
+            tab._on_stream_output(
+                ai_idx,
+                f"**Answer {i}:** the top category is `cat_{i % 50}` with **{i * 37}** orders.\n"
+                "- first point\n- second point with more detail about the result set",
+            )
+            output_ms.append((time.perf_counter() - t0) * 1000.0)
+            # Updates are coalesced per frame; render what the next frame would
+            if hasattr(tab, "_flush_chat_renders"):
+                tab._flush_chat_renders()
+            ws.pump()
+            if (2 * (i + 1)) % 100 == 0:
+                per_hundred.append((time.perf_counter() - batch_start) * 1000.0)
+                batch_start = time.perf_counter()
+        output_ms.sort()
+        return {
+            "messages": messages,
+            "ms_per_100_messages": [round(v, 1) for v in per_hundred],
+            "stream_output_p50_ms": output_ms[len(output_ms) // 2] if output_ms else 0.0,
+            "stream_output_max_ms": output_ms[-1] if output_ms else 0.0,
+        }
+
+    return run
+
+
+def grow_queries(total: int, step: int) -> Callable[[Workspace], Dict[str, Any]]:
+    def run(ws: Workspace) -> Dict[str, Any]:
+        tab = ws.tab
+        refresh_ms: Dict[int, float] = {}
+
+        def add(i: int) -> None:
+            tab.all_queries.append(
+                {"sql": f"SELECT category, SUM(amount) FROM items WHERE id > {i} GROUP BY category ORDER BY 2 DESC", "ai_index": i % 7 or None}
+            )
+
+        for i in range(total):
+            # The app refreshes after every new query; time that single append every `step` entries
+            if (i + 1) % step == 0 or i + 1 == total:
+                # Settle the earlier appends first so the sample covers this query alone
+                ws.pump()
+                add(i)
+                t0 = time.perf_counter()
+                tab._refresh_query_list()
+                ws.pump()
+                refresh_ms[i + 1] = (time.perf_counter() - t0) * 1000.0
+            else:
+                add(i)
+                tab._refresh_query_list()
+        ws.pump()
+        sizes = sorted(refresh_ms)
+        # Growing one query at a time costs roughly the sum of single-append refreshes at every size
+        estimate = 0.0
+        prev = 0
+        for n in sizes:
+            estimate += refresh_ms[n] * (n - prev)
+            prev = n
+        return {
+            "queries": total,
+            "refresh_ms_at_size": {str(n): round(refresh_ms[n], 2) for n in sizes},
+            "estimated_total_ms_refresh_per_query": round(estimate, 1),
+        }
+
+    return run
+
+
+SCENARIOS: Dict[str, Callable[..., Callable[[Workspace], Dict[str, Any]]]] = {
+    "grid": fill_grid,
+    "chat": chat_messages,
+    "queries": grow_queries,
+}
+
+
+def _run_in_process(spec: str, trace_memory: bool) -> None:
+    """Child process: run one scenario ("name:arg[:arg]") and print its result as JSON."""
+    name, *raw = spec.split(":")
+    scenario = SCENARIOS[name](*(int(a) for a in raw))
+    ws = Workspace()
+    rss_before = _max_rss_mb()
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    details = scenario(ws)
+    result: Dict[str, Any] = {"wall_ms": (time.perf_counter() - start) * 1000.0}
+    if trace_memory:
+        result["peak_python_mb"] = tracemalloc.get_traced_memory()[1] / (1024.0 * 1024.0)
+        tracemalloc.stop()
+    result.update(max_rss_mb=_max_rss_mb(), max_rss_growth_mb=_max_rss_mb() - rss_before)
+    result.update(details)
+    print(json.dumps(result), flush=True)
+    # Skip Qt/PySide teardown at interpreter exit; the measurement is already reported
+    os._exit(0)
+
+
+def run_scenario(spec: str) -> Dict[str, Any]:
+    def child(trace_memory: bool) -> Dict[str, Any]:
+        cmd = [sys.executable, "-m", "benchmarks.bench_ui", "--run-one", spec]
+        if trace_memory:
+            cmd.append("--trace-memory")
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=dict(os.environ))
+        lines = [l for l in proc.stdout.splitlines() if l.startswith("{")]
+        if not lines:
+            raise RuntimeError(f"scenario {spec} failed:\n{proc.stderr[-2000:]}")
+        return json.loads(lines[-1])
+
+    result = child(trace_memory=False)
+    result["peak_python_mb"] = child(trace_memory=True)["peak_python_mb"]
+    log(f"{spec}: {result['wall_ms']:.0f} ms, peak python {result['peak_python_mb']:.1f} MB, max rss {result['max_rss_mb']:.0f} MB")
+    return result
+
+
+def main(argv: Any = None) -> None:
+    parser = argparse.ArgumentParser(description="AskDB headless UI benchmarks")
+    parser.add_argument("--out", help="write JSON results to this file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes for a fast smoke run")
+    parser.add_argument("--query-step", type=int, default=100, help="sample _refresh_query_list every N queries")
+    parser.add_argument("--run-one", help=argparse.SUPPRESS)
+    parser.add_argument("--trace-memory", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    isolate_app_dir()
+    if args.run_one:
+        _run_in_process(args.run_one, args.trace_memory)
+        return
+    if args.quick:
+        grid_sizes, chat, queries = [10_000], 200, 200
+    else:
+        grid_sizes, chat, queries = [10_000, 100_000], 1_000, 2_000
+
+    results: Dict[str, Any] = {}
+    for rows in grid_sizes:
+        results[f"results_grid/{rows}"] = run_scenario(f"grid:{rows}")
+    results[f"chat/{chat}_messages"] = run_scenario(f"chat:{chat}")
+    results[f"query_list/{queries}"] = run_scenario(f"queries:{queries}:{args.query_step}")
+    write_results("ui", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from core.config_store import CHATS_PATH
+
+
+class ChatStore:
+    """Chat sessions per connection, kept in a local SQLite database.
+
+    A session is an ordered list of messages ({id, role, text, queries,
+    footer}). Only the final text of an answer is kept, not the agent's
+    intermediate steps. messages() pages backwards from a message id, so a
+    transcript can be shown from its newest end and filled in as the user
+    scrolls up.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = str(path or CHATS_PATH)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, connection TEXT, created REAL, updated REAL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS messages ("
+            " id INTEGER PRIMARY KEY, session_id INTEGER, role TEXT, text TEXT, queries TEXT, footer TEXT, created REAL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_conn ON sessions (connection, updated)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_messages_session ON messages (session_id, id)")
+        self._conn.commit()
+
+    def latest_session(self, connection: str) -> Optional[int]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM sessions WHERE connection = ? ORDER BY updated DESC LIMIT 1", (connection,)
+            ).fetchone()
+        return int(row[0]) if row else None
+
+    def new_session(self, connection: str) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO sessions (connection, created, updated) VALUES (?,?,?)", (connection, now, now)
+            )
+            self._conn.commit()
+            return int(cur.lastrowid)
+
+    def add_message(
+        self,
+        session_id: int,
+        role: str,
+        text: str,
+        queries: Optional[Sequence[str]] = None,
+        footer: Optional[Sequence[str]] = None,
+    ) -> int:
+        now = time.time()
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO messages (session_id, role, text, queries, footer, created) VALUES (?,?,?,?,?,?)",
+                (session_id, role, text, json.dumps(list(queries or [])), json.dumps(list(footer)) if footer else None, now),
+            )
+            self._conn.execute("UPDATE sessions SET updated = ? WHERE id = ?", (now, session_id))
+            self._conn.commit()
+            return int(cur.lastrowid)
+
+    def update_message(
+        self,
+        message_id: int,
+        text: Optional[str] = None,
+        queries: Optional[Sequence[str]] = None,
+        footer: Optional[Sequence[str]] = None,
+    ) -> None:
+        sets: List[str] = []
+        params: List[Any] = []
+        if text is not None:
+            sets.append("text = ?")
+            params.append(text)
+        if queries is not None:
+            sets.append("queries = ?")
+            params.append(json.dumps(list(queries)))
+        if footer is not None:
+            sets.append("footer = ?")
+            params.append(json.dumps(list(footer)))
+        if not sets:
+            return
+        with self._lock:
+            self._conn.execute(f"UPDATE messages SET {', '.join(sets)} WHERE id = ?", params + [message_id])
+            self._conn.commit()
+
+    def messages(self, session_id: int, before_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Up to ``limit`` messages older than ``before_id`` (the newest if None), oldest first."""
+        sql = "SELECT id, role, text, queries, footer FROM messages WHERE session_id = ?"
+        params: List[Any] = [session_id]
+        if before_id is not None:
+            sql += " AND id < ?"
+            params.append(before_id)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY id DESC LIMIT ?", params + [limit]).fetchall()
+        out = []
+        for mid, role, text, queries, footer in reversed(rows):
+            try:
+                parsed_queries = json.loads(queries or "[]")
+            except Exception:
+                parsed_queries = []
+            try:
+                parsed_footer = json.loads(footer) if footer else None
+            except Exception:
+                parsed_footer = None
+            out.append({"id": mid, "role": role, "text": text or "", "queries": parsed_queries, "footer": parsed_footer})
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 
 APP_DIR = Path.home() / ".askdb"
@@ -10,6 +10,12 @@ APP_DIR.mkdir(parents=True, exist_ok=True)
 CONNECTIONS_PATH = APP_DIR / "connections.json"
 SETTINGS_PATH = APP_DIR / "settings.json"
 RECENTS_PATH = APP_DIR / "recents.json"
+PLANS_PATH = APP_DIR / "plans.db"
+LEGACY_PLANS_PATH = APP_DIR / "plans.json"
+SLOW_QUERY_LOG_PATH = APP_DIR / "slow_queries.log"
+TRACES_PATH = APP_DIR / "traces.db"
+HISTORY_PATH = APP_DIR / "history.db"
+CHATS_PATH = APP_DIR / "chats.db"
 
 
 def load_json(path: Path, default: Any) -> Any:
@@ -36,6 +42,21 @@ class SettingsManager:
             "enable_tracing": False,
             "langsmith_api_key": "",
             "langsmith_project": "",
+            "preflight_enabled": False,
+            "preflight_max_rows": 1_000_000,
+            "preflight_max_cost": 1_000_000,
+            "preflight_action": "block",
+            "preflight_limit_rows": 1000,
+            "capture_plans": True,
+            "slow_query_log": False,
+            "slow_query_ms": 1000,
+            "local_tracing": False,
+            "llm_backend": "openai",
+            "openai_base_url": "",
+            "fake_llm_latency_ms": 200,
+            "fast_mode": False,
+            "memory_token_budget": 600,
+            "observation_token_budget": 1000,
         })
 
     def save(self) -> None:
@@ -61,6 +82,70 @@ class SettingsManager:
     def langsmith_project(self) -> str:
         return self.data.get("langsmith_project", "")
 
+    @property
+    def preflight_enabled(self) -> bool:
+        return bool(self.data.get("preflight_enabled", False))
+
+    @property
+    def preflight_max_rows(self) -> int:
+        return int(self.data.get("preflight_max_rows", 1_000_000) or 0)
+
+    @property
+    def preflight_max_cost(self) -> float:
+        return float(self.data.get("preflight_max_cost", 1_000_000) or 0)
+
+    @property
+    def preflight_action(self) -> str:
+        """What to do with a query over the thresholds: "block" or "limit"."""
+        return self.data.get("preflight_action", "block")
+
+    @property
+    def preflight_limit_rows(self) -> int:
+        return int(self.data.get("preflight_limit_rows", 1000) or 1000)
+
+    @property
+    def capture_plans(self) -> bool:
+        return bool(self.data.get("capture_plans", True))
+
+    @property
+    def slow_query_log(self) -> bool:
+        return bool(self.data.get("slow_query_log", False))
+
+    @property
+    def slow_query_ms(self) -> int:
+        return int(self.data.get("slow_query_ms", 1000) or 0)
+
+    @property
+    def local_tracing(self) -> bool:
+        return bool(self.data.get("local_tracing", False))
+
+    @property
+    def llm_backend(self) -> str:
+        value = str(self.data.get("llm_backend", "openai") or "openai")
+        return value if value in ("openai", "fake") else "openai"
+
+    @property
+    def openai_base_url(self) -> str:
+        return str(self.data.get("openai_base_url", "") or "")
+
+    @property
+    def fake_llm_latency_ms(self) -> int:
+        return int(self.data.get("fake_llm_latency_ms", 200) or 0)
+
+    @property
+    def fast_mode(self) -> bool:
+        return bool(self.data.get("fast_mode", False))
+
+    @property
+    def memory_token_budget(self) -> int:
+        """Approximate tokens of conversation context sent with follow-up questions; 0 disables it."""
+        return int(self.data.get("memory_token_budget", 600) or 0)
+
+    @property
+    def observation_token_budget(self) -> int:
+        """Approximate tokens of a query result shown to the agent; 0 sends full results."""
+        return int(self.data.get("observation_token_budget", 1000) or 0)
+
 
 class ConnectionManager:
     def __init__(self) -> None:
@@ -118,5 +203,3 @@ class RecentsManager:
         # Trim
         self.recents = self.recents[: self.max_items]
         self.save()
-
-
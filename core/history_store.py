@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from core.config_store import HISTORY_PATH
+
+
+_COLUMNS = ("id", "connection", "executed_at", "duration_ms", "row_count", "has_more", "sql", "prompt", "origin", "error")
+
+
+class QueryHistoryStore:
+    """Every executed query, kept in a local SQLite database with a full-text index.
+
+    Rows record the connection key, time, duration, rows returned (first page;
+    ``has_more`` when there were more), the question that produced the query,
+    its origin ("ai", "custom" or "history" for the results grid, "agent" for
+    the agent's own sql_db_query calls, which have no duration) and the error
+    of a failed run. search() uses an FTS5 index over the SQL and prompt,
+    falling back to LIKE where SQLite lacks FTS5.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_rows: int = 500_000) -> None:
+        self.path = str(path or HISTORY_PATH)
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS queries ("
+            " id INTEGER PRIMARY KEY, connection TEXT, executed_at REAL, duration_ms REAL,"
+            " row_count INTEGER, has_more INTEGER, sql TEXT, prompt TEXT, origin TEXT)"
+        )
+        if "error" not in {r[1] for r in self._conn.execute("PRAGMA table_info(queries)")}:
+            self._conn.execute("ALTER TABLE queries ADD COLUMN error TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_queries_conn ON queries (connection, id)")
+        self.fts = self._create_fts()
+        self._conn.commit()
+
+    def _create_fts(self) -> bool:
+        try:
+            # External-content index kept in sync by triggers; "_" is part of a token so table names match whole
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS queries_fts USING fts5("
+                " sql, prompt, content='queries', content_rowid='id', tokenize=\"unicode61 tokenchars '_'\")"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS queries_ai AFTER INSERT ON queries BEGIN"
+                " INSERT INTO queries_fts (rowid, sql, prompt) VALUES (new.id, new.sql, new.prompt); END"
+            )
+            self._conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS queries_ad AFTER DELETE ON queries BEGIN"
+                " INSERT INTO queries_fts (queries_fts, rowid, sql, prompt) VALUES ('delete', old.id, old.sql, old.prompt); END"
+            )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def add(
+        self,
+        connection: str,
+        sql: str,
+        duration_ms: Optional[float] = None,
+        row_count: Optional[int] = None,
+        has_more: bool = False,
+        prompt: str = "",
+        origin: str = "custom",
+        error: Optional[str] = None,
+    ) -> int:
+        row = (connection, time.time(), duration_ms, row_count, int(bool(has_more)), sql, prompt or "", origin, error)
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO queries (connection, executed_at, duration_ms, row_count, has_more, sql, prompt, origin, error)"
+                " VALUES (?,?,?,?,?,?,?,?,?)",
+                row,
+            )
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._conn.execute(
+                    "DELETE FROM queries WHERE id <= (SELECT id FROM queries ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                    (self.max_rows,),
+                )
+            self._conn.commit()
+            return int(cur.lastrowid)
+
+    def recent(self, connection: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM queries"
+        params: List[Any] = []
+        if connection is not None:
+            sql += " WHERE connection = ?"
+            params.append(connection)
+        return self._fetch(sql + " ORDER BY id DESC LIMIT ?", params + [limit])
+
+    def search(self, text: str, connection: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+        """Newest queries whose SQL or prompt contains every word of ``text`` (as word prefixes with FTS5)."""
+        words = re.findall(r"\w+", text or "")
+        if not words:
+            return self.recent(connection, limit)
+        params: List[Any] = []
+        if self.fts:
+            match = " AND ".join(f'"{w}"*' for w in words)
+            sql = (
+                f"SELECT {', '.join('q.' + c for c in _COLUMNS)} FROM queries_fts f JOIN queries q ON q.id = f.rowid"
+                " WHERE queries_fts MATCH ?"
+            )
+            params.append(match)
+        else:
+            sql = f"SELECT {', '.join('q.' + c for c in _COLUMNS)} FROM queries q WHERE 1=1"
+            for w in words:
+                sql += " AND (q.sql LIKE ? OR q.prompt LIKE ?)"
+                params.extend([f"%{w}%", f"%{w}%"])
+        if connection is not None:
+            sql += " AND q.connection = ?"
+            params.append(connection)
+        order = " ORDER BY f.rowid DESC" if self.fts else " ORDER BY q.id DESC"
+        return self._fetch(sql + order + " LIMIT ?", params + [limit])
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM queries").fetchone()[0])
+
+    def _fetch(self, sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        out = []
+        for r in rows:
+            item = dict(zip(_COLUMNS, r))
+            item["has_more"] = bool(item["has_more"])
+            out.append(item)
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
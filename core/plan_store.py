@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from core.config_store import LEGACY_PLANS_PATH, PLANS_PATH, load_json
+
+
+class PlanStore:
+    """Last captured EXPLAIN plan per (connection, query fingerprint), kept in a local SQLite database.
+
+    Entries look like {"shape": [...], "cost": float|None, "rows": float|None,
+    "duration_ms": float|None, "sql": str, "updated": epoch_seconds}. Each
+    connection keeps at most ``max_per_connection`` fingerprints (oldest
+    dropped). record() writes one row, so saving a plan costs the same however
+    many plans are stored.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_per_connection: int = 500) -> None:
+        self.path = str(path or PLANS_PATH)
+        self.max_per_connection = max_per_connection
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS plans ("
+            " connection TEXT, fingerprint TEXT, entry TEXT, updated REAL, PRIMARY KEY (connection, fingerprint))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_plans_updated ON plans (connection, updated)")
+        self._conn.commit()
+        if path is None:
+            self._import_legacy()
+
+    def _import_legacy(self) -> None:
+        # Plans captured before the store moved from plans.json
+        if not LEGACY_PLANS_PATH.exists():
+            return
+        try:
+            legacy = load_json(LEGACY_PLANS_PATH, {})
+            rows = [
+                (conn, fp, json.dumps(entry), float(entry.get("updated", 0)))
+                for conn, bucket in legacy.items()
+                for fp, entry in bucket.items()
+            ]
+            with self._lock:
+                self._conn.executemany("INSERT OR IGNORE INTO plans VALUES (?,?,?,?)", rows)
+                self._conn.commit()
+            LEGACY_PLANS_PATH.rename(LEGACY_PLANS_PATH.with_suffix(".json.bak"))
+        except Exception:
+            pass
+
+    def get(self, connection: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry FROM plans WHERE connection = ? AND fingerprint = ?", (connection, fingerprint)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def entries(self, connection: str) -> Dict[str, Dict[str, Any]]:
+        """Every stored plan of ``connection`` by fingerprint, newest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT fingerprint, entry FROM plans WHERE connection = ? ORDER BY updated DESC", (connection,)
+            ).fetchall()
+        return {fp: json.loads(entry) for fp, entry in rows}
+
+    def record(self, connection: str, fingerprint: str, entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store ``entry`` as the latest plan and return the one it replaces, if any."""
+        entry = dict(entry)
+        entry["updated"] = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry FROM plans WHERE connection = ? AND fingerprint = ?", (connection, fingerprint)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plans (connection, fingerprint, entry, updated) VALUES (?,?,?,?)",
+                (connection, fingerprint, json.dumps(entry, default=str), entry["updated"]),
+            )
+            self._writes += 1
+            if self._writes % 50 == 0:
+                self._prune(connection)
+            self._conn.commit()
+        return json.loads(row[0]) if row else None
+
+    def _prune(self, connection: str) -> None:
+        self._conn.execute(
+            "DELETE FROM plans WHERE connection = ? AND updated <= ("
+            " SELECT updated FROM plans WHERE connection = ? ORDER BY updated DESC LIMIT 1 OFFSET ?)",
+            (connection, connection, self.max_per_connection),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
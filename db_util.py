@@ -1,11 +1,16 @@
 from __future__ import annotations
 
+import contextvars
 import os
 import threading
+import time
+from collections import deque
 from dataclasses import dataclass
-from typing import Any, Dict, Mapping, MutableMapping, Optional, Protocol, Tuple, Type
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Mapping, MutableMapping, Optional, Protocol, Tuple, Type
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.url import URL
 from sqlalchemy.engine import make_url
@@ -132,6 +137,9 @@ class DatabaseAdapter(Protocol):
     def build_url(self, config: DatabaseConfig) -> URL:
         ...
 
+    def quote_identifier(self, name: str) -> str:
+        ...
+
 
 class PostgresAdapter:
     drivername = "postgresql+psycopg2"
@@ -148,6 +156,9 @@ class PostgresAdapter:
             database=config.name or "postgres",
         )
 
+    def quote_identifier(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
 
 class MySQLAdapter:
     drivername = "mysql+pymysql"
@@ -164,6 +175,9 @@ class MySQLAdapter:
             database=config.name or "mysql",
         )
 
+    def quote_identifier(self, name: str) -> str:
+        return "`" + name.replace("`", "``") + "`"
+
 
 class SQLiteAdapter:
     drivername = "sqlite"
@@ -176,6 +190,9 @@ class SQLiteAdapter:
         # sqlite uses host/port/user/password differently; URL.create handles this format
         return URL.create(drivername=self.drivername, database=database_path)
 
+    def quote_identifier(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
 
 class ConnectorFactory:
     """Factory to get an adapter for a given database type."""
@@ -197,6 +214,349 @@ class ConnectorFactory:
             )
         return adapter_cls()
 
+    @classmethod
+    def get_adapter_for_engine(cls, engine: Engine) -> DatabaseAdapter:
+        """Resolve the adapter from an Engine's dialect name (e.g. 'postgresql', 'mysql', 'sqlite')."""
+        return cls.get_adapter(engine.dialect.name)
+
+
+# ------------------------------
+# Query instrumentation (events)
+# ------------------------------
+
+
+# Who issued the statements on the current thread/context: "agent", "user" or "app"
+query_source: contextvars.ContextVar[str] = contextvars.ContextVar("askdb_query_source", default="app")
+
+
+@dataclass
+class QueryRecord:
+    """One executed statement as seen by the cursor events.
+
+    For statements that return rows, ``rows`` and ``fetch_ms`` are filled in by
+    record_fetch() once the caller has fetched the result, and ``duration_ms``
+    then includes the fetch; they stay None when nothing reports the fetch.
+    For other statements ``rows`` is the driver's affected-row count.
+    """
+
+    started: float  # wall clock (time.time())
+    duration_ms: float
+    statement: str
+    rows: Optional[int]
+    pool_wait_ms: Optional[float]
+    source: str
+    error: Optional[str] = None
+    fetch_ms: Optional[float] = None
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class QueryMetrics:
+    """Bounded ring buffer of QueryRecords for one Engine (thread-safe)."""
+
+    def __init__(self, max_records: int = 1000) -> None:
+        self._lock = threading.Lock()
+        self.records: Deque[QueryRecord] = deque(maxlen=max_records)
+
+    def add(self, record: QueryRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    def snapshot(self) -> List[QueryRecord]:
+        with self._lock:
+            return list(self.records)
+
+    def latency_percentiles(self, source: Optional[str] = None) -> Dict[str, float]:
+        """p50/p95/max of statement duration (ms) over the buffer, optionally for one source."""
+        durations = sorted(r.duration_ms for r in self.snapshot() if source is None or r.source == source)
+        return {
+            "count": float(len(durations)),
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+            "max": durations[-1] if durations else 0.0,
+        }
+
+
+class _SlowQueryLog:
+    """Appends statements slower than a threshold to a text file (disabled when path is None)."""
+
+    _lock = threading.Lock()
+    path: Optional[str] = None
+    threshold_ms: float = 1000.0
+
+    @classmethod
+    def write(cls, record: QueryRecord, url: str) -> bool:
+        path = cls.path
+        if path is None or record.duration_ms < cls.threshold_ms:
+            return False
+        stamp = datetime.fromtimestamp(record.started).isoformat(timespec="milliseconds")
+        statement = " ".join(record.statement.split())
+        rows = "" if record.rows is None else str(record.rows)
+        status = f"\terror={record.error}" if record.error else ""
+        line = f"{stamp}\t{record.duration_ms:.1f}ms\t{record.source}\trows={rows}\t{url}\t{statement}{status}\n"
+        try:
+            with cls._lock, open(path, "a", encoding="utf-8") as fh:
+                fh.write(line)
+        except Exception:
+            pass
+        return True
+
+
+def configure_slow_query_log(path: Optional[str], threshold_ms: float = 1000.0) -> None:
+    """Enable (path set) or disable (None) the slow-query log for all instrumented engines."""
+    _SlowQueryLog.path = str(path) if path else None
+    _SlowQueryLog.threshold_ms = float(threshold_ms)
+
+
+# Upper bounds (ms) of the checkout wait histogram buckets; the last bucket is open-ended
+WAIT_BUCKETS_MS: Tuple[float, ...] = (1, 5, 10, 50, 100, 500, 1000)
+
+
+class PoolMetrics:
+    """Counters describing how an engine's connection pool behaves (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.invalidations = 0
+        self.recycles = 0
+        self.wait_histogram: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.max_wait_ms = 0.0
+        # How long connections stay checked out (checkout to checkin)
+        self.checkins = 0
+        self.total_hold_ms = 0.0
+        self.max_hold_ms = 0.0
+
+    def record_hold(self, hold_ms: float) -> None:
+        with self._lock:
+            self.checkins += 1
+            self.total_hold_ms += hold_ms
+            self.max_hold_ms = max(self.max_hold_ms, hold_ms)
+
+    def record_wait(self, wait_ms: float) -> None:
+        idx = next((i for i, bound in enumerate(WAIT_BUCKETS_MS) if wait_ms < bound), len(WAIT_BUCKETS_MS))
+        with self._lock:
+            self.checkouts += 1
+            self.wait_histogram[idx] += 1
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def increment(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def wait_percentile(self, pct: float) -> float:
+        """Upper bound (ms) of the histogram bucket holding the pct-th checkout wait."""
+        with self._lock:
+            hist = list(self.wait_histogram)
+            total = self.checkouts
+        if not total:
+            return 0.0
+        target = pct / 100.0 * total
+        seen = 0
+        for idx, count in enumerate(hist):
+            seen += count
+            if seen >= target:
+                return WAIT_BUCKETS_MS[idx] if idx < len(WAIT_BUCKETS_MS) else self.max_wait_ms
+        return self.max_wait_ms
+
+
+_METRICS_KEY = "askdb_metrics"
+_POOL_METRICS_KEY = "askdb_pool_metrics"
+_CONNECTED_KEY = "askdb_connected"
+_INVALIDATED_KEY = "askdb_invalidated"
+_POOL_WAIT_KEY = "askdb_pool_wait_ms"
+_CHECKOUT_AT_KEY = "askdb_checkout_at"
+_LAST_RESULT_KEY = "askdb_last_result"
+
+
+def engine_metrics(engine: Engine) -> Optional[QueryMetrics]:
+    """The QueryMetrics collected for an instrumented engine, if any."""
+    return getattr(engine, _METRICS_KEY, None)
+
+
+def record_fetch(conn: Any, rows: int, fetch_ms: float) -> None:
+    """Complete the QueryRecord of the statement whose result was just fetched on ``conn``.
+
+    Sets the rows returned and the fetch time (added to its duration) and writes
+    the slow-query log entry if the fetch made the statement slow.
+    """
+    last = conn.info.pop(_LAST_RESULT_KEY, None)
+    if last is None:
+        return
+    record, url, logged = last
+    record.rows = rows
+    record.fetch_ms = fetch_ms
+    record.duration_ms += fetch_ms
+    if not logged:
+        _SlowQueryLog.write(record, url)
+
+
+def pool_metrics(engine: Engine) -> Dict[str, Any]:
+    """Snapshot of an engine's pool: live state from the pool plus the instrumented counters.
+
+    Keys: size, checked_out, overflow, max_overflow, timeout, recycle, checkouts, connects,
+    timeouts, invalidations, recycles, wait_histogram (list of (upper_bound_ms | None, count)),
+    wait_p50_ms, wait_p95_ms, max_wait_ms, avg_hold_ms, max_hold_ms. Live values are None for pools that don't report them.
+    """
+    pool = engine.pool
+
+    def live(name: str) -> Optional[int]:
+        fn = getattr(pool, name, None)
+        try:
+            return int(fn()) if callable(fn) else None
+        except Exception:
+            return None
+
+    size = live("size")
+    overflow = live("overflow")
+    snapshot: Dict[str, Any] = {
+        "size": size,
+        "checked_out": live("checkedout"),
+        # QueuePool reports overflow as negative until the base pool is used up
+        "overflow": max(0, overflow) if overflow is not None else None,
+        "max_overflow": getattr(pool, "_max_overflow", None),
+        "timeout": live("timeout"),
+        "recycle": getattr(pool, "_recycle", None),
+    }
+    stats: Optional[PoolMetrics] = getattr(engine, _POOL_METRICS_KEY, None)
+    if stats is not None:
+        with stats._lock:
+            snapshot.update(
+                checkouts=stats.checkouts,
+                connects=stats.connects,
+                timeouts=stats.timeouts,
+                invalidations=stats.invalidations,
+                recycles=stats.recycles,
+                max_wait_ms=stats.max_wait_ms,
+                avg_hold_ms=stats.total_hold_ms / stats.checkins if stats.checkins else 0.0,
+                max_hold_ms=stats.max_hold_ms,
+                wait_histogram=list(zip(list(WAIT_BUCKETS_MS) + [None], stats.wait_histogram)),
+            )
+        snapshot["wait_p50_ms"] = stats.wait_percentile(50)
+        snapshot["wait_p95_ms"] = stats.wait_percentile(95)
+    return snapshot
+
+
+def instrument_engine(engine: Engine, max_records: int = 1000) -> QueryMetrics:
+    """Attach cursor and pool event listeners that record every statement into a ring buffer.
+
+    Idempotent: an already instrumented engine returns its existing metrics.
+    """
+    existing = engine_metrics(engine)
+    if existing is not None:
+        return existing
+    metrics = QueryMetrics(max_records)
+    setattr(engine, _METRICS_KEY, metrics)
+    url = engine.url.render_as_string(hide_password=True)
+
+    pool_stats = PoolMetrics()
+    setattr(engine, _POOL_METRICS_KEY, pool_stats)
+
+    # Pool wait: time spent obtaining a connection from the pool (survives engine.dispose())
+    original_raw_connection = engine.raw_connection
+
+    def timed_raw_connection() -> Any:
+        start = time.perf_counter()
+        try:
+            fairy = original_raw_connection()
+        except PoolTimeoutError:
+            pool_stats.increment("timeouts")
+            raise
+        wait_ms = (time.perf_counter() - start) * 1000.0
+        pool_stats.record_wait(wait_ms)
+        try:
+            fairy.info[_POOL_WAIT_KEY] = wait_ms
+        except Exception:
+            pass
+        return fairy
+
+    engine.raw_connection = timed_raw_connection  # type: ignore[method-assign]
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn: Any, record: Any) -> None:
+        pool_stats.increment("connects")
+        # The pool has no recycle event: a record (record_info survives reconnects) that
+        # opens a new DBAPI connection without having been invalidated was recycled by age
+        if record is None:
+            return
+        if record.record_info.get(_CONNECTED_KEY) and not record.record_info.pop(_INVALIDATED_KEY, False):
+            pool_stats.increment("recycles")
+        record.record_info[_CONNECTED_KEY] = True
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_conn: Any, record: Any, exception: Any) -> None:
+        pool_stats.increment("invalidations")
+        if record is not None:
+            record.record_info[_INVALIDATED_KEY] = True
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_conn: Any, record: Any, exception: Any) -> None:
+        pool_stats.increment("invalidations")
+        if record is not None:
+            record.record_info[_INVALIDATED_KEY] = True
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_conn: Any, record: Any, proxy: Any) -> None:
+        record.info[_CHECKOUT_AT_KEY] = time.perf_counter()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_conn: Any, record: Any) -> None:
+        if record is not None:
+            checked_out = record.info.pop(_CHECKOUT_AT_KEY, None)
+            if checked_out is not None:
+                pool_stats.record_hold((time.perf_counter() - checked_out) * 1000.0)
+            record.info.pop(_POOL_WAIT_KEY, None)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        conn.info.setdefault("askdb_query_start", []).append((time.time(), time.perf_counter()))
+
+    def _finish(conn: Any, statement: str, rows: Optional[int], error: Optional[str], returns_rows: bool = False) -> None:
+        conn.info.pop(_LAST_RESULT_KEY, None)
+        stack = conn.info.get("askdb_query_start")
+        if not stack:
+            return
+        started, t0 = stack.pop()
+        # Attribute the checkout's pool wait to the first statement that ran on it
+        wait = conn.info.pop(_POOL_WAIT_KEY, None)
+        record = QueryRecord(
+            started=started,
+            duration_ms=(time.perf_counter() - t0) * 1000.0,
+            statement=statement,
+            rows=rows,
+            pool_wait_ms=wait,
+            source=query_source.get(),
+            error=error,
+        )
+        metrics.add(record)
+        logged = _SlowQueryLog.write(record, url)
+        if returns_rows:
+            # Rows and fetch time are known once the caller has fetched (record_fetch)
+            conn.info[_LAST_RESULT_KEY] = (record, url, logged)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool) -> None:
+        if getattr(cursor, "description", None) is not None:
+            # rowcount means nothing for a SELECT (-1, or None on some drivers)
+            _finish(conn, statement, None, None, returns_rows=True)
+            return
+        rows = getattr(cursor, "rowcount", -1)
+        _finish(conn, statement, rows if isinstance(rows, int) and rows >= 0 else None, None)
+
+    @event.listens_for(engine, "handle_error")
+    def _on_error(ctx: Any) -> None:
+        if ctx.connection is not None and ctx.statement:
+            _finish(ctx.connection, ctx.statement, None, str(ctx.original_exception))
+
+    return metrics
+
 
 # -----------------------
 # Engine cache (Multiton)
@@ -228,6 +588,7 @@ class _EngineCache:
                 return existing
 
             engine = create_engine(url_str, **engine_options)
+            instrument_engine(engine)
             cls._engines[cache_key] = engine
             return engine
 
@@ -6,6 +6,7 @@ from PySide6 import QtWidgets, QtGui, QtCore
 
 from ui.main_window import MainWindow
 from ui.theme import app_stylesheet
+from ui.watchdog import install_watchdog
 
 
 def main() -> None:
@@ -21,6 +22,8 @@ def main() -> None:
         icon = QtGui.QIcon(str(logo))
         app.setWindowIcon(icon)
     app.setStyleSheet(app_stylesheet())
+    # Record UI-thread stalls (Help > UI Stalls…)
+    install_watchdog()
     w = MainWindow()
     try:
         if logo.exists():
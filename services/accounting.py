@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Tools whose time is spent in the database (sql_db_query_checker is an LLM call)
+SQL_TOOLS = ("sql_db_query", "sql_db_schema", "sql_db_list_tables")
+
+
+@dataclass
+class LLMCall:
+    """One LLM round trip within a question."""
+
+    duration_ms: float = 0.0
+    ttft_ms: Optional[float] = None  # first streamed token, None if the call did not stream
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    usage_reported: bool = False  # False when the server sent no token usage
+
+
+@dataclass
+class QuestionStats:
+    """Accounting for one prompt handled by the agent."""
+
+    llm_calls: List[LLMCall] = field(default_factory=list)
+    sql_ms: float = 0.0
+    sql_calls: int = 0
+    ttft_ms: Optional[float] = None  # question start to the first token from any LLM call
+    wall_ms: float = 0.0
+
+    @property
+    def round_trips(self) -> int:
+        return len(self.llm_calls)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(c.prompt_tokens for c in self.llm_calls)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(c.completion_tokens for c in self.llm_calls)
+
+    @property
+    def usage_reported(self) -> bool:
+        # Some OpenAI-compatible servers send no usage; their token counts are unknown, not zero
+        return all(c.usage_reported for c in self.llm_calls)
+
+    @property
+    def llm_ms(self) -> float:
+        return sum(c.duration_ms for c in self.llm_calls)
+
+    @property
+    def other_ms(self) -> float:
+        # Agent/tool overhead, prompt building and streaming to the UI
+        return max(0.0, self.wall_ms - self.llm_ms - self.sql_ms)
+
+    def summary(self) -> str:
+        tokens = f"{self.prompt_tokens + self.completion_tokens:,}" if self.usage_reported else "n/a"
+        calls = f"{self.round_trips} LLM call{'s' if self.round_trips != 1 else ''}"
+        return f"{calls} · {tokens} tokens · {self.wall_ms / 1000.0:.1f} s"
+
+    def details(self) -> str:
+        tokens = (
+            f"{self.prompt_tokens:,} prompt + {self.completion_tokens:,} completion"
+            if self.usage_reported
+            else "n/a (the server reported no usage)"
+        )
+        lines = [
+            f"Tokens: {tokens}",
+            f"Time: LLM {self.llm_ms / 1000.0:.2f} s · SQL {self.sql_ms / 1000.0:.2f} s ({self.sql_calls} tool calls)"
+            f" · other {self.other_ms / 1000.0:.2f} s",
+        ]
+        if self.ttft_ms is not None:
+            lines.append(f"First token after {self.ttft_ms:.0f} ms")
+        for i, c in enumerate(self.llm_calls, start=1):
+            ttft = f", first token {c.ttft_ms:.0f} ms" if c.ttft_ms is not None else ""
+            tokens = f"{c.prompt_tokens:,} → {c.completion_tokens:,}" if c.usage_reported else "n/a"
+            lines.append(f"  #{i}: {c.duration_ms:.0f} ms{ttft}, {tokens} tokens")
+        return "\n".join(lines)
+
+
+@dataclass
+class SessionStats:
+    """Running totals over the questions asked in one workspace."""
+
+    questions: int = 0
+    round_trips: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_ms: float = 0.0
+    sql_ms: float = 0.0
+    wall_ms: float = 0.0
+    usage_reported: bool = True  # False once any question's token usage was unknown
+
+    def add(self, stats: QuestionStats) -> None:
+        self.questions += 1
+        self.usage_reported = self.usage_reported and stats.usage_reported
+        self.round_trips += stats.round_trips
+        self.prompt_tokens += stats.prompt_tokens
+        self.completion_tokens += stats.completion_tokens
+        self.llm_ms += stats.llm_ms
+        self.sql_ms += stats.sql_ms
+        self.wall_ms += stats.wall_ms
+
+    def summary(self) -> str:
+        if not self.questions:
+            return ""
+        tokens = f"{self.prompt_tokens + self.completion_tokens:,}" if self.usage_reported else "n/a"
+        return (
+            f"{self.questions} question{'s' if self.questions != 1 else ''} · {self.round_trips} LLM calls · "
+            f"{tokens} tokens · LLM {self.llm_ms / 1000.0:.1f} s · SQL {self.sql_ms / 1000.0:.1f} s"
+        )
+
+    def details(self) -> str:
+        if not self.questions:
+            return ""
+        n = float(self.questions)
+        tokens = (
+            f"{(self.prompt_tokens + self.completion_tokens) / n:,.0f} tokens ({self.prompt_tokens / n:,.0f} prompt)"
+            if self.usage_reported
+            else "n/a tokens"
+        )
+        return f"Per question: {self.round_trips / n:.1f} LLM calls, {tokens}, {self.wall_ms / n / 1000.0:.2f} s wall"
+
+
+def _usage_from(response: Any) -> Optional[Dict[str, int]]:
+    """Prompt/completion tokens from an LLMResult (message usage_metadata or llm_output), None if absent."""
+    try:
+        for gens in response.generations or []:
+            for gen in gens:
+                usage = getattr(getattr(gen, "message", None), "usage_metadata", None)
+                if usage:
+                    return {"prompt": int(usage.get("input_tokens", 0)), "completion": int(usage.get("output_tokens", 0))}
+    except Exception:
+        pass
+    try:
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        if usage:
+            return {"prompt": int(usage.get("prompt_tokens", 0)), "completion": int(usage.get("completion_tokens", 0))}
+    except Exception:
+        pass
+    return None
+
+
+class AccountingCallbackHandler(BaseCallbackHandler):
+    """Collects QuestionStats for one question.
+
+    Pass an instance in the ``callbacks`` config of agent.stream(), then call
+    finish() when the stream is exhausted.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.stats = QuestionStats()
+        self._t0 = time.perf_counter()
+        self._llm: Dict[UUID, List[Any]] = {}  # run_id -> [start, LLMCall]
+        self._tools: Dict[UUID, float] = {}
+        self._lock = threading.Lock()
+
+    def _elapsed_ms(self, since: float) -> float:
+        return (time.perf_counter() - since) * 1000.0
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm[run_id] = [time.perf_counter(), LLMCall()]
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            self._llm[run_id] = [time.perf_counter(), LLMCall()]
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            entry = self._llm.get(run_id)
+            if entry is None or entry[1].ttft_ms is not None:
+                return
+            entry[1].ttft_ms = self._elapsed_ms(entry[0])
+            if self.stats.ttft_ms is None:
+                self.stats.ttft_ms = self._elapsed_ms(self._t0)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            entry = self._llm.pop(run_id, None)
+            if entry is None:
+                return
+            call = entry[1]
+            call.duration_ms = self._elapsed_ms(entry[0])
+            usage = _usage_from(response)
+            if usage is not None:
+                call.prompt_tokens, call.completion_tokens = usage["prompt"], usage["completion"]
+                call.usage_reported = True
+            self.stats.llm_calls.append(call)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        with self._lock:
+            entry = self._llm.pop(run_id, None)
+            if entry is not None:
+                entry[1].duration_ms = self._elapsed_ms(entry[0])
+                self.stats.llm_calls.append(entry[1])
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or ""
+        if name in SQL_TOOLS:
+            with self._lock:
+                self._tools[run_id] = time.perf_counter()
+
+    def _end_tool(self, run_id: UUID) -> None:
+        with self._lock:
+            start = self._tools.pop(run_id, None)
+            if start is not None:
+                self.stats.sql_ms += self._elapsed_ms(start)
+                self.stats.sql_calls += 1
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end_tool(run_id)
+
+    def finish(self) -> QuestionStats:
+        self.stats.wall_ms = self._elapsed_ms(self._t0)
+        return self.stats
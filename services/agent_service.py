@@ -4,9 +4,21 @@ import os
 from sqlalchemy.engine import Engine
 from typing import Optional, Dict, Any
 
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_openai import ChatOpenAI
 from langchain_community.utilities import SQLDatabase
 from langchain_community.agent_toolkits import create_sql_agent
+from langchain_community.agent_toolkits.sql.prompt import SQL_PREFIX
+
+from services.concurrent_agent import ConcurrentAgentExecutor, concurrency_for
+from services.fast_sql import FastSQLAgent
+from services.sql_validation import LocalSQLToolkit
+
+# sql_db_query validates locally (EXPLAIN dry run), so there is no checker tool to call
+_AGENT_PREFIX = SQL_PREFIX.replace(
+    "You MUST double check your query before executing it.",
+    "Queries are validated automatically before they run.",
+)
 
 
 def _apply_tracing_env(tracing: Optional[Dict[str, Any]]) -> None:
@@ -29,20 +41,73 @@ def _apply_tracing_env(tracing: Optional[Dict[str, Any]]) -> None:
         os.environ.pop("LANGCHAIN_TRACING_V2", None)
 
 
-def create_agent(engine: Engine, model: str, api_key: str, tracing: Optional[Dict[str, Any]] = None):
+LLM_BACKENDS = ("openai", "fake")
+
+
+def create_llm(model: str, api_key: str, backend: Optional[Dict[str, Any]] = None) -> BaseChatModel:
+    """Build the chat model for the agent.
+
+    ``backend`` keys: ``name`` ("openai" or "fake"), ``base_url`` for any
+    OpenAI-compatible server (e.g. a local stub), and for the fake backend
+    ``latency_ms``, ``token_latency_ms`` and an optional ``script`` (see
+    services.fake_llm.ScriptedChatModel).
+    """
+    backend = backend or {}
+    name = str(backend.get("name") or "openai")
+    if name == "fake":
+        from services.fake_llm import ScriptedChatModel
+
+        return ScriptedChatModel(
+            latency_ms=float(backend.get("latency_ms", 0) or 0),
+            token_latency_ms=float(backend.get("token_latency_ms", 0) or 0),
+            script=backend.get("script"),
+        )
+    if name != "openai":
+        raise ValueError(f"Unknown LLM backend '{name}'. Expected one of: {', '.join(LLM_BACKENDS)}")
+    base_url = str(backend.get("base_url") or "").strip()
+    if base_url:
+        # Local OpenAI-compatible servers usually accept any key; those that ignore
+        # stream_options send no usage, which the accounting shows as n/a
+        return ChatOpenAI(model=model, temperature=0, base_url=base_url, api_key=api_key or "not-needed", stream_usage=True)
+    # The agent streams; ask OpenAI for token usage on the final chunk
+    return ChatOpenAI(model=model, temperature=0, stream_usage=True)
+
+
+def create_agent(
+    engine: Engine,
+    model: str,
+    api_key: str,
+    tracing: Optional[Dict[str, Any]] = None,
+    backend: Optional[Dict[str, Any]] = None,
+    fast: bool = False,
+    observation_token_budget: int = 1000,
+):
+    """The SQL agent; with ``fast`` a single-shot FastSQLAgent that falls back to it.
+
+    ``observation_token_budget`` caps sql_db_query results shown to the model (0 = full results).
+    """
     if api_key:
         os.environ["OPENAI_API_KEY"] = api_key
     _apply_tracing_env(tracing)
     db = SQLDatabase(engine=engine)
-    llm = ChatOpenAI(model=model, temperature=0)
+    llm = create_llm(model, api_key, backend)
+    toolkit = LocalSQLToolkit(db=db, llm=llm, observation_token_budget=observation_token_budget)
     agent = create_sql_agent(
         llm,
-        db=db,
+        toolkit=toolkit,
         agent_type="tool-calling",
+        prefix=_AGENT_PREFIX,
         verbose=False,
         top_k=10,
         agent_executor_kwargs={"return_intermediate_steps": True},
     )
+    # Run a step's independent read-only tool calls on several pooled connections
+    agent = ConcurrentAgentExecutor.from_executor(agent, concurrency_for(engine))
+    if fast:
+        query_tool = next(t for t in toolkit.get_tools() if t.name == "sql_db_query")
+        fast_agent = FastSQLAgent(llm, db, fallback=agent, top_k=10, query_tool=query_tool)
+        fast_agent.warm()
+        return fast_agent
     return agent
 
 
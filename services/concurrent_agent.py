@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import contextvars
+import re
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+from langchain_classic.agents.agent import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import CallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+from pydantic import PrivateAttr
+from sqlalchemy.engine import Engine
+
+from services.paging import is_row_query
+from services.sql_utils import strip_literals
+
+
+# Tools that only read from the database and do not depend on each other's output
+READ_ONLY_TOOLS = ("sql_db_query", "sql_db_schema", "sql_db_list_tables")
+# Anywhere in a row query (e.g. WITH d AS (DELETE … RETURNING *) SELECT …, SELECT … INTO t,
+# SELECT … FOR UPDATE) these make it write or lock; a false match only costs concurrency
+_WRITE_RE = re.compile(r"\b(insert|update|delete|merge|truncate|create|drop|alter|into)\b", re.IGNORECASE)
+
+
+def _query_of(action: AgentAction) -> str:
+    tool_input = action.tool_input
+    if isinstance(tool_input, dict):
+        for k in ("query", "sql", "input"):
+            if isinstance(tool_input.get(k), str):
+                return tool_input[k]
+        return ""
+    return str(tool_input or "")
+
+
+def is_parallel_safe(action: AgentAction) -> bool:
+    if action.tool not in READ_ONLY_TOOLS:
+        return False
+    if action.tool != "sql_db_query":
+        return True
+    # sql_db_query only runs concurrently for SELECT-like statements that modify nothing
+    query = _query_of(action)
+    return is_row_query(query) and not _WRITE_RE.search(strip_literals(query))
+
+
+def concurrency_for(engine: Engine, limit: int = 4) -> int:
+    """Concurrency bound for one step: ``limit``, capped at the engine's pool size."""
+    try:
+        return max(1, min(limit, int(engine.pool.size())))
+    except Exception:
+        return max(1, limit)
+
+
+class ConcurrentAgentExecutor(AgentExecutor):
+    """AgentExecutor that runs a step's independent read-only tool calls concurrently.
+
+    When the model emits several actions in one step (e.g. sql_db_schema for
+    three tables plus two probe queries), those in READ_ONLY_TOOLS are started
+    together on up to ``max_concurrency`` threads, each on its own pooled
+    connection; the rest run serially as before. Steps are still yielded in the
+    model's order, and each thread runs in a copy of the caller's context so
+    query_source and tracing spans carry over.
+    """
+
+    max_concurrency: int = 4
+    _local: Any = PrivateAttr(default_factory=threading.local)
+
+    @classmethod
+    def from_executor(cls, executor: AgentExecutor, max_concurrency: int = 4) -> "ConcurrentAgentExecutor":
+        fields = {name: getattr(executor, name) for name in executor.model_fields_set}
+        return cls(max_concurrency=max_concurrency, **fields)
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Any],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        # The base class yields every action of a step before performing any,
+        # so the whole batch is known when _perform_agent_action is first called
+        batch: Dict[str, Any] = {"actions": [], "futures": None}
+        self._local.batch = batch
+        try:
+            for item in super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager):
+                if isinstance(item, AgentAction):
+                    batch["actions"].append(item)
+                yield item
+        finally:
+            if getattr(self._local, "batch", None) is batch:
+                self._local.batch = None
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> AgentStep:
+        batch = getattr(self._local, "batch", None)
+        if batch is None or self.max_concurrency <= 1:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        if batch["futures"] is None:
+            batch["futures"] = self._start_batch(batch["actions"], name_to_tool_map, color_mapping, run_manager)
+        future: Optional[Future] = batch["futures"].get(id(agent_action))
+        if future is None:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        return future.result()
+
+    def _start_batch(
+        self,
+        actions: List[AgentAction],
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        run_manager: Optional[CallbackManagerForChainRun],
+    ) -> Dict[int, Future]:
+        parallel = [a for a in actions if is_parallel_safe(a) and a.tool in name_to_tool_map]
+        if len(parallel) < 2:
+            return {}
+        futures: Dict[int, Future] = {}
+        perform = super()._perform_agent_action
+        pool = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(parallel)), thread_name_prefix="agent-tool")
+        for action in parallel:
+            ctx = contextvars.copy_context()
+            futures[id(action)] = pool.submit(ctx.run, perform, name_to_tool_map, color_mapping, action, run_manager)
+        # Queued calls still run; steps are yielded in order as their futures complete
+        pool.shutdown(wait=False)
+        return futures
@@ -1,13 +1,32 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
+from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
-from db_util import create_engine_from_dict
+from db_util import create_engine_from_dict, record_fetch
 
 
 def build_engine(config: Dict[str, Any]) -> Engine:
     return create_engine_from_dict(config)
 
 
+def connection_key(engine: Engine) -> str:
+    """Stable, password-free identity of the database an Engine points at."""
+    try:
+        return engine.url.render_as_string(hide_password=True)
+    except Exception:
+        return str(engine.url)
+
+
+def fetch_rows(engine: Engine, sql: str, params: Optional[Dict[str, Any]] = None) -> Tuple[List[List[Any]], List[str]]:
+    """Execute ``sql`` and return (rows as lists, column names), as the results grid expects."""
+    with engine.connect() as conn:
+        res = conn.execute(text(sql.strip()), params) if params else conn.execute(text(sql.strip()))
+        cols = list(res.keys())
+        start = time.perf_counter()
+        rows = [list(row) for row in res.fetchall()]
+        record_fetch(conn, len(rows), (time.perf_counter() - start) * 1000.0)
+    return rows, cols
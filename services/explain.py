@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+
+from services.paging import analyze_query, is_row_query
+from services.sql_utils import mask_sql, table_aliases
+
+
+@dataclass
+class PlanEstimate:
+    """Planner estimate for a statement.
+
+    ``rows`` is the number of rows the statement is expected to return: the
+    root node's estimate on Postgres, the rows produced by the last join step
+    on MySQL, and the largest table scanned on SQLite (which has no row
+    estimates), capped by a top-level LIMIT or a single-row aggregate.
+    ``cost`` is the planner's total cost in its own units (not available on SQLite). ``shape`` lists the plan nodes in
+    depth-first order, e.g. ["Limit", "Seq Scan on orders"].
+    """
+
+    dialect: str
+    rows: Optional[float] = None
+    cost: Optional[float] = None
+    shape: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        parts: List[str] = []
+        if self.rows is not None:
+            parts.append(f"~{_human(self.rows)} rows")
+        if self.cost is not None:
+            parts.append(f"cost {_human(self.cost)}")
+        return " · ".join(parts) if parts else "no estimate"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"dialect": self.dialect, "rows": self.rows, "cost": self.cost, "shape": list(self.shape)}
+
+
+def _human(value: float) -> str:
+    v = float(value)
+    for unit, size in (("G", 1e9), ("M", 1e6), ("k", 1e3)):
+        if abs(v) >= size:
+            return f"{v / size:.1f}{unit}"
+    return f"{v:.0f}" if v == int(v) else f"{v:.1f}"
+
+
+def is_explainable(sql: str) -> bool:
+    """Only row queries are pre-flighted; DML/DDL runs as before."""
+    return is_row_query(sql)
+
+
+# ---------------
+# Dialect parsers
+# ---------------
+
+
+def _explain_postgres(conn: Connection, sql: str) -> PlanEstimate:
+    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    data = json.loads(raw) if isinstance(raw, str) else raw
+    root = data[0]["Plan"]
+    est = PlanEstimate("postgresql", cost=float(root.get("Total Cost", 0.0)))
+
+    def walk(node: Dict[str, Any]) -> None:
+        label = str(node.get("Node Type", "?"))
+        if node.get("Relation Name"):
+            label += f" on {node['Relation Name']}"
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        est.shape.append(label)
+        for child in node.get("Plans", []) or []:
+            walk(child)
+
+    walk(root)
+    # Scans under a Limit or Aggregate carry the table's size; the root is what comes back
+    if root.get("Plan Rows") is not None:
+        est.rows = float(root["Plan Rows"])
+    return est
+
+
+def _explain_mysql(conn: Connection, sql: str) -> PlanEstimate:
+    raw = conn.execute(text(f"EXPLAIN FORMAT=JSON {sql}")).scalar()
+    data = json.loads(raw) if isinstance(raw, (str, bytes)) else raw
+    block = data.get("query_block", {})
+    est = PlanEstimate("mysql")
+    try:
+        est.cost = float(block.get("cost_info", {}).get("query_cost"))
+    except (TypeError, ValueError):
+        est.cost = None
+    rows: List[float] = []
+
+    def walk(node: Any) -> None:
+        if isinstance(node, dict):
+            if "table_name" in node and "access_type" in node:
+                label = f"{node['access_type']} on {node['table_name']}"
+                if node.get("key"):
+                    label += f" using {node['key']}"
+                est.shape.append(label)
+                # Tables appear in join order; the last one's output is the join's result
+                try:
+                    rows.append(float(node["rows_produced_per_join"]))
+                except (KeyError, TypeError, ValueError):
+                    pass
+            for value in node.values():
+                walk(value)
+        elif isinstance(node, list):
+            for value in node:
+                walk(value)
+
+    walk(block)
+    est.rows = _cap_rows(sql, rows[-1] if rows else None)
+    return est
+
+
+_LIMIT_RE = re.compile(r"\blimit\s+(\d+)", re.IGNORECASE)
+_SELECT_LIST_RE = re.compile(r"\bselect\b(.*?)\bfrom\b", re.IGNORECASE | re.DOTALL)
+_AGGREGATE_RE = re.compile(r"\b(count|sum|avg|min|max|total|group_concat|string_agg|array_agg)\s*\(", re.IGNORECASE)
+_GROUPING_RE = re.compile(r"\b(group\s+by|over|union|intersect|except)\b", re.IGNORECASE)
+
+
+def _cap_rows(sql: str, rows: Optional[float]) -> Optional[float]:
+    """Bound a scan-based estimate by what the statement can return (top-level LIMIT, plain aggregate)."""
+    if rows is None:
+        return None
+    masked = mask_sql(sql)
+    select = _SELECT_LIST_RE.search(masked)
+    if select and _AGGREGATE_RE.search(select.group(1)) and not _GROUPING_RE.search(masked):
+        return min(rows, 1.0)
+    limits = _LIMIT_RE.findall(masked)
+    if limits:
+        return min(rows, float(limits[-1]))
+    return rows
+
+
+_SQLITE_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?([A-Za-z_][\w$]*)", re.IGNORECASE)
+
+
+def _sqlite_table_rows(conn: Connection, table: str) -> Optional[float]:
+    # Prefer ANALYZE statistics; otherwise max(rowid) is an O(log n) size estimate
+    try:
+        stat = conn.execute(
+            text("SELECT stat FROM sqlite_stat1 WHERE tbl = :t AND idx IS NULL"), {"t": table}
+        ).scalar()
+        if stat is None:
+            stat = conn.execute(text("SELECT stat FROM sqlite_stat1 WHERE tbl = :t"), {"t": table}).scalar()
+        if stat:
+            return float(str(stat).split()[0])
+    except Exception:
+        pass
+    try:
+        quoted = '"' + table.replace('"', '""') + '"'
+        value = conn.execute(text(f"SELECT max(rowid) FROM {quoted}")).scalar()
+        return float(value or 0)
+    except Exception:
+        return None
+
+
+def _explain_sqlite(conn: Connection, sql: str) -> PlanEstimate:
+    est = PlanEstimate("sqlite")
+    rows: List[float] = []
+    # Plan details name tables by their alias when one is used
+    aliases = table_aliases(sql)
+    for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall():
+        detail = str(row[-1])
+        est.shape.append(detail)
+        m = _SQLITE_SCAN_RE.match(detail)
+        if m and m.group(1).upper() != "CONSTANT":
+            n = _sqlite_table_rows(conn, aliases.get(m.group(1).lower(), m.group(1)))
+            if n is not None:
+                rows.append(n)
+    est.rows = _cap_rows(sql, max(rows) if rows else None)
+    return est
+
+
+_EXPLAINERS = {
+    "postgresql": _explain_postgres,
+    "mysql": _explain_mysql,
+    "sqlite": _explain_sqlite,
+}
+
+
+def explain_sql(engine: Engine, sql: str) -> PlanEstimate:
+    """Run the dialect's EXPLAIN for ``sql`` and return the planner's estimate.
+
+    Raises ValueError for dialects without an explainer; database errors propagate.
+    """
+    explainer = _EXPLAINERS.get(engine.dialect.name)
+    if explainer is None:
+        raise ValueError(f"EXPLAIN is not supported for dialect '{engine.dialect.name}'")
+    statement = analyze_query(sql).sql
+    with engine.connect() as conn:
+        return explainer(conn, statement)
+
+
+def check_estimate(estimate: PlanEstimate, max_rows: int = 0, max_cost: float = 0) -> Optional[str]:
+    """Return a human-readable reason when the estimate exceeds a threshold (0 disables it)."""
+    if max_rows and estimate.rows is not None and estimate.rows > max_rows:
+        return f"Estimated {_human(estimate.rows)} rows exceeds the limit of {_human(max_rows)}."
+    if max_cost and estimate.cost is not None and estimate.cost > max_cost:
+        return f"Estimated cost {_human(estimate.cost)} exceeds the limit of {_human(max_cost)}."
+    return None
+
+
+# Table and index access nodes: PostgreSQL "Seq Scan on t" / "Bitmap Index Scan using ix", MySQL
+# "ref on t using ix", SQLite "SCAN t" / "SEARCH t USING INDEX ix". Joins, sorts, limits and
+# SQLite's "USE TEMP B-TREE" notes are left out.
+_ACCESS_NODE_RE = re.compile(r"^(scan|search)\b| on \S| using \S", re.IGNORECASE)
+
+
+def _scan_nodes(shape: List[str]) -> List[str]:
+    return [s for s in shape if _ACCESS_NODE_RE.search(s)]
+
+
+def detect_plan_regression(
+    previous: Dict[str, Any], current: PlanEstimate, cost_factor: float = 2.0
+) -> Optional[str]:
+    """Compare a stored plan (PlanEstimate.to_dict() form) with a fresh estimate.
+
+    Returns a short description when the plan changed shape (e.g. an index scan
+    became a sequential scan) or the estimated cost grew by more than
+    ``cost_factor``; None when the plan looks the same.
+    """
+    before = [str(s) for s in previous.get("shape") or []]
+    after = list(current.shape)
+    if before and after and before != after:
+        old_nodes, new_nodes = _scan_nodes(before) or before, _scan_nodes(after) or after
+        removed = [n for n in old_nodes if n not in new_nodes]
+        added = [n for n in new_nodes if n not in old_nodes]
+        if removed or added:
+            return f"Plan changed: {', '.join(removed) or '—'} → {', '.join(added) or '—'}"
+        return "Plan changed shape"
+    old_cost = previous.get("cost")
+    if old_cost and current.cost is not None and current.cost > float(old_cost) * cost_factor:
+        return f"Estimated cost {_human(float(old_cost))} → {_human(current.cost)}"
+    return None
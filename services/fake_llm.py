@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from services.result_summary import parse_row_count
+
+
+def _approx_tokens(text: str) -> int:
+    # Roughly 4 characters per token, like OpenAI's rule of thumb
+    return max(1, len(text) // 4)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic offline chat model that drives the SQL agent through a fixed plan.
+
+    Without bound tools (the single-shot fast mode) it replies with a query over
+    the first table in the prompt's schema. Otherwise each question (the
+    messages after the last human message) is answered in
+    steps: list tables, fetch the schema of the first ``schema_tables`` tables
+    (one tool call per table in the same step), run one query, then answer
+    with a summary of the observation. A follow-up whose question carries known
+    schema (services.memory) skips straight to the query. ``script`` replaces that plan with
+    explicit steps, each ``{"tool": name, "args": {...}}``, ``{"tools": [...]}``
+    (several calls at once) or ``{"text": "..."}``; the last step is repeated if the
+    agent keeps going. ``latency_ms`` is slept before every response and
+    ``token_latency_ms`` between streamed chunks, so agent overhead can be
+    measured against a known model time.
+    """
+
+    latency_ms: float = 0.0
+    token_latency_ms: float = 0.0
+    schema_tables: int = 2
+    query_limit: int = 10
+    script: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "askdb-scripted"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency_ms": self.latency_ms, "script": bool(self.script)}
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> Any:
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    # Plan -------------------------------------------------------------------
+
+    def _next_step(self, messages: List[BaseMessage], tools_bound: bool = True) -> Dict[str, Any]:
+        if not tools_bound and not self.script:
+            # Single-shot prompt (services.fast_sql): answer with SQL over the first table in the schema
+            schema = "\n".join(str(m.content) for m in messages)
+            m = re.search(r"CREATE TABLE\s+[\"`\[]?(\w+)", schema, re.IGNORECASE)
+            if not m:
+                return {"text": "CANNOT_ANSWER"}
+            return {"text": f"```sql\nSELECT * FROM {m.group(1)} LIMIT {self.query_limit}\n```"}
+        last_human = max((i for i, m in enumerate(messages) if isinstance(m, HumanMessage)), default=-1)
+        turn = messages[last_human + 1 :]
+        # Only count our own tool calls: the SQL agent's prompt itself ends with a plain AIMessage
+        step = sum(1 for m in turn if isinstance(m, AIMessage) and m.tool_calls)
+        if self.script:
+            return dict(self.script[min(step, len(self.script) - 1)])
+        observations = [str(m.content) for m in turn if isinstance(m, ToolMessage)]
+        question = str(messages[last_human].content) if last_human >= 0 else ""
+        known = re.search(r"^Known schema:\n- ([\w$]+)\(", question, re.MULTILINE)
+        if known:
+            if step == 0:
+                return {"tool": "sql_db_query", "args": {"query": f"SELECT * FROM {known.group(1)} LIMIT {self.query_limit}"}}
+            step += 2  # discovery skipped
+        if step == 0:
+            return {"tool": "sql_db_list_tables", "args": {"tool_input": ""}}
+        tables = [t.strip() for t in (observations[0] if observations else "").split(",") if t.strip()]
+        if step == 1 and tables:
+            # One call per table in a single step, as models do when several tables look relevant
+            return {"tools": [{"tool": "sql_db_schema", "args": {"table_names": t}} for t in tables[: self.schema_tables]]}
+        if step == 2 and tables:
+            return {"tool": "sql_db_query", "args": {"query": f"SELECT * FROM {tables[0]} LIMIT {self.query_limit}"}}
+        result = observations[-1] if observations else ""
+        rows = parse_row_count(result) or len(re.findall(r"\(", result))
+        preview = result if len(result) <= 300 else result[:297] + "…"
+        return {"text": f"**Answer:** the query returned {rows} rows.\n\n{preview}"}
+
+    def _message_for(self, step: Dict[str, Any], messages: List[BaseMessage]) -> AIMessage:
+        prompt_tokens = sum(_approx_tokens(str(m.content)) for m in messages)
+        calls = step.get("tools") or ([step] if "tool" in step else [])
+        if calls:
+            tool_calls = [
+                {"name": c["tool"], "args": c.get("args") or {}, "id": f"call_{len(messages)}_{i}_{c['tool']}", "type": "tool_call"}
+                for i, c in enumerate(calls)
+            ]
+            completion = _approx_tokens(json.dumps([c["args"] for c in tool_calls]))
+            return AIMessage(
+                content="",
+                tool_calls=tool_calls,
+                usage_metadata={"input_tokens": prompt_tokens, "output_tokens": completion, "total_tokens": prompt_tokens + completion},
+            )
+        text = str(step.get("text", ""))
+        completion = _approx_tokens(text)
+        return AIMessage(
+            content=text,
+            usage_metadata={"input_tokens": prompt_tokens, "output_tokens": completion, "total_tokens": prompt_tokens + completion},
+        )
+
+    # BaseChatModel API --------------------------------------------------------
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        message = self._message_for(self._next_step(messages, bool(kwargs.get("tools"))), messages)
+        usage = dict(message.usage_metadata or {})
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={
+                "token_usage": {
+                    "prompt_tokens": usage.get("input_tokens", 0),
+                    "completion_tokens": usage.get("output_tokens", 0),
+                    "total_tokens": usage.get("total_tokens", 0),
+                },
+                "model_name": self._llm_type,
+            },
+        )
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        message = self._message_for(self._next_step(messages, bool(kwargs.get("tools"))), messages)
+        if message.tool_calls:
+            for i, call in enumerate(message.tool_calls):
+                yield ChatGenerationChunk(
+                    message=AIMessageChunk(
+                        content="",
+                        tool_call_chunks=[{"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i, "type": "tool_call_chunk"}],
+                        usage_metadata=message.usage_metadata if i == len(message.tool_calls) - 1 else None,
+                    )
+                )
+            return
+        words = re.findall(r"\S+\s*|\s+", str(message.content)) or [""]
+        for i, word in enumerate(words):
+            if i and self.token_latency_ms:
+                time.sleep(self.token_latency_ms / 1000.0)
+            # BaseChatModel.stream() reports each chunk to on_llm_new_token
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=word, usage_metadata=message.usage_metadata if i == len(words) - 1 else None)
+            )
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_community.utilities import SQLDatabase
+from langchain_core.agents import AgentAction, AgentStep
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.tools import BaseTool
+
+from services.db_service import connection_key
+from services.memory import result_shape
+from services.sql_utils import mask_sql, split_top_level
+from services.sql_validation import QueryValidator, ValidatedQuerySQLDatabaseTool
+from services.streaming import NO_STREAM_TAG
+
+
+class SchemaCache:
+    """Per-connection cache of table names, column names and table info (DDL + sample rows).
+
+    Shared by every agent created on the same connection, so only the first
+    question after connecting pays for schema introspection. The main window
+    invalidates a connection's entry when its workspace closes or reconnects.
+    """
+
+    _lock = threading.Lock()
+    _entries: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def _entry(cls, db: SQLDatabase) -> Dict[str, Any]:
+        key = connection_key(db._engine)
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is None:
+                tables = sorted(db.get_usable_table_names())
+                columns: Dict[str, List[str]] = {}
+                for table in db._metadata.sorted_tables:
+                    columns[table.name] = [c.name for c in table.columns]
+                entry = {"tables": tables, "columns": columns, "info": {}}
+                cls._entries[key] = entry
+            return entry
+
+    @classmethod
+    def tables(cls, db: SQLDatabase) -> List[str]:
+        return list(cls._entry(db)["tables"])
+
+    @classmethod
+    def columns(cls, db: SQLDatabase) -> Dict[str, List[str]]:
+        return dict(cls._entry(db)["columns"])
+
+    @classmethod
+    def table_info(cls, db: SQLDatabase, tables: List[str]) -> str:
+        entry = cls._entry(db)
+        info: Dict[str, str] = entry["info"]
+        missing = [t for t in tables if t not in info]
+        for table in missing:
+            text = db.get_table_info_no_throw([table])
+            with cls._lock:
+                info[table] = text
+        return "\n\n".join(info[t] for t in tables if info.get(t))
+
+    @classmethod
+    def invalidate(cls, engine: Any = None) -> None:
+        with cls._lock:
+            if engine is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(connection_key(engine), None)
+
+
+def _words(text: str) -> List[str]:
+    words = []
+    for w in re.findall(r"[a-z0-9]+", text.lower()):
+        if len(w) < 3:
+            continue
+        # Crude singularization so "orders" matches "order"
+        words.append(w[:-1] if w.endswith("s") and len(w) > 3 else w)
+    return words
+
+
+def relevant_tables(question: str, tables: List[str], columns: Dict[str, List[str]], limit: int = 6) -> List[str]:
+    """Pick the tables whose name or columns overlap the question, most relevant first."""
+    if len(tables) <= limit:
+        return list(tables)
+    asked = set(_words(question))
+    scores: Dict[str, float] = {}
+    for table in tables:
+        name_words = set(_words(table.replace("_", " ")))
+        col_words = set(w for c in columns.get(table, []) for w in _words(c.replace("_", " ")))
+        score = 3.0 * len(asked & name_words) + len(asked & col_words)
+        if score:
+            scores[table] = score
+    ranked = sorted(scores, key=lambda t: (-scores[t], t))
+    return ranked[:limit] if ranked else list(tables[:limit])
+
+
+def _with_foreign_keys(db: SQLDatabase, chosen: List[str], limit: int) -> List[str]:
+    # Add tables referenced by the chosen ones so joins are possible
+    out = list(chosen)
+    for table in db._metadata.sorted_tables:
+        if table.name not in chosen:
+            continue
+        for fk in table.foreign_keys:
+            ref = fk.column.table.name
+            if ref not in out and len(out) < limit:
+                out.append(ref)
+    return out
+
+
+_SYSTEM_PROMPT = """You are an expert {dialect} analyst. Write one syntactically correct, read-only {dialect} query that answers the user's question.
+Unless the user asks for a specific number of rows, limit the query to at most {top_k} results. Only select the columns relevant to the question.
+Use only these tables and columns:
+
+{schema}
+
+Reply with the query in a single ```sql code block and nothing else. If the question cannot be answered from these tables, reply CANNOT_ANSWER."""
+
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+
+
+def extract_sql(text: str) -> Optional[str]:
+    """The query from a model reply (```sql block or bare statement), or None if it is not a single read-only query."""
+    if not text or "CANNOT_ANSWER" in text:
+        return None
+    m = re.search(r"```(?:sql)?\s*(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    sql = (m.group(1) if m else text).strip().rstrip(";").strip()
+    # One statement only: "SELECT 1; DROP TABLE x" must not reach the database
+    statements = [part for part in split_top_level(sql, ";") if mask_sql(part).strip()]
+    if len(statements) != 1:
+        return None
+    sql = statements[0].strip()
+    return sql if _READ_ONLY.match(sql) else None
+
+
+class FastSQLAgent:
+    """Single-shot NL→SQL: one LLM call over cached, relevant schema, then one query.
+
+    ``stream()`` yields the same chunk shapes as the AgentExecutor it replaces
+    ({"actions": ...}, {"steps": ...}, {"output": ...}), so _AgentStreamWorker
+    consumes either. Any failure (no usable SQL, LLM or database error) re-asks
+    the question through ``fallback``, the full multi-step agent.
+    """
+
+    def __init__(
+        self,
+        llm: BaseChatModel,
+        db: SQLDatabase,
+        fallback: Any,
+        top_k: int = 10,
+        max_tables: int = 6,
+        query_tool: Optional[BaseTool] = None,
+    ) -> None:
+        self.llm = llm
+        self.db = db
+        self.fallback = fallback
+        self.top_k = top_k
+        self.max_tables = max_tables
+        # Pass the agent's sql_db_query so both share the validator cache and the result summary budget
+        self.query_tool = query_tool or ValidatedQuerySQLDatabaseTool(db=db, validator=QueryValidator(db._engine))
+
+    def warm(self) -> None:
+        SchemaCache.tables(self.db)
+
+    def prompt_for(self, question: str) -> List[Any]:
+        tables = relevant_tables(question, SchemaCache.tables(self.db), SchemaCache.columns(self.db), self.max_tables)
+        tables = _with_foreign_keys(self.db, tables, self.max_tables + 2)
+        system = _SYSTEM_PROMPT.format(dialect=self.db.dialect, top_k=self.top_k, schema=SchemaCache.table_info(self.db, tables))
+        return [SystemMessage(content=system), HumanMessage(content=question)]
+
+    def stream(self, inputs: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        question = str(inputs.get("input", ""))
+        try:
+            # The reply is SQL, not an answer for the chat bubble
+            llm_config = dict(config or {})
+            llm_config["tags"] = list(llm_config.get("tags") or []) + [NO_STREAM_TAG]
+            reply = self.llm.invoke(self.prompt_for(question), config=llm_config)
+            sql = extract_sql(str(getattr(reply, "content", "") or ""))
+        except Exception:
+            sql = None
+        if sql is None:
+            yield from self.fallback.stream(inputs, config=config)
+            return
+        action = AgentAction(tool="sql_db_query", tool_input={"query": sql}, log="")
+        yield {"actions": [action]}
+        try:
+            observation = str(self.query_tool.invoke({"query": sql}, config=config))
+        except Exception as ex:  # noqa: BLE001
+            observation = f"Error: {ex}"
+        if observation.startswith("Error:"):
+            yield from self.fallback.stream(inputs, config=config)
+            return
+        yield {"steps": [AgentStep(action=action, observation=observation)]}
+        # No second LLM call to phrase an answer: describe what the query returned
+        yield {"output": f"The query returned {result_shape(observation)}; the results are shown below."}
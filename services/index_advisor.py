@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+from services.explain import explain_sql
+from services.sql_utils import fingerprint_sql, table_aliases
+
+
+@dataclass
+class IndexCandidate:
+    """A proposed index and the evidence behind it.
+
+    ``observed_ms`` sums the last observed run time of every slow query that
+    would use it. ``verification`` describes how the benefit was checked
+    (hypothetical index, SQLite copy) and ``verified`` is None when it could not
+    be checked on this database.
+    """
+
+    table: str
+    columns: List[str]
+    statement: str
+    queries: List[str] = field(default_factory=list)
+    observed_ms: float = 0.0
+    benefit: str = ""
+    verification: str = ""
+    verified: Optional[bool] = None
+
+
+# -----------------------------
+# Plan and predicate extraction
+# -----------------------------
+
+
+_SCAN_PATTERNS = (
+    re.compile(r"^Seq Scan on (\S+)", re.IGNORECASE),  # postgres
+    re.compile(r"^ALL on (\S+)", re.IGNORECASE),  # mysql access_type=ALL
+    re.compile(r"^SCAN (?:TABLE )?([A-Za-z_][\w$]*)(?!.*\bUSING\b.*\bINDEX\b)", re.IGNORECASE),  # sqlite
+)
+_COLUMN = r"(?:([A-Za-z_][\w$]*)\s*\.\s*)?([A-Za-z_][\w$]*)"
+_PREDICATE_RE = re.compile(
+    rf"{_COLUMN}\s*(=|<>|!=|<=|>=|<|>|\bin\b|\blike\b|\bbetween\b)\s*(?:{_COLUMN})?",
+    re.IGNORECASE,
+)
+_CLAUSE_RE = re.compile(
+    r"\b(where|on|having)\b(.*?)(?=\b(?:where|group\s+by|order\s+by|limit|having|union|window|join|left|right|inner|full|cross)\b|$)",
+    re.IGNORECASE | re.DOTALL,
+)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_KEYWORDS = {"and", "or", "not", "null", "true", "false", "select", "case", "when", "then", "else", "end", "is"}
+
+
+def scanned_tables(shape: Iterable[str], sql: str) -> Set[str]:
+    """Tables the plan reads with a full (sequential) scan, resolved through aliases."""
+    aliases = table_aliases(sql)
+    found: Set[str] = set()
+    for node in shape:
+        for pattern in _SCAN_PATTERNS:
+            m = pattern.match(str(node).strip())
+            if m:
+                name = m.group(1).strip('"`').split(".")[-1].lower()
+                found.add(aliases.get(name, name))
+                break
+    return found
+
+
+def predicate_columns(sql: str) -> List[Tuple[Optional[str], str, bool]]:
+    """Columns used in WHERE/ON/HAVING predicates as (qualifier, column, is_equality).
+
+    Both sides of a column-to-column comparison (join keys) are returned.
+    """
+    # Blank out string literals (same length) so their contents never look like predicates
+    masked = _STRING_RE.sub(lambda m: " " * len(m.group(0)), sql)
+    out: List[Tuple[Optional[str], str, bool]] = []
+    for clause in _CLAUSE_RE.finditer(masked):
+        for m in _PREDICATE_RE.finditer(clause.group(2)):
+            op = m.group(3).lower()
+            equality = op in ("=", "in")
+            for qual, col in ((m.group(1), m.group(2)), (m.group(4), m.group(5))):
+                if col and col.lower() not in _KEYWORDS and not col.isdigit():
+                    out.append(((qual or "").lower() or None, col.lower(), equality))
+    return out
+
+
+def _index_name(table: str, columns: List[str]) -> str:
+    name = "ix_" + "_".join([table] + columns)
+    return re.sub(r"\W", "_", name)[:63]
+
+
+# -------------
+# The advisor
+# -------------
+
+
+class IndexAdvisor:
+    """Proposes CREATE INDEX statements for slow queries that scan filtered/joined columns.
+
+    ``history`` items are dicts with ``sql``, ``duration_ms`` and optionally a
+    captured plan ``shape``; queries without a shape are EXPLAINed here. Items
+    marked ``partial`` only timed their first page; when that page alone was
+    slow, the full query is re-run here (rows drained and discarded, at most
+    ``full_run_timeout_ms``) to rank it by its full run time. Nothing
+    is ever created on the live database: candidates are verified with
+    hypothetical indexes (Postgres + hypopg) or by timing the query on a copy of
+    the database with the index built (SQLite).
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        quote: Callable[[str], str],
+        slow_ms: float = 200.0,
+        full_run_timeout_ms: float = 30_000.0,
+    ) -> None:
+        self.engine = engine
+        self.quote = quote
+        self.slow_ms = slow_ms
+        self.full_run_timeout_ms = full_run_timeout_ms
+        self._columns: Dict[str, List[str]] = {}
+        self._indexed: Dict[str, Set[str]] = {}
+
+    def analyze(self, history: Iterable[Dict[str, Any]], verify: bool = True) -> List[IndexCandidate]:
+        slow: Dict[str, Dict[str, Any]] = {}
+        full_runs: Dict[str, Optional[float]] = {}
+        for item in history:
+            sql = str(item.get("sql") or "")
+            duration = item.get("duration_ms")
+            if not sql or duration is None:
+                continue
+            if float(duration) < self.slow_ms:
+                continue
+            fp = fingerprint_sql(sql)
+            if item.get("partial"):
+                # Only queries whose first page was already slow are worth running in full
+                if fp not in full_runs:
+                    full_runs[fp] = self._full_run_ms(sql)
+                duration = max(float(duration), full_runs[fp] or 0.0)
+            agg = slow.setdefault(fp, {"sql": sql, "duration_ms": 0.0, "runs": 0, "shape": None})
+            agg["duration_ms"] = max(agg["duration_ms"], float(duration))
+            agg["runs"] += 1
+            agg["shape"] = item.get("shape") or agg["shape"]
+
+        candidates: Dict[Tuple[str, Tuple[str, ...]], IndexCandidate] = {}
+        for agg in slow.values():
+            sql = agg["sql"]
+            shape = agg["shape"]
+            if not shape:
+                try:
+                    shape = explain_sql(self.engine, sql).shape
+                except Exception:
+                    continue
+            for table, cols in self._candidate_columns(sql, shape):
+                key = (table, tuple(cols))
+                cand = candidates.get(key)
+                if cand is None:
+                    cols_sql = ", ".join(self.quote(c) for c in cols)
+                    stmt = f"CREATE INDEX {self.quote(_index_name(table, cols))} ON {self.quote(table)} ({cols_sql})"
+                    cand = candidates[key] = IndexCandidate(table, list(cols), stmt)
+                cand.queries.append(sql)
+                cand.observed_ms += agg["duration_ms"] * agg["runs"]
+
+        ranked = sorted(candidates.values(), key=lambda c: c.observed_ms, reverse=True)
+        if verify:
+            for cand in ranked:
+                self._verify(cand)
+        return ranked
+
+    def _full_run_ms(self, sql: str) -> Optional[float]:
+        """Run time of the query with every row read and dropped, capped at ``full_run_timeout_ms``.
+
+        A query stopped by the timeout reports the timeout, a lower bound. None if the query fails.
+        """
+        body = sql.strip().rstrip(";")
+        timeout_ms = self.full_run_timeout_ms
+        deadline = time.perf_counter() + timeout_ms / 1000.0
+        dialect = self.engine.dialect.name
+        start = time.perf_counter()
+        try:
+            with self.engine.connect() as conn:
+                raw = conn.connection.dbapi_connection
+                if dialect == "postgresql":
+                    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+                elif dialect in ("mysql", "mariadb"):
+                    conn.exec_driver_sql(f"SET SESSION max_execution_time = {int(timeout_ms)}")
+                elif dialect == "sqlite":
+                    # Returning non-zero interrupts the statement
+                    raw.set_progress_handler(lambda: int(time.perf_counter() > deadline), 10_000)  # type: ignore[union-attr]
+                try:
+                    start = time.perf_counter()
+                    result = conn.execute(text(body), execution_options={"stream_results": True, "max_row_buffer": 1000})
+                    try:
+                        while result.fetchmany(1000):
+                            if time.perf_counter() > deadline:
+                                break
+                    finally:
+                        result.close()
+                finally:
+                    if dialect in ("mysql", "mariadb"):
+                        conn.exec_driver_sql("SET SESSION max_execution_time = 0")
+                    elif dialect == "sqlite":
+                        raw.set_progress_handler(None, 0)  # type: ignore[union-attr]
+                    conn.rollback()
+        except Exception:
+            if time.perf_counter() >= deadline:
+                return timeout_ms
+            return None
+        return min((time.perf_counter() - start) * 1000.0, timeout_ms)
+
+    # Candidate generation ------------------------------------------------
+
+    def _table_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            try:
+                insp = inspect(self.engine)
+                self._columns[table] = [str(c["name"]).lower() for c in insp.get_columns(table)]
+                leading: Set[str] = set()
+                pk = insp.get_pk_constraint(table) or {}
+                if pk.get("constrained_columns"):
+                    leading.add(str(pk["constrained_columns"][0]).lower())
+                for ix in insp.get_indexes(table):
+                    cols = [c for c in ix.get("column_names") or [] if c]
+                    if cols:
+                        leading.add(str(cols[0]).lower())
+                self._indexed[table] = leading
+            except Exception:
+                self._columns[table] = []
+                self._indexed[table] = set()
+        return self._columns[table]
+
+    def _candidate_columns(self, sql: str, shape: List[str]) -> List[Tuple[str, List[str]]]:
+        scanned = scanned_tables(shape, sql)
+        if not scanned:
+            return []
+        aliases = table_aliases(sql)
+        tables = set(aliases.values())
+        per_table: Dict[str, Dict[str, bool]] = {}
+        for qual, col, equality in predicate_columns(sql):
+            if qual:
+                table = aliases.get(qual)
+            else:
+                owners = [t for t in tables if col in self._table_columns(t)]
+                table = owners[0] if len(owners) == 1 else None
+            if table not in scanned or col not in self._table_columns(table):
+                continue
+            cols = per_table.setdefault(table, {})
+            cols[col] = cols.get(col, False) or equality
+        out: List[Tuple[str, List[str]]] = []
+        for table, cols in per_table.items():
+            # Equality columns lead, range columns follow; cap at three columns
+            ordered = [c for c, eq in cols.items() if eq] + [c for c, eq in cols.items() if not eq]
+            ordered = ordered[:3]
+            if ordered and ordered[0] not in self._indexed.get(table, set()):
+                out.append((table, ordered))
+        return out
+
+    # Verification ----------------------------------------------------------
+
+    def _verify(self, cand: IndexCandidate) -> None:
+        dialect = self.engine.dialect.name
+        try:
+            if dialect == "postgresql" and self._has_hypopg():
+                self._verify_hypopg(cand)
+            elif dialect == "sqlite":
+                self._verify_sqlite_copy(cand)
+            else:
+                cand.verification = "not verified (no hypothetical-index support)"
+                cand.benefit = f"up to {cand.observed_ms:.0f} ms of observed run time"
+        except Exception as ex:  # noqa: BLE001
+            cand.verified = None
+            cand.verification = f"verification failed: {ex}"
+
+    def _has_hypopg(self) -> bool:
+        try:
+            with self.engine.connect() as conn:
+                return conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'hypopg'")).scalar() is not None
+        except Exception:
+            return False
+
+    def _verify_hypopg(self, cand: IndexCandidate) -> None:
+        def cost(conn: Any, sql: str) -> float:
+            raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            data = json.loads(raw) if isinstance(raw, str) else raw
+            return float(data[0]["Plan"]["Total Cost"])
+
+        before = after = 0.0
+        with self.engine.connect() as conn:
+            for sql in cand.queries:
+                before += cost(conn, sql)
+            conn.execute(text("SELECT * FROM hypopg_create_index(:stmt)"), {"stmt": cand.statement})
+            try:
+                for sql in cand.queries:
+                    after += cost(conn, sql)
+            finally:
+                conn.execute(text("SELECT hypopg_reset()"))
+        cand.verified = after < before
+        cand.benefit = f"estimated cost {before:.0f} → {after:.0f}"
+        cand.verification = "hypothetical index (hypopg)"
+
+    def _verify_sqlite_copy(self, cand: IndexCandidate) -> None:
+        fd, path = tempfile.mkstemp(prefix="askdb-advisor-", suffix=".db")
+        os.close(fd)
+        try:
+            with self.engine.connect() as conn:
+                source = conn.connection.dbapi_connection
+                dest = sqlite3.connect(path)
+                try:
+                    source.backup(dest)  # type: ignore[union-attr]
+                finally:
+                    dest.close()
+            copy = sqlite3.connect(path)
+            try:
+                before = sum(self._time_sqlite(copy, sql) for sql in cand.queries)
+                copy.execute(cand.statement)
+                after = sum(self._time_sqlite(copy, sql) for sql in cand.queries)
+            finally:
+                copy.close()
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        cand.verified = after < before
+        cand.benefit = f"{before:.0f} ms → {after:.0f} ms"
+        cand.verification = "measured on a SQLite copy"
+
+    @staticmethod
+    def _time_sqlite(conn: sqlite3.Connection, sql: str, repeat: int = 3) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql).fetchall()
+            best = min(best, (time.perf_counter() - start) * 1000.0)
+        return best
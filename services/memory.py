@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import ast
+import re
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from services.sql_utils import table_aliases
+
+
+def approx_tokens(text: str) -> int:
+    # Roughly 4 characters per token, like OpenAI's rule of thumb
+    return max(1, len(text) // 4) if text else 0
+
+
+def _one_line(text: str, limit: int) -> str:
+    text = " ".join(str(text or "").split())
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+_CREATE_RE = re.compile(r"CREATE TABLE\s+[\"`\[]?([\w$]+)[\"`\]]?\s*\((.*?)\n\)", re.IGNORECASE | re.DOTALL)
+_CONSTRAINT_RE = re.compile(r"^(primary|foreign|unique|check|constraint)\b", re.IGNORECASE)
+_SUMMARY_RE = re.compile(r"^(\d+\+?) rows, (\d+) columns")
+
+
+def parse_schema(observation: str) -> Dict[str, str]:
+    """Compact ``table -> "col TYPE, ..."`` from sql_db_schema output (DDL plus sample rows)."""
+    found: Dict[str, str] = {}
+    for m in _CREATE_RE.finditer(observation or ""):
+        cols = []
+        for line in re.split(r",\s*\n", m.group(2)):
+            line = " ".join(line.split())
+            if line and not _CONSTRAINT_RE.match(line):
+                cols.append(line.replace(" NOT NULL", ""))
+        if cols:
+            found[m.group(1)] = ", ".join(cols)
+    return found
+
+
+def result_shape(observation: str) -> str:
+    """Row count, width and first row of a sql_db_query observation, e.g. "3 rows × 2 columns, first ('a', 10)"."""
+    text = str(observation or "").strip()
+    if not text:
+        return "no rows"
+    if text.startswith("Error"):
+        return _one_line(text, 120)
+    lines = text.split("\n")
+    if lines[0] == "0 rows":
+        # services.result_summary format of an empty result
+        return "no rows"
+    summary = _SUMMARY_RE.match(lines[0])
+    if summary:
+        # services.result_summary format: counts, CSV header, first rows
+        first = f", first {_one_line(lines[2], 80)}" if len(lines) > 2 and not lines[2].startswith("Column summary") else ""
+        return f"{summary.group(1)} rows × {summary.group(2)} columns ({_one_line(lines[1], 120)}){first}"
+    rows: Any = None
+    if len(text) < 100_000:
+        try:
+            rows = ast.literal_eval(text)
+        except Exception:
+            rows = None
+    if isinstance(rows, list):
+        if not rows:
+            return "no rows"
+        first = rows[0]
+        width = f" × {len(first)} columns" if isinstance(first, tuple) else ""
+        return f"{len(rows)} rows{width}, first {_one_line(repr(first), 80)}"
+    # Values literal_eval cannot read (dates, decimals): count the tuples
+    return f"about {text.count('), (') + 1} rows"
+
+
+def action_queries(action: Any) -> List[str]:
+    tool_input = getattr(action, "tool_input", None)
+    if isinstance(tool_input, dict):
+        for k in ("query", "sql", "input"):
+            if isinstance(tool_input.get(k), str):
+                return [tool_input[k]]
+        return []
+    return [tool_input] if isinstance(tool_input, str) and tool_input.strip() else []
+
+
+class ConversationMemory:
+    """What earlier questions in a chat established, replayed compactly with follow-ups.
+
+    Each turn keeps the question, the SQL that ran with its result shape, the
+    tables touched and a one-line answer; sql_db_schema observations add to a
+    shared map of known columns. build_input() prefixes a question with that
+    context so the agent can reuse tables, columns and earlier SQL instead of
+    listing and describing tables again. The context is held under
+    ``token_budget`` (approximately): the latest ``recent_turns`` are shown in
+    detail, older ones collapse to one line and then drop, and schema for
+    tables not touched recently goes last. A budget of 0 disables memory.
+    """
+
+    def __init__(self, token_budget: int = 600, recent_turns: int = 2, max_turns: int = 50) -> None:
+        self.token_budget = token_budget
+        self.recent_turns = recent_turns
+        self._turns: deque = deque(maxlen=max_turns)
+        self._schema: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def add_turn(
+        self,
+        question: str,
+        answer: str = "",
+        steps: Optional[Iterable[Any]] = None,
+        queries: Optional[Sequence[str]] = None,
+    ) -> None:
+        """Record a finished question from its agent ``steps`` ((action, observation) pairs) or plain ``queries``."""
+        ran: List[Dict[str, str]] = [{"sql": q, "shape": ""} for q in (queries or []) if q]
+        tables: List[str] = []
+        schema: Dict[str, str] = {}
+        for step in steps or []:
+            action = step[0] if isinstance(step, (list, tuple)) and step else getattr(step, "action", step)
+            observation = step[1] if isinstance(step, (list, tuple)) and len(step) > 1 else getattr(step, "observation", "")
+            tool = getattr(action, "tool", "")
+            if tool == "sql_db_query":
+                for q in action_queries(action):
+                    ran.append({"sql": q, "shape": result_shape(str(observation))})
+            elif tool == "sql_db_schema":
+                schema.update(parse_schema(str(observation)))
+        for q in ran:
+            tables.extend(t for t in dict.fromkeys(table_aliases(q["sql"]).values()) if t not in tables)
+        tables.extend(t.lower() for t in schema if t.lower() not in tables)
+        with self._lock:
+            self._schema.update(schema)
+            self._turns.append({"question": question, "answer": answer, "queries": ran, "tables": tables})
+
+    def clear(self) -> None:
+        with self._lock:
+            self._turns.clear()
+            self._schema.clear()
+
+    def __len__(self) -> int:
+        return len(self._turns)
+
+    def context(self) -> str:
+        if self.token_budget <= 0:
+            return ""
+        with self._lock:
+            turns = list(self._turns)
+            schema = dict(self._schema)
+        if not turns:
+            return ""
+        # Known tables, most recently touched first
+        lower = {t.lower(): t for t in schema}
+        tables: List[str] = []
+        for turn in reversed(turns):
+            tables.extend(lower[t] for t in turn["tables"] if t in lower and lower[t] not in tables)
+        tables.extend(t for t in schema if t not in tables)
+        detailed = min(self.recent_turns, len(turns))
+        start = 0
+        keep_tables = len(tables)
+        while True:
+            text = self._render(turns[start:], detailed, [(t, schema[t]) for t in tables[:keep_tables]])
+            if approx_tokens(text) <= self.token_budget:
+                return text
+            if detailed > 1:
+                detailed -= 1
+            elif start < len(turns) - 1:
+                start += 1
+            elif keep_tables > 1:
+                keep_tables -= 1
+            else:
+                return text[: self.token_budget * 4]
+
+    def _render(self, turns: List[Dict[str, Any]], detailed: int, schema: List[Any]) -> str:
+        lines = ["Context from earlier in this conversation (reuse it instead of rediscovering tables and schema):"]
+        if schema:
+            lines.append("Known schema:")
+            lines.extend(f"- {table}({cols})" for table, cols in schema)
+        older, recent = turns[: len(turns) - detailed], turns[len(turns) - detailed :]
+        if older:
+            lines.append("Earlier questions:")
+            for turn in older:
+                touched = f" (tables: {', '.join(turn['tables'])})" if turn["tables"] else ""
+                lines.append(f"- {_one_line(turn['question'], 100)}{touched}")
+        for turn in recent:
+            lines.append(f"Previous question: {_one_line(turn['question'], 300)}")
+            for q in turn["queries"][-2:]:
+                lines.append(f"  SQL: {_one_line(q['sql'], 400)}")
+                if q["shape"]:
+                    lines.append(f"  Result: {q['shape']}")
+            if turn["answer"]:
+                lines.append(f"  Answer: {_one_line(turn['answer'], 200)}")
+        return "\n".join(lines)
+
+    def build_input(self, question: str) -> str:
+        """The agent input for ``question``: the question alone, or prefixed with the conversation context."""
+        context = self.context()
+        return f"{context}\n\nQuestion: {question}" if context else question
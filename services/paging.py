@@ -0,0 +1,596 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from services.sql_utils import mask_sql, split_top_level
+
+
+PAGE_SIZE = 500
+
+_ROW_QUERY_RE = re.compile(r"^\s*(\(\s*)*(select|with|values)\b", re.IGNORECASE)
+_ORDER_BY_RE = re.compile(r"\border\s+by\b", re.IGNORECASE)
+# Clauses after which appending/wrapping would change the meaning of the statement
+_UNPAGEABLE_RE = re.compile(r"\b(limit|offset|fetch|for|into|insert|update|delete)\b", re.IGNORECASE)
+_IDENT = r'(?:[A-Za-z_][\w$]*|"(?:[^"]|"")+"|`(?:[^`]|``)+`)'
+_SORT_ITEM_RE = re.compile(
+    rf"^\s*(?P<expr>{_IDENT}(?:\s*\.\s*{_IDENT})*|\d+)\s*(?P<dir>asc|desc)?\s*$",
+    re.IGNORECASE,
+)
+_SELECT_RE = re.compile(r"\bselect\b(?:\s+(?:distinct|all)\b)?", re.IGNORECASE)
+_SET_OP_RE = re.compile(r"\b(union|intersect|except)\b", re.IGNORECASE)
+_FROM_RE = re.compile(r"\bfrom\b", re.IGNORECASE)
+_FROM_END_RE = re.compile(r"\b(where|group\s+by|having|window|order\s+by)\b", re.IGNORECASE)
+_GROUP_BY_RE = re.compile(r"\bgroup\s+by\b", re.IGNORECASE)
+_GROUP_END_RE = re.compile(r"\b(having|window|order\s+by)\b", re.IGNORECASE)
+_COLUMN_REF_RE = re.compile(
+    rf"^\s*(?P<ref>{_IDENT}(?:\s*\.\s*{_IDENT})*?)(?:\s*\.\s*(?P<star>\*))?(?:\s+(?:as\s+)?(?P<alias>{_IDENT}))?\s*$",
+    re.IGNORECASE,
+)
+_ALIASED_EXPR_RE = re.compile(rf"\s+as\s+(?P<alias>{_IDENT})\s*$", re.IGNORECASE)
+_TABLE_RE = re.compile(
+    rf"^\s*(?P<table>{_IDENT}(?:\s*\.\s*{_IDENT})?)(?:\s+(?:as\s+)?(?P<alias>{_IDENT}))?\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """One ORDER BY item that maps onto a result column.
+
+    ``column`` is the unquoted column name, or a 1-based ordinal (as a string)
+    when the query orders by position; ``qualifier`` is the table or alias of
+    a qualified reference such as ``b.id``.
+    """
+
+    column: str
+    descending: bool = False
+    qualifier: Optional[str] = None
+
+
+def _unquote(part: str) -> str:
+    part = part.strip()
+    if len(part) >= 2 and part[0] == part[-1] and part[0] in ('"', "`"):
+        q = part[0]
+        return part[1:-1].replace(q + q, q)
+    return part
+
+
+def _strip_statement(sql: str) -> str:
+    text = str(sql).strip()
+    while text.endswith(";"):
+        text = text[:-1].rstrip()
+    return text
+
+
+def parse_sort_keys(order_by: str) -> Optional[List[SortKey]]:
+    """Parse the body of an ORDER BY clause into sort keys.
+
+    Returns None when any item is an expression, uses NULLS FIRST/LAST or is
+    otherwise not a plain (optionally qualified) column reference or ordinal.
+    """
+    keys: List[SortKey] = []
+    for item in split_top_level(order_by):
+        m = _SORT_ITEM_RE.match(item)
+        if not m:
+            return None
+        expr = m.group("expr")
+        parts = re.findall(_IDENT + r"|\d+", expr)
+        if not parts:
+            return None
+        qualifier = _unquote(parts[-2]) if len(parts) > 1 else None
+        keys.append(SortKey(_unquote(parts[-1]), (m.group("dir") or "").lower() == "desc", qualifier))
+    return keys or None
+
+
+def _idents(ref: str) -> List[str]:
+    return [_unquote(p) for p in re.findall(_IDENT, ref)]
+
+
+@dataclass(frozen=True)
+class _SelectItem:
+    """A top-level select-list entry: a column reference (``parts``), ``*``/``t.*`` or an expression."""
+
+    parts: Optional[List[str]]
+    star: bool
+    output: Optional[str]
+
+
+def _select_items(select_list: str) -> List[_SelectItem]:
+    items: List[_SelectItem] = []
+    for item in split_top_level(select_list):
+        if item.strip() == "*":
+            items.append(_SelectItem(None, True, None))
+            continue
+        m = _COLUMN_REF_RE.match(item)
+        if m:
+            parts = _idents(m.group("ref"))
+            if m.group("star"):
+                items.append(_SelectItem(parts, True, None))
+            else:
+                alias = _unquote(m.group("alias")) if m.group("alias") else parts[-1]
+                items.append(_SelectItem(parts, False, alias))
+            continue
+        m = _ALIASED_EXPR_RE.search(mask_sql(item))
+        items.append(_SelectItem(None, False, _unquote(item[m.start("alias"):m.end("alias")]) if m else None))
+    return items
+
+
+@dataclass(frozen=True)
+class _Clauses:
+    items: List[_SelectItem]
+    # (table, alias) when FROM names exactly one table, else None (joins, subqueries)
+    table: Optional[Tuple[str, Optional[str]]]
+    # Plain column names of a top-level GROUP BY; [] when it has anything else
+    group_by: Optional[List[str]]
+
+
+def _top_level_clauses(text: str) -> Optional[_Clauses]:
+    masked = mask_sql(text)
+    selects = list(_SELECT_RE.finditer(masked))
+    if len(selects) != 1 or _SET_OP_RE.search(masked):
+        return None
+    frm = _FROM_RE.search(masked, selects[0].end())
+    if not frm:
+        return None
+    end = _FROM_END_RE.search(masked, frm.end())
+    from_body = text[frm.end(): end.start() if end else len(text)]
+    table = None
+    m = _TABLE_RE.match(from_body)
+    if m:
+        table = (".".join(_idents(m.group("table"))), _unquote(m.group("alias")) if m.group("alias") else None)
+    group_by = None
+    g = _GROUP_BY_RE.search(masked, frm.end())
+    if g:
+        g_end = _GROUP_END_RE.search(masked, g.end())
+        group_by = []
+        for item in split_top_level(text[g.end(): g_end.start() if g_end else len(text)]):
+            ref = _COLUMN_REF_RE.match(item)
+            if not ref or ref.group("star") or ref.group("alias"):
+                group_by = []
+                break
+            group_by.append(_idents(ref.group("ref"))[-1])
+    return _Clauses(_select_items(text[selects[0].end(): frm.start()]), table, group_by)
+
+
+def _names_table(qualifier: str, table: Optional[Tuple[str, Optional[str]]]) -> bool:
+    if table is None:
+        return False
+    name, alias = table
+    q = qualifier.lower()
+    return q == (alias or "").lower() or (alias is None and q == name.split(".")[-1].lower())
+
+
+def _resolve_key(key: SortKey, clauses: _Clauses) -> Optional[Tuple[str, str]]:
+    """(result column, table column) when ``key`` provably sorts on a column passed straight through."""
+    items = clauses.items
+    if key.column.isdigit():
+        idx = int(key.column) - 1
+        if any(i.star for i in items) or not 0 <= idx < len(items):
+            return None
+        item = items[idx]
+        return (item.output, item.parts[-1]) if item.parts and item.output else None
+    column = key.column.lower()
+    if key.qualifier is None:
+        # ORDER BY name resolves to the result column of that name first
+        named = [i for i in items if (i.output or "").lower() == column]
+        if len(named) > 1:
+            return None
+        if named:
+            item = named[0]
+            return (item.output, item.parts[-1]) if item.parts else None
+    # A table column: it must come through a plain reference (or *) unambiguously
+    refs = [
+        i for i in items
+        if i.parts and not i.star and i.parts[-1].lower() == column
+        and (
+            key.qualifier is None
+            or (len(i.parts) > 1 and i.parts[-2].lower() == key.qualifier.lower())
+            or (len(i.parts) == 1 and _names_table(key.qualifier, clauses.table))
+        )
+    ]
+    if len(refs) == 1 and refs[0].output:
+        return refs[0].output, refs[0].parts[-1]
+    if refs:
+        return None
+    stars = [i for i in items if i.star]
+    if stars and clauses.table is not None and (key.qualifier is None or _names_table(key.qualifier, clauses.table)):
+        if all(i.parts is None or _names_table(i.parts[-1], clauses.table) for i in stars):
+            return key.column, key.column
+    return None
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """What the pager needs to know about a statement.
+
+    ``base`` is the statement without its trailing ORDER BY; ``keys`` is only set
+    when every ORDER BY item provably names a result column taken straight from
+    a table column (keys are then rewritten to the result column names). For
+    those, ``key_columns`` are the underlying table columns, ``table`` is the
+    only table in FROM (if there is just one) and ``group_by`` the plain
+    columns of a top-level GROUP BY, used to decide whether the keys are unique.
+    """
+
+    sql: str
+    pageable: bool
+    base: str
+    keys: Optional[List[SortKey]] = None
+    key_columns: Optional[List[str]] = None
+    table: Optional[str] = None
+    group_by: Optional[List[str]] = None
+
+
+def is_row_query(sql: str) -> bool:
+    """True for statements that return rows (SELECT / WITH / VALUES)."""
+    return bool(_ROW_QUERY_RE.match(_strip_statement(sql)))
+
+
+def wrap_limit(sql: str, limit: int) -> str:
+    """Cap a row query at ``limit`` rows without touching its own clauses."""
+    return f"SELECT * FROM (\n{_strip_statement(sql)}\n) AS _askdb_limited\nLIMIT {int(limit)}"
+
+
+def analyze_query(sql: str) -> QueryShape:
+    text = _strip_statement(sql)
+    if not _ROW_QUERY_RE.match(text):
+        return QueryShape(text, False, text)
+    masked = mask_sql(text)
+    if _UNPAGEABLE_RE.search(masked):
+        return QueryShape(text, False, text)
+    matches = list(_ORDER_BY_RE.finditer(masked))
+    if not matches:
+        return QueryShape(text, True, text)
+    last = matches[-1]
+    base = text[: last.start()].rstrip()
+    keys = parse_sort_keys(text[last.end():])
+    clauses = _top_level_clauses(base) if keys else None
+    if not keys or clauses is None:
+        return QueryShape(text, True, base)
+    resolved: List[SortKey] = []
+    columns: List[str] = []
+    for key in keys:
+        found = _resolve_key(key, clauses)
+        if found is None:
+            return QueryShape(text, True, base)
+        resolved.append(SortKey(found[0], key.descending))
+        columns.append(found[1])
+    table = clauses.table[0] if clauses.table else None
+    return QueryShape(text, True, base, resolved, columns, table, clauses.group_by)
+
+
+class ResultPager:
+    """Produces per-page SQL for browsing a result set on demand.
+
+    Ordered queries are paged with keyset (seek) predicates, so fetching page
+    N costs the same as page 1, when the sort keys are result columns and are
+    known to be unique: they cover the GROUP BY columns, or a primary key or
+    unique constraint of the only table in FROM (looked up through
+    ``unique_keys(table)``, which returns that table's unique column sets).
+    Anything else falls back to LIMIT/OFFSET, and statements that are not
+    plain row queries (DML, queries that already carry LIMIT/FETCH, ...) run
+    once, unchanged.
+    """
+
+    def __init__(
+        self,
+        sql: str,
+        quote: Callable[[str], str],
+        page_size: int = PAGE_SIZE,
+        params: Optional[Dict[str, Any]] = None,
+        unique_keys: Optional[Callable[[str], Sequence[Sequence[str]]]] = None,
+    ) -> None:
+        self.shape = analyze_query(sql)
+        self.quote = quote
+        self.params: Dict[str, Any] = dict(params or {})
+        self.page_size = max(1, int(page_size))
+        self.fetched = 0
+        self.has_more = True
+        self._key_indexes: Optional[List[int]] = None
+        self._key_names: List[str] = []
+        self._keyset = self.shape.pageable and bool(self.shape.keys) and self._keys_unique(unique_keys)
+        self._last_key: Optional[Tuple[Any, ...]] = None
+
+    def _keys_unique(self, unique_keys: Optional[Callable[[str], Sequence[Sequence[str]]]]) -> bool:
+        # Seeking past the last key skips rows that tie with it, so the keys must be unique
+        shape = self.shape
+        covered: Set[str] = {c.lower() for c in shape.key_columns or []}
+        if shape.group_by is not None:
+            return bool(shape.group_by) and {c.lower() for c in shape.group_by} <= covered
+        if shape.table is None or unique_keys is None:
+            return False
+        try:
+            candidates = unique_keys(shape.table)
+        except Exception:
+            return False
+        return any(cols and {str(c).lower() for c in cols} <= covered for cols in candidates)
+
+    @property
+    def mode(self) -> str:
+        if not self.shape.pageable:
+            return "single"
+        return "keyset" if self._keyset else "offset"
+
+    def next_page(self) -> Tuple[str, Dict[str, Any]]:
+        """Return (sql, params) for the next page to fetch."""
+        shape = self.shape
+        if not shape.pageable:
+            return shape.sql, dict(self.params)
+        if self.fetched == 0 or not self._keyset or self._last_key is None:
+            sql = f"{shape.sql}\nLIMIT {self.page_size}"
+            if self.fetched:
+                sql += f" OFFSET {self.fetched}"
+            return sql, dict(self.params)
+        return self._keyset_page()
+
+    def advance(self, rows: Sequence[Sequence[Any]], cols: Sequence[str]) -> None:
+        """Record a fetched page so the next call to next_page() continues after it."""
+        if not self.shape.pageable:
+            self.fetched += len(rows)
+            self.has_more = False
+            return
+        if self.fetched == 0 and self._keyset:
+            self._resolve_keys(cols)
+        self.fetched += len(rows)
+        self.has_more = len(rows) >= self.page_size
+        if self._keyset and rows:
+            self._track_last_key(rows)
+
+    def _resolve_keys(self, cols: Sequence[str]) -> None:
+        lowered = [str(c).lower() for c in cols]
+        indexes: List[int] = []
+        names: List[str] = []
+        for key in self.shape.keys or []:
+            if key.column.isdigit():
+                idx = int(key.column) - 1
+                if not 0 <= idx < len(cols):
+                    break
+            else:
+                matches = [i for i, c in enumerate(lowered) if c == key.column.lower()]
+                if len(matches) != 1:
+                    break
+                idx = matches[0]
+            # Duplicate output names would make the outer reference ambiguous
+            if lowered.count(lowered[idx]) != 1:
+                break
+            indexes.append(idx)
+            names.append(str(cols[idx]))
+        else:
+            self._key_indexes = indexes
+            self._key_names = names
+            return
+        self._keyset = False
+
+    def _track_last_key(self, rows: Sequence[Sequence[Any]]) -> None:
+        last = tuple(rows[-1][i] for i in self._key_indexes or [])
+        if any(v is None for v in last):
+            # NULL ordering differs per dialect; continue with OFFSET from here on
+            self._keyset = False
+            self._last_key = None
+            return
+        self._last_key = last
+
+    def _keyset_page(self) -> Tuple[str, Dict[str, Any]]:
+        keys = self.shape.keys or []
+        cols = [self.quote(n) for n in self._key_names]
+        params = dict(self.params)
+        params.update({f"_askdb_k{i}": v for i, v in enumerate(self._last_key or ())})
+        binds = [f":_askdb_k{i}" for i in range(len(cols))]
+        directions = {k.descending for k in keys}
+        if len(directions) == 1:
+            op = "<" if keys[0].descending else ">"
+            if len(cols) == 1:
+                seek = f"{cols[0]} {op} {binds[0]}"
+            else:
+                seek = f"({', '.join(cols)}) {op} ({', '.join(binds)})"
+        else:
+            # Mixed directions: expand the row comparison lexicographically
+            terms: List[str] = []
+            for i, key in enumerate(keys):
+                op = "<" if key.descending else ">"
+                eqs = [f"{cols[j]} = {binds[j]}" for j in range(i)]
+                terms.append("(" + " AND ".join(eqs + [f"{cols[i]} {op} {binds[i]}"]) + ")")
+            seek = " OR ".join(terms)
+        order = ", ".join(f"{c} {'DESC' if k.descending else 'ASC'}" for c, k in zip(cols, keys))
+        sql = (
+            f"SELECT * FROM (\n{self.shape.base}\n) AS _askdb_page\n"
+            f"WHERE {seek}\nORDER BY {order}\nLIMIT {self.page_size}"
+        )
+        return sql, params
+
+
+# ------------------------------
+# Result views (sort and filter)
+# ------------------------------
+
+
+FILTER_OPS = ("=", "!=", "<", "<=", ">", ">=", "contains", "is null", "is not null")
+_FILTER_EXPR_RE = re.compile(
+    r"^\s*(?P<op>is\s+not\s+null|is\s+null|contains|!=|<>|<=|>=|=|<|>)?\s*(?P<value>.*?)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+@dataclass(frozen=True)
+class ColumnFilter:
+    """A per-column predicate on a result column, e.g. ("status", "=", "paid")."""
+
+    column: str
+    op: str
+    value: Any = None
+
+    def describe(self) -> str:
+        if self.op in ("is null", "is not null"):
+            return f"{self.column} {self.op}"
+        return f"{self.column} {self.op} {self.value}"
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float, Decimal)) and not isinstance(value, bool)
+
+
+def column_is_numeric(rows: Sequence[Sequence[Any]], index: int, sample: int = 1000) -> bool:
+    """True when the column's loaded non-NULL values (up to ``sample`` of them) are all numbers."""
+    seen = False
+    for row in rows[:sample]:
+        value = row[index]
+        if value is None:
+            continue
+        if not _is_number(value):
+            return False
+        seen = True
+    return seen
+
+
+def _coerce_value(raw: str, numeric: bool) -> Any:
+    text = raw.strip()
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in ("'", '"'):
+        return text[1:-1]
+    if not numeric:
+        # Text columns compare as text: "02134" must keep its leading zero
+        return text
+    for conv in (int, float):
+        try:
+            return conv(text)
+        except ValueError:
+            continue
+    return text
+
+
+def parse_filter_expression(column: str, expr: str, numeric: bool = False) -> Optional[ColumnFilter]:
+    """Parse user input such as ``> 10``, ``contains foo`` or ``is null``.
+
+    A bare value means equality. Values are converted to numbers only for
+    ``numeric`` columns (see column_is_numeric). Returns None for empty input.
+    """
+    m = _FILTER_EXPR_RE.match(expr or "")
+    if not m:
+        return None
+    op = " ".join((m.group("op") or "=").lower().split())
+    op = "!=" if op == "<>" else op
+    value = m.group("value")
+    if op in ("is null", "is not null"):
+        return ColumnFilter(column, op)
+    if not value:
+        return None
+    if op == "contains":
+        return ColumnFilter(column, op, value)
+    return ColumnFilter(column, op, _coerce_value(value, numeric))
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+
+
+def wrap_view(
+    sql: str,
+    quote: Callable[[str], str],
+    sort: Optional[Tuple[str, bool]] = None,
+    filters: Sequence[ColumnFilter] = (),
+) -> Tuple[str, Dict[str, Any]]:
+    """Push a sort and/or column filters down into the database.
+
+    Returns ``SELECT * FROM (<query>) AS _askdb_view WHERE ... ORDER BY ...`` and
+    its bind parameters; ``sort`` is (column, descending). Paging (and the LIMIT)
+    is added on top of this by ResultPager; a view selects from a derived table,
+    so its sort column cannot be shown to be unique and it pages with OFFSET.
+    """
+    shape = analyze_query(sql)
+    # The outer ORDER BY supersedes the inner one; dropping it lets the planner
+    # use an index for the new ordering instead of sorting twice.
+    inner = shape.base if sort is not None else shape.sql
+    clauses: List[str] = []
+    params: Dict[str, Any] = {}
+    for i, f in enumerate(filters):
+        col = quote(f.column)
+        name = f"_askdb_f{i}"
+        if f.op == "is null":
+            clauses.append(f"{col} IS NULL")
+        elif f.op == "is not null":
+            clauses.append(f"{col} IS NOT NULL")
+        elif f.op == "contains":
+            # Case-insensitive substring match on every dialect, with LIKE wildcards taken literally
+            clauses.append(f"LOWER({col}) LIKE :{name} ESCAPE '!'")
+            params[name] = f"%{_like_escape(str(f.value).lower())}%"
+        else:
+            clauses.append(f"{col} {'<>' if f.op == '!=' else f.op} :{name}")
+            params[name] = f.value
+    out = f"SELECT * FROM (\n{inner}\n) AS _askdb_view"
+    if clauses:
+        out += "\nWHERE " + " AND ".join(clauses)
+    if sort is not None:
+        out += f"\nORDER BY {quote(sort[0])} {'DESC' if sort[1] else 'ASC'}"
+    return out, params
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    if value is None:
+        return (2, 0)
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        return (0, value)
+    return (1, str(value))
+
+
+def sort_rows(rows: Sequence[Sequence[Any]], column: int, descending: bool = False) -> List[Sequence[Any]]:
+    """Sort in-memory rows by one column.
+
+    Keys are extracted once into a column vector and the row order comes from an
+    argsort over it, so the comparison work stays inside the C sort routine.
+    Numbers sort before text and NULLs sort last (first when descending).
+    """
+    keys = [_sort_key(r[column]) for r in rows]
+    order = sorted(range(len(keys)), key=keys.__getitem__, reverse=descending)
+    return [rows[i] for i in order]
+
+
+def _matches(value: Any, f: ColumnFilter) -> bool:
+    if f.op == "is null":
+        return value is None
+    if f.op == "is not null":
+        return value is not None
+    if value is None:
+        return False
+    if f.op == "contains":
+        return str(f.value).lower() in str(value).lower()
+    target = f.value
+    if isinstance(target, (int, float)) and not _is_number(value):
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            target = str(target)
+            value = str(value)
+    elif not isinstance(target, (int, float)):
+        value = str(value)
+    try:
+        if f.op == "=":
+            return value == target
+        if f.op == "!=":
+            return value != target
+        if f.op == "<":
+            return value < target
+        if f.op == "<=":
+            return value <= target
+        if f.op == ">":
+            return value > target
+        if f.op == ">=":
+            return value >= target
+    except TypeError:
+        return False
+    return False
+
+
+def filter_rows(
+    rows: Sequence[Sequence[Any]], cols: Sequence[str], filters: Sequence[ColumnFilter]
+) -> List[Sequence[Any]]:
+    """Apply column filters to in-memory rows with the same semantics as wrap_view().
+
+    ``contains`` is a case-insensitive substring match; comparisons are numeric
+    when the filter value is a number and textual otherwise.
+    """
+    index = {str(c): i for i, c in enumerate(cols)}
+    active = [(index[f.column], f) for f in filters if f.column in index]
+    if not active:
+        return list(rows)
+    return [r for r in rows if all(_matches(r[i], f) for i, f in active)]
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import csv
+import io
+from typing import Any, Iterable, List, Optional, Sequence
+
+from services.memory import approx_tokens
+
+
+class ColumnStats:
+    """Running min/max/distinct for one column; distinct stops counting at ``max_distinct``."""
+
+    def __init__(self, max_distinct: int = 10_000) -> None:
+        self.max_distinct = max_distinct
+        self.min: Any = None
+        self.max: Any = None
+        self.nulls = 0
+        self._distinct: set = set()
+        self.distinct_capped = False
+        self._comparable = True
+
+    def add(self, value: Any) -> None:
+        if value is None:
+            self.nulls += 1
+            return
+        if not self.distinct_capped:
+            try:
+                self._distinct.add(value)
+            except TypeError:
+                self._distinct.add(repr(value))
+            if len(self._distinct) > self.max_distinct:
+                self.distinct_capped = True
+                self._distinct = set()
+        if not self._comparable:
+            return
+        try:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        except TypeError:
+            # Mixed types in one column: min/max would be meaningless
+            self._comparable = False
+            self.min = self.max = None
+
+    @property
+    def distinct(self) -> str:
+        return f"{self.max_distinct}+" if self.distinct_capped else str(len(self._distinct))
+
+    def describe(self, width: int = 40) -> str:
+        parts = []
+        if self.min is not None:
+            parts.append(f"min {_cell(self.min, width)}")
+            parts.append(f"max {_cell(self.max, width)}")
+        parts.append(f"{self.distinct} distinct")
+        if self.nulls:
+            parts.append(f"{self.nulls} null")
+        return ", ".join(parts)
+
+
+def _cell(value: Any, width: int = 100) -> str:
+    text = "" if value is None else str(value)
+    return text if len(text) <= width else text[: width - 1] + "…"
+
+
+def _csv_line(values: Sequence[Any]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="").writerow([_cell(v) for v in values])
+    return buf.getvalue()
+
+
+def summarize_result(
+    columns: Sequence[str],
+    rows: Iterable[Sequence[Any]],
+    token_budget: int = 1000,
+    max_rows: int = 20,
+    max_scan: int = 100_000,
+) -> str:
+    """Compact description of a query result for the agent instead of the full result.
+
+    The first line is the row count, then the header and the first rows as CSV
+    (at most ``max_rows``, fewer if ``token_budget`` runs out). When rows are
+    left out, per-column min/max/distinct values over every scanned row
+    follow. Scanning stops after ``max_scan`` rows, reported as "N+ rows".
+    """
+    shown: List[Sequence[Any]] = []
+    stats: List[ColumnStats] = [ColumnStats() for _ in columns]
+    count = 0
+    truncated = False
+    for row in rows:
+        if count >= max_scan:
+            truncated = True
+            break
+        count += 1
+        if len(shown) < max_rows:
+            shown.append(row)
+        for col, value in zip(stats, row):
+            col.add(value)
+    total = f"{count}+" if truncated else str(count)
+    if not count:
+        return f"0 rows\n{_csv_line(columns)}" if columns else "0 rows"
+    head = [f"{total} rows, {len(columns)} columns", _csv_line(columns)]
+    scanned = f"first {count} rows scanned" if truncated else "all rows scanned"
+    summary = [f"Column summary ({scanned}):"] + [f"{name}: {col.describe()}" for name, col in zip(columns, stats)]
+
+    def fit(reserved: List[str]) -> List[str]:
+        # approx_tokens() rounds down; the + 1s keep the sum from undercounting the joined text
+        used = approx_tokens("\n".join(head + reserved)) + 1
+        lines: List[str] = []
+        for row in shown:
+            line = _csv_line(row)
+            cost = approx_tokens(line + "\n") + 1
+            if lines and used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+        return lines
+
+    body = fit([]) if not truncated and count == len(shown) else []
+    if len(body) < count:
+        # Rows are left out, so the summary follows them: budget for it (and the "first k shown" note) up front
+        body = fit([f" (first {len(shown)} shown)"] + summary)
+        head[0] += f" (first {len(body)} shown)"
+        body.extend(summary)
+    text = "\n".join(head + body)
+    # Very wide results may not fit even with a single row
+    limit = max(token_budget, 1) * 4
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def parse_row_count(observation: str) -> Optional[str]:
+    """The row count from a summarize_result() observation ("12" or "100000+"), or None."""
+    first = (observation or "").split("\n", 1)[0]
+    head = first.split(" rows", 1)
+    if len(head) == 2 and head[0].rstrip("+").isdigit():
+        return head[0]
+    return None
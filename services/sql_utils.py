@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import List
+from typing import Dict, List
 
 
 def normalize_sql(sql: str) -> str:
@@ -11,6 +12,26 @@ def normalize_sql(sql: str) -> str:
         return str(sql)
 
 
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b", re.IGNORECASE)
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def strip_literals(sql: str) -> str:
+    """Normalized SQL with string/number literals replaced by ``?`` and IN-lists collapsed."""
+    text = normalize_sql(sql).rstrip(" ;")
+    text = _STRING_LITERAL_RE.sub("?", text)
+    text = _NUMBER_LITERAL_RE.sub("?", text)
+    text = _IN_LIST_RE.sub("(?)", text)
+    return text.lower()
+
+
+def fingerprint_sql(sql: str) -> str:
+    """Stable identity for a query shape: the same statement with different literals
+    (``WHERE id = 1`` vs ``WHERE id = 2``) maps to the same fingerprint."""
+    return hashlib.sha1(strip_literals(sql).encode("utf-8")).hexdigest()[:16]
+
+
 def format_sql(sql: str) -> str:
     text = normalize_sql(sql)
     strings: List[str] = []
@@ -39,3 +60,94 @@ def format_sql(sql: str) -> str:
 
     formatted = re.sub(r"__STR(\d+)__", _unmask, formatted)
     return formatted
+
+
+def mask_sql(sql: str) -> str:
+    """Return a same-length copy of ``sql`` with only top-level text left intact.
+
+    String literals, quoted identifiers, comments and anything nested inside
+    parentheses are blanked out with spaces (the parentheses themselves are kept),
+    so regex searches over the result only ever match top-level clauses while
+    match offsets still line up with the original string.
+    """
+    out: List[str] = []
+    depth = 0
+    i = 0
+    n = len(sql)
+    while i < n:
+        ch = sql[i]
+        if ch in ("'", '"', "`"):
+            j = i + 1
+            while j < n:
+                if sql[j] == ch:
+                    if j + 1 < n and sql[j + 1] == ch:  # doubled quote escape
+                        j += 2
+                        continue
+                    break
+                j += 1
+            end = min(j + 1, n)
+            out.append(" " * (end - i))
+            i = end
+            continue
+        if sql.startswith("--", i):
+            j = sql.find("\n", i)
+            end = n if j < 0 else j
+            out.append(" " * (end - i))
+            i = end
+            continue
+        if sql.startswith("/*", i):
+            j = sql.find("*/", i + 2)
+            end = n if j < 0 else j + 2
+            out.append(" " * (end - i))
+            i = end
+            continue
+        if ch == "(":
+            depth += 1
+            out.append(ch if depth == 1 else " ")
+        elif ch == ")":
+            out.append(ch if depth == 1 else " ")
+            depth = max(0, depth - 1)
+        else:
+            out.append(ch if depth == 0 else " ")
+        i += 1
+    return "".join(out)
+
+
+def split_top_level(sql: str, sep: str = ",") -> List[str]:
+    """Split ``sql`` on ``sep`` occurrences that are not nested or quoted."""
+    masked = mask_sql(sql)
+    parts: List[str] = []
+    start = 0
+    for idx, ch in enumerate(masked):
+        if ch == sep:
+            parts.append(sql[start:idx])
+            start = idx + 1
+    parts.append(sql[start:])
+    return parts
+
+
+_TABLE_REF_RE = re.compile(
+    r"\b(?:from|join)\s+((?:[A-Za-z_][\w$]*|\"[^\"]+\"|`[^`]+`)(?:\.(?:[A-Za-z_][\w$]*|\"[^\"]+\"|`[^`]+`))*)"
+    r"(?:\s+(?:as\s+)?([A-Za-z_][\w$]*))?",
+    re.IGNORECASE,
+)
+_NOT_ALIASES = {
+    "where", "join", "on", "using", "left", "right", "inner", "outer", "full", "cross", "natural",
+    "group", "order", "limit", "offset", "having", "union", "intersect", "except", "window", "as",
+    "lateral", "straight_join", "for", "fetch",
+}
+
+
+def table_aliases(sql: str) -> Dict[str, str]:
+    """Map every table reference in FROM/JOIN clauses (and its alias) to the table name.
+
+    Names are unquoted and lowercased; schema-qualified tables map to the last part.
+    """
+    found: Dict[str, str] = {}
+    for m in _TABLE_REF_RE.finditer(sql):
+        table = m.group(1).split(".")[-1].strip('"`').lower()
+        found.setdefault(table, table)
+        alias = (m.group(2) or "").lower()
+        if alias and alias not in _NOT_ALIASES:
+            found[alias] = table
+    return found
@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Iterator, List, Optional, Sequence
+
+from langchain_community.agent_toolkits import SQLDatabaseToolkit
+from langchain_community.tools.sql_database.tool import (
+    InfoSQLDatabaseTool,
+    ListSQLDatabaseTool,
+    QuerySQLDatabaseTool,
+)
+from langchain_core.callbacks import CallbackManagerForToolRun
+from langchain_core.tools import BaseTool
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, Result
+from sqlalchemy.exc import SQLAlchemyError
+
+from services.explain import explain_sql, is_explainable
+from services.result_summary import summarize_result
+from services.sql_utils import fingerprint_sql
+
+
+def _hint(message: str) -> str:
+    low = message.lower()
+    if "column" in low and ("no such" in low or "unknown" in low or "does not exist" in low):
+        return "Check the column names with sql_db_schema."
+    if "no such table" in low or "doesn't exist" in low or ("relation" in low and "does not exist" in low):
+        return "Check the table names with sql_db_list_tables."
+    if "syntax" in low:
+        return "Fix the SQL syntax and try again."
+    return "Rewrite the query and try again."
+
+
+class QueryValidator:
+    """Dry-runs queries with EXPLAIN on the live connection instead of asking the LLM to check them.
+
+    Query shapes that passed are cached by fingerprint (the query with literals
+    stripped), so a shape is validated once. Failures are never cached: a lock
+    timeout or a dropped connection says nothing about the query, and a missing
+    table may exist by the next attempt. validate() returns None when the query
+    is fine or cannot be checked (non-SELECT statements, dialects without
+    EXPLAIN), otherwise a structured error for the agent.
+    """
+
+    def __init__(self, engine: Engine, max_entries: int = 512) -> None:
+        self.engine = engine
+        self.max_entries = max_entries
+        self._valid: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def validate(self, sql: str) -> Optional[str]:
+        if not is_explainable(sql):
+            return None
+        key = fingerprint_sql(sql)
+        with self._lock:
+            if key in self._valid:
+                self._valid.move_to_end(key)
+                return None
+        try:
+            explain_sql(self.engine, sql)
+        except ValueError:
+            # No EXPLAIN for this dialect; leave it to the database
+            return None
+        except Exception as ex:  # noqa: BLE001
+            message = str(getattr(ex, "orig", None) or ex).strip().splitlines()[0]
+            return "Error: query validation failed, nothing was run.\n" + json.dumps(
+                {
+                    "error_type": type(getattr(ex, "orig", None) or ex).__name__,
+                    "message": message,
+                    "dialect": self.engine.dialect.name,
+                    "hint": _hint(message),
+                }
+            )
+        with self._lock:
+            self._valid[key] = None
+            while len(self._valid) > self.max_entries:
+                self._valid.popitem(last=False)
+        return None
+
+
+def _iter_rows(result: Result, batch: int = 1000) -> Iterator[Sequence[Any]]:
+    while True:
+        rows = result.fetchmany(batch)
+        if not rows:
+            return
+        yield from rows
+
+
+class ValidatedQuerySQLDatabaseTool(QuerySQLDatabaseTool):
+    """sql_db_query that validates locally before running the query.
+
+    The observation is a summary of the result (see
+    services.result_summary.summarize_result) capped at about
+    ``observation_token_budget`` tokens, so a large result does not inflate
+    every later LLM call of the question; 0 returns the full result as text.
+    Row queries are streamed, so at most the summary's ``max_scan`` rows are
+    read. The results grid runs the query itself and still gets every row.
+    """
+
+    validator: Any = None
+    observation_token_budget: int = 1000
+
+    def _run(self, query: str, run_manager: Optional[CallbackManagerForToolRun] = None) -> Any:
+        if self.validator is not None:
+            error = self.validator.validate(query)
+            if error:
+                return error
+        if self.observation_token_budget <= 0:
+            return super()._run(query, run_manager)
+        try:
+            with self.db._engine.begin() as conn:
+                # Server-side cursor where the driver has one, so the summary's row cap also bounds
+                # memory and time; only for row queries, Postgres cannot DECLARE a cursor for DML/DDL
+                options = {"stream_results": True, "max_row_buffer": 1000} if is_explainable(query) else {}
+                result = conn.execute(text(query), execution_options=options)
+                try:
+                    if not result.returns_rows:
+                        return ""
+                    return summarize_result(list(result.keys()), _iter_rows(result), self.observation_token_budget)
+                finally:
+                    result.close()
+        except SQLAlchemyError as ex:
+            return f"Error: {ex}"
+
+
+class LocalSQLToolkit(SQLDatabaseToolkit):
+    """SQLDatabaseToolkit without sql_db_query_checker; queries are validated locally instead."""
+
+    observation_token_budget: int = 1000
+    # One validator per toolkit, so every get_tools() call shares its cache
+    validator: Any = None
+
+    def get_tools(self) -> List[BaseTool]:
+        if self.validator is None:
+            self.validator = QueryValidator(self.db._engine)
+        list_tool = ListSQLDatabaseTool(db=self.db)
+        info_tool = InfoSQLDatabaseTool(
+            db=self.db,
+            description=(
+                "Input to this tool is a comma-separated list of tables, output is the "
+                "schema and sample rows for those tables. Be sure that the tables actually "
+                f"exist by calling {list_tool.name} first! Example Input: table1, table2, table3"
+            ),
+        )
+        query_tool = ValidatedQuerySQLDatabaseTool(
+            db=self.db,
+            validator=self.validator,
+            observation_token_budget=self.observation_token_budget,
+            description=(
+                "Input to this tool is a detailed and correct SQL query, output is the row "
+                "count, the column names and the first rows as CSV, followed by per-column "
+                "min/max/distinct values when rows were left out. The query is checked before it runs; if it is not "
+                "correct, a JSON error with the message and a hint is returned. If an error "
+                "is returned, rewrite the query and try again. If you encounter an unknown "
+                f"column, use {info_tool.name} to query the correct table fields."
+            ),
+        )
+        return [query_tool, info_tool, list_tool]
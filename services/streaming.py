@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# LLM runs tagged with this are not streamed to the chat (e.g. fast mode's SQL generation)
+NO_STREAM_TAG = "askdb:no-stream"
+
+
+class TokenCoalescer:
+    """Accumulates streamed tokens and emits the text so far at most every ``interval_ms``.
+
+    The first token is emitted immediately so the answer appears as soon as
+    possible; later tokens are batched so the UI re-renders ~20 times a second
+    rather than once per token. flush() emits anything still pending.
+    """
+
+    def __init__(self, emit: Callable[[str], None], interval_ms: float = 50.0) -> None:
+        self.emit = emit
+        self.interval = interval_ms / 1000.0
+        self.text = ""
+        self._emitted = 0
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, token: str) -> None:
+        with self._lock:
+            self.text += token
+            now = time.perf_counter()
+            if self._emitted and now - self._last < self.interval:
+                return
+            self._last = now
+            self._emitted = len(self.text)
+            text = self.text
+        self.emit(text)
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._emitted == len(self.text) or not self.text.strip():
+                return
+            self._emitted = len(self.text)
+            text = self.text
+        self.emit(text)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.text = ""
+            self._emitted = 0
+            self._last = 0.0
+
+
+class AnswerStreamHandler(BaseCallbackHandler):
+    """Streams the text of LLM responses token by token through a TokenCoalescer.
+
+    Only text content is streamed; tool-call chunks carry none. If a response
+    turns out to be a tool call after all (some models think aloud first), the
+    partial text is dropped and the next step's status replaces it.
+    """
+
+    def __init__(self, emit: Callable[[str], None], interval_ms: float = 50.0) -> None:
+        super().__init__()
+        self.coalescer = TokenCoalescer(emit, interval_ms)
+        self._skip: set = set()
+
+    def _start(self, run_id: UUID, tags: Optional[List[str]]) -> None:
+        if tags and NO_STREAM_TAG in tags:
+            self._skip.add(run_id)
+        self.coalescer.reset()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, tags: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self._start(run_id, tags)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, tags: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self._start(run_id, tags)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        if token and isinstance(token, str) and run_id not in self._skip:
+            self.coalescer.add(token)
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        if run_id in self._skip:
+            self._skip.discard(run_id)
+            return
+        tool_calls = False
+        try:
+            tool_calls = any(getattr(getattr(g, "message", None), "tool_calls", None) for gens in response.generations for g in gens)
+        except Exception:
+            pass
+        if tool_calls:
+            self.coalescer.reset()
+        else:
+            self.coalescer.flush()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._skip.discard(run_id)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import atexit
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+@dataclass
+class Span:
+    """A timed operation; spans sharing a trace_id form one request (e.g. one question)."""
+
+    name: str
+    category: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    start: float  # wall clock seconds
+    thread_id: int
+    thread_name: str
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    _t0: float = 0.0
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+# -------------
+# Span storage
+# -------------
+
+
+class TraceStore:
+    """Finished spans in a local SQLite database, capped at ``max_spans`` rows.
+
+    add() only queues the span; a background thread writes queued spans in one
+    transaction every ``flush_interval`` seconds (sooner when many are queued),
+    so ending a span on the GUI thread never waits on the disk. Reads flush
+    first.
+    """
+
+    def __init__(self, path: str, max_spans: int = 50_000, flush_interval: float = 0.5) -> None:
+        self.path = path
+        self.max_spans = max_spans
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS spans ("
+            " span_id TEXT PRIMARY KEY, trace_id TEXT, parent_id TEXT, name TEXT, category TEXT,"
+            " start_us INTEGER, dur_us INTEGER, thread_id INTEGER, thread_name TEXT, attrs TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_spans_trace ON spans (trace_id)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_spans_start ON spans (start_us)")
+        self._conn.commit()
+        self._pending: List[tuple] = []
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = threading.Thread(target=self._write_loop, name="askdb-trace-writer", daemon=True)
+        self._writer.start()
+
+    def add(self, span: Span) -> None:
+        row = (
+            span.span_id,
+            span.trace_id,
+            span.parent_id,
+            span.name,
+            span.category,
+            int(span.start * 1e6),
+            int((span.duration_ms or 0.0) * 1000),
+            span.thread_id,
+            span.thread_name,
+            json.dumps(span.attrs, default=str),
+            span.error,
+        )
+        with self._pending_lock:
+            self._pending.append(row)
+            if len(self._pending) >= 500:
+                self._wake.set()
+
+    def _write_loop(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def flush(self) -> None:
+        """Write every queued span now."""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO spans VALUES (?,?,?,?,?,?,?,?,?,?,?)", rows)
+            before, self._writes = self._writes, self._writes + len(rows)
+            if before // 500 != self._writes // 500:
+                self._conn.execute(
+                    "DELETE FROM spans WHERE start_us < (SELECT start_us FROM spans ORDER BY start_us DESC LIMIT 1 OFFSET ?)",
+                    (self.max_spans,),
+                )
+            self._conn.commit()
+
+    def recent_trace_ids(self, limit: int = 20) -> List[str]:
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT trace_id, MAX(start_us) AS last FROM spans GROUP BY trace_id ORDER BY last DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def spans(self, trace_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        sql = "SELECT span_id, trace_id, parent_id, name, category, start_us, dur_us, thread_id, thread_name, attrs, error FROM spans"
+        params: List[Any] = []
+        if trace_ids is not None:
+            if not trace_ids:
+                return []
+            sql += f" WHERE trace_id IN ({','.join('?' * len(trace_ids))})"
+            params = list(trace_ids)
+        self.flush()
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY start_us", params).fetchall()
+        keys = ("span_id", "trace_id", "parent_id", "name", "category", "start_us", "dur_us", "thread_id", "thread_name", "attrs", "error")
+        out = []
+        for r in rows:
+            item = dict(zip(keys, r))
+            try:
+                item["attrs"] = json.loads(item["attrs"] or "{}")
+            except Exception:
+                item["attrs"] = {}
+            out.append(item)
+        return out
+
+    def close(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        self._writer.join(timeout=2.0)
+        try:
+            self.flush()
+        except Exception:
+            pass
+        with self._lock:
+            self._conn.close()
+
+
+# -------
+# Tracer
+# -------
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("askdb_current_span", default=None)
+_store: Optional[TraceStore] = None
+_store_lock = threading.Lock()
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    """Enable local tracing into the SQLite file at ``path``, or disable it with None."""
+    global _store
+    with _store_lock:
+        if _store is not None and (path is None or _store.path != str(path)):
+            try:
+                _store.close()
+            except Exception:
+                pass
+            _store = None
+        if path and _store is None:
+            try:
+                _store = TraceStore(str(path))
+            except Exception:
+                _store = None
+
+
+@atexit.register
+def _flush_at_exit() -> None:
+    store = _store
+    if store is not None:
+        try:
+            store.flush()
+        except Exception:
+            pass
+
+
+def tracing_enabled() -> bool:
+    return _store is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, category: str = "app", parent: Optional[Span] = None, **attrs: Any) -> Optional[Span]:
+    """Begin a span without making it current (for callback-style APIs); None when tracing is off."""
+    if _store is None:
+        return None
+    parent = parent if parent is not None else _current_span.get()
+    thread = threading.current_thread()
+    return Span(
+        name=name,
+        category=category,
+        trace_id=parent.trace_id if parent is not None else uuid.uuid4().hex,
+        span_id=uuid.uuid4().hex[:16],
+        parent_id=parent.span_id if parent is not None else None,
+        start=time.time(),
+        thread_id=threading.get_ident(),
+        thread_name=thread.name,
+        attrs=dict(attrs),
+        _t0=time.perf_counter(),
+    )
+
+
+def end_span(span: Optional[Span], error: Optional[str] = None) -> None:
+    if span is None:
+        return
+    span.duration_ms = (time.perf_counter() - span._t0) * 1000.0
+    if error:
+        span.error = error
+    store = _store
+    if store is None:
+        return
+    try:
+        store.add(span)
+    except Exception:
+        pass
+
+
+@contextmanager
+def span(name: str, category: str = "app", **attrs: Any) -> Iterator[Optional[Span]]:
+    """Time the enclosed block as a child of the current span (no-op when tracing is off)."""
+    s = start_span(name, category, **attrs)
+    if s is None:
+        yield None
+        return
+    token = _current_span.set(s)
+    try:
+        yield s
+    except BaseException as ex:
+        s.error = str(ex) or type(ex).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(s)
+
+
+# -------------
+# Chrome trace
+# -------------
+
+
+def recent_trace_ids(limit: int = 20) -> List[str]:
+    store = _store
+    return store.recent_trace_ids(limit) if store is not None else []
+
+
+def export_chrome_trace(path: str, trace_ids: Optional[List[str]] = None, store_path: Optional[str] = None) -> int:
+    """Write spans as Chrome trace-event JSON (chrome://tracing, Perfetto); returns the span count.
+
+    Reads the active store, or the one at ``store_path`` when tracing is currently off.
+    """
+    store = _store
+    owned = False
+    if store is None:
+        if not store_path or not os.path.exists(store_path):
+            raise ValueError("No traces recorded yet. Enable local tracing in Settings first.")
+        store = TraceStore(store_path)
+        owned = True
+    try:
+        spans = store.spans(trace_ids)
+    finally:
+        if owned:
+            store.close()
+    pid = os.getpid()
+    events: List[Dict[str, Any]] = []
+    threads: Dict[int, str] = {}
+    for s in spans:
+        threads[s["thread_id"]] = s["thread_name"]
+        args = dict(s["attrs"])
+        args.update(trace_id=s["trace_id"], span_id=s["span_id"], parent_id=s["parent_id"])
+        if s["error"]:
+            args["error"] = s["error"]
+        events.append(
+            {
+                "name": s["name"],
+                "cat": s["category"],
+                "ph": "X",
+                "ts": s["start_us"],
+                "dur": s["dur_us"],
+                "pid": pid,
+                "tid": s["thread_id"],
+                "args": args,
+            }
+        )
+    for tid, tname in threads.items():
+        events.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": tname}})
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, fh)
+    return len(spans)
+
+
+# ---------------------
+# LangChain callbacks
+# ---------------------
+
+
+def _preview(value: Any, limit: int = 500) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+class TracingCallbackHandler(BaseCallbackHandler):
+    """Records LangChain chain, LLM and tool runs as spans under a root span.
+
+    Pass an instance in the ``callbacks`` config of agent.stream()/invoke(). Runs
+    are parented through LangChain's parent_run_id, falling back to ``root``.
+    """
+
+    def __init__(self, root: Optional[Span]) -> None:
+        super().__init__()
+        self.root = root
+        self._spans: Dict[UUID, Span] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, parent_run_id: Optional[UUID], name: str, category: str, **attrs: Any) -> None:
+        with self._lock:
+            parent = self._spans.get(parent_run_id) if parent_run_id is not None else None
+        s = start_span(name, category, parent=parent or self.root, **attrs)
+        if s is not None:
+            with self._lock:
+                self._spans[run_id] = s
+
+    def _end(self, run_id: UUID, error: Optional[BaseException] = None, **attrs: Any) -> None:
+        with self._lock:
+            s = self._spans.pop(run_id, None)
+        if s is None:
+            return
+        s.set(**attrs)
+        end_span(s, str(error) if error is not None else None)
+
+    # Chains (only the agent executor itself; inner runnables would swamp the trace)
+    def on_chain_start(self, serialized: Dict[str, Any], inputs: Dict[str, Any], *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        if parent_run_id is None:
+            self._start(run_id, None, "agent.run", "agent")
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    # LLM calls
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        model = (kwargs.get("invocation_params") or {}).get("model") or (kwargs.get("invocation_params") or {}).get("model_name")
+        self._start(run_id, parent_run_id, "llm", "llm", model=model, messages=sum(len(m) for m in messages))
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        self._start(run_id, parent_run_id, "llm", "llm", prompts=len(prompts))
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        usage = {}
+        try:
+            usage = dict((response.llm_output or {}).get("token_usage") or {})
+        except Exception:
+            pass
+        self._end(run_id, **{k: v for k, v in usage.items() if isinstance(v, (int, float))})
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    # Tool calls (sql_db_list_tables, sql_db_schema, sql_db_query, sql_db_query_checker, …)
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID, parent_run_id: Optional[UUID] = None, **kwargs: Any) -> None:
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        self._start(run_id, parent_run_id, f"tool:{name}", "tool", input=_preview(input_str))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        text = getattr(output, "content", output)
+        self._end(run_id, output_chars=len(str(text)))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
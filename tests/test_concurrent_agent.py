@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+from langchain_core.agents import AgentAction
+from sqlalchemy import create_engine, event, text
+
+from services.agent_service import create_agent
+from services.concurrent_agent import ConcurrentAgentExecutor, concurrency_for, is_parallel_safe
+
+
+class Probe:
+    """sleep_ms(ms) for SQLite: sleeps and records how many calls overlap and on which threads."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.threads = set()
+
+    def __call__(self, ms: int) -> int:
+        with self.lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.threads.add(threading.current_thread().name)
+        time.sleep(ms / 1000.0)
+        with self.lock:
+            self.running -= 1
+        return ms
+
+
+@pytest.fixture()
+def probe():
+    return Probe()
+
+
+def _engine(tmp_path, probe, pool_size=5):
+    eng = create_engine(f"sqlite:///{tmp_path / 'agent.db'}", pool_size=pool_size)
+
+    @event.listens_for(eng, "connect")
+    def _register(dbapi_conn, record):
+        dbapi_conn.create_function("sleep_ms", 1, probe)
+
+    with eng.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items VALUES (1, 'a'), (2, 'b')"))
+    return eng
+
+
+def _agent(engine, queries):
+    step = {"tools": [{"tool": "sql_db_query", "args": {"query": q}} for q in queries]}
+    backend = {"name": "fake", "script": [step, {"text": "done"}]}
+    return create_agent(engine, "scripted", "", None, backend)
+
+
+def _run(agent):
+    steps = []
+    for chunk in agent.stream({"input": "go"}):
+        steps.extend(chunk.get("steps") or [])
+    return steps
+
+
+def _action(query, tool="sql_db_query"):
+    return AgentAction(tool=tool, tool_input={"query": query}, log="")
+
+
+def test_is_parallel_safe_accepts_reads_only():
+    assert is_parallel_safe(_action("SELECT * FROM items"))
+    assert is_parallel_safe(_action("WITH x AS (SELECT 1) SELECT * FROM x"))
+    assert is_parallel_safe(_action("SELECT 'delete me' AS label FROM items"))
+    assert is_parallel_safe(AgentAction(tool="sql_db_schema", tool_input={"table_names": "items"}, log=""))
+    assert not is_parallel_safe(_action("DELETE FROM items"))
+    assert not is_parallel_safe(_action("SELECT 1", tool="sql_db_query_checker"))
+
+
+def test_is_parallel_safe_rejects_data_modifying_ctes():
+    assert not is_parallel_safe(_action("WITH d AS (DELETE FROM items RETURNING *) SELECT * FROM d"))
+    assert not is_parallel_safe(_action("WITH u AS (UPDATE items SET name = 'x' RETURNING id) SELECT count(*) FROM u"))
+    assert not is_parallel_safe(_action("WITH i AS (INSERT INTO items (name) VALUES ('c') RETURNING id) SELECT * FROM i"))
+    assert not is_parallel_safe(_action("SELECT * INTO backup FROM items"))
+    assert not is_parallel_safe(_action("SELECT * FROM items FOR UPDATE"))
+
+
+def test_read_only_calls_of_one_step_run_together(tmp_path, probe):
+    engine = _engine(tmp_path, probe)
+    agent = _agent(engine, [f"SELECT sleep_ms(200) AS q{i}" for i in range(3)])
+    assert isinstance(agent, ConcurrentAgentExecutor)
+    start = time.perf_counter()
+    steps = _run(agent)
+    elapsed = time.perf_counter() - start
+    assert len(steps) == 3
+    assert probe.peak == 3
+    assert elapsed < 0.5
+
+
+def test_steps_are_yielded_in_the_models_order(tmp_path, probe):
+    engine = _engine(tmp_path, probe)
+    # The first call finishes last
+    queries = ["SELECT sleep_ms(300) AS first", "SELECT sleep_ms(10) AS second", "SELECT sleep_ms(100) AS third"]
+    steps = _run(_agent(engine, queries))
+    assert [s.action.tool_input["query"] for s in steps] == queries
+    assert "first" in steps[0].observation and "second" in steps[1].observation
+
+
+def test_write_in_a_step_falls_back_to_serial(tmp_path, probe):
+    engine = _engine(tmp_path, probe)
+    queries = ["SELECT sleep_ms(50) AS probe", "WITH d AS (SELECT id FROM items) DELETE FROM items WHERE id IN (SELECT id FROM d)"]
+    steps = _run(_agent(engine, queries))
+    assert len(steps) == 2
+    # One parallel-safe call is no batch: everything ran on the agent's own thread
+    assert probe.peak == 1
+    assert not any(name.startswith("agent-tool") for name in probe.threads)
+
+
+def test_concurrency_is_capped_at_the_pool_size(tmp_path, probe):
+    engine = _engine(tmp_path, probe, pool_size=2)
+    assert concurrency_for(engine) == 2
+    assert concurrency_for(engine, limit=1) == 1
+    steps = _run(_agent(engine, [f"SELECT sleep_ms(100) AS q{i}" for i in range(4)]))
+    assert len(steps) == 4
+    assert probe.peak == 2
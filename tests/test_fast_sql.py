@@ -0,0 +1,35 @@
+from services.fast_sql import extract_sql
+
+
+def test_extract_sql_takes_one_read_only_statement():
+    assert extract_sql("```sql\nSELECT id FROM a;\n```") == "SELECT id FROM a"
+    assert extract_sql("SELECT ';' AS semi; -- done") == "SELECT ';' AS semi"
+    assert extract_sql("WITH x AS (SELECT 1) SELECT * FROM x") == "WITH x AS (SELECT 1) SELECT * FROM x"
+
+
+def test_extract_sql_rejects_stacked_and_write_statements():
+    assert extract_sql("SELECT 1; DROP TABLE a") is None
+    assert extract_sql("```sql\nSELECT 1;\nDELETE FROM a;\n```") is None
+    assert extract_sql("DELETE FROM a") is None
+    assert extract_sql("CANNOT_ANSWER") is None
+
+
+def test_fast_agent_runs_through_the_validated_summarizing_tool():
+    from langchain_community.utilities import SQLDatabase
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.pool import StaticPool
+
+    from services.fake_llm import ScriptedChatModel
+    from services.fast_sql import FastSQLAgent
+    from services.sql_validation import ValidatedQuerySQLDatabaseTool
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        conn.execute(text("INSERT INTO items VALUES (1, 'a'), (2, 'b')"))
+    agent = FastSQLAgent(ScriptedChatModel(), SQLDatabase(engine), fallback=None)
+    assert isinstance(agent.query_tool, ValidatedQuerySQLDatabaseTool)
+    chunks = list(agent.stream({"input": "list the items"}))
+    observation = chunks[1]["steps"][0].observation
+    assert observation.startswith("2 rows, 2 columns")
+    assert chunks[-1]["output"].startswith("The query returned 2 rows × 2 columns")
@@ -0,0 +1,7 @@
+from ui.utils import markdown_to_html
+
+
+def test_table_separator_with_single_dashes():
+    html = markdown_to_html("|a|b|\n|-|:-:|\n|1|2|")
+    assert "<th" in html and ">1</td>" in html
+    assert 'align="center"' in html
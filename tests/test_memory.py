@@ -0,0 +1,129 @@
+import re
+
+from langchain_core.agents import AgentAction
+
+from services.memory import ConversationMemory, approx_tokens, parse_schema, result_shape
+from services.result_summary import summarize_result
+
+
+SCHEMA_OBSERVATION = """
+CREATE TABLE customers (
+\tid INTEGER NOT NULL,
+\tname TEXT,
+\tregion_id INTEGER,
+\tPRIMARY KEY (id),
+\tFOREIGN KEY(region_id) REFERENCES regions (id)
+)
+
+/*
+3 rows from customers table:
+id\tname\tregion_id
+1\tAcme\t2
+*/
+
+
+CREATE TABLE "regions" (
+\tid INTEGER NOT NULL,
+\tlabel VARCHAR(40),
+\tPRIMARY KEY (id)
+)
+"""
+
+
+def _step(tool, tool_input, observation):
+    return (AgentAction(tool=tool, tool_input=tool_input, log=""), observation)
+
+
+def test_parse_schema_keeps_columns_and_types_without_constraints():
+    assert parse_schema(SCHEMA_OBSERVATION) == {
+        "customers": "id INTEGER, name TEXT, region_id INTEGER",
+        "regions": "id INTEGER, label VARCHAR(40)",
+    }
+    assert parse_schema("Error: table_names {'nope'} not found in database") == {}
+
+
+def test_result_shape_reads_the_legacy_row_list():
+    assert result_shape("[(1, 'Acme'), (2, 'Bolt')]") == "2 rows × 2 columns, first (1, 'Acme')"
+    assert result_shape("[(42,)]") == "1 rows × 1 columns, first (42,)"
+    assert result_shape("[]") == "no rows"
+    assert result_shape("") == "no rows"
+    # Values literal_eval cannot read are counted instead
+    assert result_shape("[(datetime.date(2024, 1, 1),), (datetime.date(2024, 1, 2),)]") == "about 2 rows"
+
+
+def test_result_shape_reads_the_summary_format():
+    rows = [(i, f"name {i}") for i in range(1, 41)]
+    assert result_shape(summarize_result(["id", "name"], rows[:3])) == "3 rows × 2 columns (id,name), first 1,name 1"
+    assert result_shape(summarize_result(["id", "name"], rows, max_scan=30)) == "30+ rows × 2 columns (id,name), first 1,name 1"
+    assert result_shape(summarize_result(["id", "name"], [])) == "no rows"
+
+
+def test_result_shape_keeps_errors_on_one_line():
+    assert result_shape("Error: (sqlite3.OperationalError) no such table: x\n[SQL: SELECT 1]") == (
+        "Error: (sqlite3.OperationalError) no such table: x [SQL: SELECT 1]"
+    )
+
+
+def _memory(budget):
+    memory = ConversationMemory(token_budget=budget, recent_turns=2)
+    schema = _step("sql_db_schema", {"table_names": "customers, regions"}, SCHEMA_OBSERVATION)
+    memory.add_turn("Which tables are there?", "customers and regions", steps=[schema])
+    for i in range(1, 4):
+        memory.add_turn(
+            f"Question {i}: how many customers are in region {i}?",
+            f"There are {i * 10} customers in region {i}.",
+            steps=[_step("sql_db_query", {"query": f"SELECT count(*) FROM customers WHERE region_id = {i}"}, f"[({i * 10},)]")],
+        )
+    return memory
+
+
+def _state(text):
+    """(detailed turns, questions mentioned, schema tables) of a context."""
+    return (
+        text.count("Previous question:"),
+        len(re.findall(r"Which tables|Question \d", text)),
+        len(re.findall(r"^- (customers|regions)\(", text, re.MULTILINE)),
+    )
+
+
+def test_context_fits_the_budget_and_compacts_in_order():
+    full = _memory(10_000).context()
+    assert _state(full) == (2, 4, 2)
+    states = []
+    for budget in range(approx_tokens(full), 10, -5):
+        text = _memory(budget).context()
+        assert approx_tokens(text) <= budget
+        if not states or states[-1] != _state(text):
+            states.append(_state(text))
+        if states[-1][2] == 1:
+            # Past one table and one turn the context is only cut to length
+            break
+    # Detailed turns collapse to one line first, then the oldest turns go, then schema
+    assert states[:2] == [(2, 4, 2), (1, 4, 2)]
+    assert (1, 1, 2) in states and states[-1] == (1, 1, 1)
+    for before, after in zip(states, states[1:]):
+        detailed, questions, tables = after
+        if detailed < before[0]:
+            assert (questions, tables) == before[1:]
+        elif questions < before[1]:
+            assert detailed == 1 and tables == before[2]
+        else:
+            assert detailed == 1 and questions == 1 and tables < before[2]
+
+
+def test_context_keeps_recently_touched_schema_longest():
+    memory = ConversationMemory(token_budget=10_000)
+    memory.add_turn("schema", steps=[_step("sql_db_schema", {"table_names": "customers, regions"}, SCHEMA_OBSERVATION)])
+    memory.add_turn("labels", steps=[_step("sql_db_query", {"query": "SELECT label FROM regions"}, "[('north',)]")])
+    text = memory.context()
+    assert text.index("- regions(") < text.index("- customers(")
+    memory.token_budget = approx_tokens(text) - 1
+    while "- customers(" in memory.context() and memory.token_budget > 1:
+        memory.token_budget -= 1
+    assert "- regions(" in memory.context()
+
+
+def test_zero_budget_disables_memory():
+    memory = _memory(0)
+    assert memory.context() == ""
+    assert memory.build_input("next?") == "next?"
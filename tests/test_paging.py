@@ -0,0 +1,164 @@
+from typing import Any, List
+
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.pool import StaticPool
+
+from services.paging import (
+    ResultPager,
+    analyze_query,
+    column_is_numeric,
+    filter_rows,
+    parse_filter_expression,
+    wrap_view,
+)
+
+
+@pytest.fixture()
+def engine():
+    eng = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    with eng.begin() as conn:
+        conn.execute(text("CREATE TABLE b (id INTEGER PRIMARY KEY, label TEXT)"))
+        conn.execute(text("CREATE TABLE a (id INTEGER PRIMARY KEY, bid INTEGER, name TEXT, grp INTEGER)"))
+        conn.execute(text("CREATE TABLE pair (x INTEGER, y INTEGER, v TEXT, UNIQUE (x, y))"))
+        for i in range(1, 11):
+            conn.execute(text("INSERT INTO b VALUES (:i, :l)"), {"i": i, "l": f"b{i}"})
+        for i in range(1, 51):
+            # Five rows of a per row of b, so b.id ties across a's rows
+            conn.execute(
+                text("INSERT INTO a VALUES (:i, :b, :n, :g)"),
+                {"i": i, "b": 11 - (i % 10 or 10), "n": f"n{i}", "g": i % 4},
+            )
+        for x in range(6):
+            for y in range(6):
+                conn.execute(text("INSERT INTO pair VALUES (:x, :y, :v)"), {"x": x, "y": y, "v": f"{x}-{y}"})
+    return eng
+
+
+def _unique_keys(engine):
+    def lookup(table: str) -> List[List[str]]:
+        insp = inspect(engine)
+        found = [insp.get_pk_constraint(table)["constrained_columns"]]
+        found += [u["column_names"] for u in insp.get_unique_constraints(table)]
+        return [f for f in found if f]
+
+    return lookup
+
+
+def _page_all(engine, sql: str, page_size: int = 7) -> Any:
+    pager = ResultPager(sql, lambda n: f'"{n}"', page_size, unique_keys=_unique_keys(engine))
+    rows: List[tuple] = []
+    with engine.connect() as conn:
+        while pager.has_more:
+            page_sql, params = pager.next_page()
+            res = conn.execute(text(page_sql), params)
+            cols = list(res.keys())
+            page = [tuple(r) for r in res.fetchall()]
+            pager.advance(page, cols)
+            rows.extend(page)
+            # Keyset mode is decided once the first page's columns are known
+            if pager.fetched == len(page):
+                mode = pager.mode
+    return rows, mode
+
+
+def _all(engine, sql: str) -> List[tuple]:
+    with engine.connect() as conn:
+        return [tuple(r) for r in conn.execute(text(sql)).fetchall()]
+
+
+def test_qualified_key_from_other_table_falls_back_to_offset(engine):
+    sql = "SELECT a.id, a.name FROM a JOIN b ON a.bid = b.id ORDER BY b.id"
+    rows, mode = _page_all(engine, sql)
+    assert mode == "offset"
+    assert len(rows) == 50
+    assert len(set(rows)) == 50
+
+
+def test_primary_key_order_uses_keyset(engine):
+    sql = "SELECT id, name FROM a ORDER BY id DESC"
+    rows, mode = _page_all(engine, sql)
+    assert mode == "keyset"
+    assert rows == _all(engine, sql)
+
+
+def test_qualified_key_naming_the_output_column_uses_keyset(engine):
+    sql = "SELECT a.id, a.name FROM a ORDER BY a.id"
+    rows, mode = _page_all(engine, sql)
+    assert mode == "keyset"
+    assert rows == _all(engine, sql)
+
+
+def test_non_unique_key_falls_back_to_offset(engine):
+    sql = "SELECT id, grp FROM a ORDER BY grp"
+    rows, mode = _page_all(engine, sql)
+    assert mode == "offset"
+    assert sorted(rows) == sorted(_all(engine, sql))
+
+
+def test_group_by_columns_are_unique(engine):
+    sql = "SELECT grp, count(*) AS n FROM a GROUP BY grp ORDER BY grp"
+    rows, mode = _page_all(engine, sql, page_size=2)
+    assert mode == "keyset"
+    assert rows == _all(engine, sql)
+
+
+def test_composite_unique_key_with_mixed_directions(engine):
+    sql = "SELECT x, y, v FROM pair ORDER BY x ASC, y DESC"
+    rows, mode = _page_all(engine, sql, page_size=5)
+    assert mode == "keyset"
+    assert rows == _all(engine, sql)
+
+
+def test_alias_of_another_column_is_not_a_key(engine):
+    shape = analyze_query("SELECT name AS id FROM a ORDER BY id")
+    assert shape.key_columns == ["name"]
+    rows, mode = _page_all(engine, "SELECT name AS id FROM a ORDER BY id")
+    assert mode == "offset"
+    assert len(set(rows)) == 50
+
+
+def test_expression_keys_and_joins_are_not_keyset(engine):
+    assert analyze_query("SELECT id FROM a ORDER BY id + 1").keys is None
+    assert analyze_query("SELECT * FROM a JOIN b ON a.bid = b.id ORDER BY id").keys is None
+    assert analyze_query("SELECT id FROM a UNION SELECT id FROM b ORDER BY id").keys is None
+
+
+def test_ordinal_key_maps_to_select_item(engine):
+    shape = analyze_query("SELECT name, id AS ident FROM a ORDER BY 2")
+    assert [k.column for k in shape.keys] == ["ident"]
+    assert shape.key_columns == ["id"]
+    rows, mode = _page_all(engine, "SELECT name, id AS ident FROM a ORDER BY 2")
+    assert mode == "keyset"
+    assert rows == _all(engine, "SELECT name, id AS ident FROM a ORDER BY 2")
+
+
+def test_unpageable_statement_runs_once(engine):
+    pager = ResultPager("SELECT * FROM a LIMIT 3", lambda n: n)
+    assert pager.mode == "single"
+    sql, _ = pager.next_page()
+    assert sql == "SELECT * FROM a LIMIT 3"
+
+
+def test_contains_filter_is_literal_and_case_insensitive(engine):
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)"))
+        for i, body in enumerate(["50% off", "5000 off", "Snake_Case", "snakeXcase", "ABC"], start=1):
+            conn.execute(text("INSERT INTO notes VALUES (:i, :b)"), {"i": i, "b": body})
+    rows = _all(engine, "SELECT * FROM notes")
+    for expr, expected in (("contains 50%", [1]), ("contains e_c", [3]), ("contains abc", [5])):
+        flt = parse_filter_expression("body", expr)
+        sql, params = wrap_view("SELECT * FROM notes", lambda n: f'"{n}"', filters=[flt])
+        with engine.connect() as conn:
+            in_db = [r[0] for r in conn.execute(text(sql), params)]
+        in_memory = [r[0] for r in filter_rows(rows, ["id", "body"], [flt])]
+        assert in_db == in_memory == expected
+
+
+def test_values_are_numbers_only_for_numeric_columns():
+    assert parse_filter_expression("zip", "= 02134").value == "02134"
+    assert parse_filter_expression("n", "> 10", numeric=True).value == 10
+    assert parse_filter_expression("n", "= '10'", numeric=True).value == "10"
+    assert column_is_numeric([(1,), (None,), (2.5,)], 0)
+    assert not column_is_numeric([(1,), ("02134",)], 0)
+    assert not column_is_numeric([(None,)], 0)
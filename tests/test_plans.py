@@ -0,0 +1,27 @@
+from core.plan_store import PlanStore
+from services.explain import PlanEstimate, detect_plan_regression
+
+
+def test_plan_store_returns_previous_and_prunes(tmp_path):
+    store = PlanStore(path=str(tmp_path / "plans.db"), max_per_connection=10)
+    assert store.record("c", "fp0", {"shape": ["SCAN t"]}) is None
+    assert store.record("c", "fp0", {"shape": ["SEARCH t USING INDEX ix (a=?)"]})["shape"] == ["SCAN t"]
+    for i in range(1, 60):
+        store.record("c", f"fp{i}", {"shape": []})
+    store.record("other", "fp0", {"shape": []})
+    assert len(store.entries("c")) <= 10 + 50
+    assert "fp59" in store.entries("c")
+    assert store.get("other", "fp0") == store.entries("other")["fp0"]
+    store.close()
+    reopened = PlanStore(path=str(tmp_path / "plans.db"))
+    assert reopened.get("c", "fp59") is not None
+    reopened.close()
+
+
+def test_regression_names_the_access_path_that_changed():
+    before = {"shape": ["Limit", "Sort", "Index Scan on a using a_pkey"], "cost": 10.0}
+    after = PlanEstimate(dialect="postgresql", shape=["Limit", "Sort", "Seq Scan on a"], cost=12.0)
+    assert detect_plan_regression(before, after) == "Plan changed: Index Scan on a using a_pkey → Seq Scan on a"
+    # Only non-access nodes moved: the access paths are the same
+    after = PlanEstimate(dialect="postgresql", shape=["Limit", "Index Scan on a using a_pkey"], cost=10.0)
+    assert detect_plan_regression(before, after) == "Plan changed shape"
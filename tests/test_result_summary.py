@@ -0,0 +1,74 @@
+from services.result_summary import parse_row_count, summarize_result
+
+
+COLUMNS = ["id", "name", "amount"]
+
+
+def _rows(n):
+    return [(i, f"customer number {i}", i * 2.5) for i in range(1, n + 1)]
+
+
+def test_small_result_is_shown_in_full_without_a_summary():
+    out = summarize_result(COLUMNS, _rows(3), token_budget=1000)
+    lines = out.split("\n")
+    assert lines[0] == "3 rows, 3 columns"
+    assert lines[1] == "id,name,amount"
+    assert lines[2:] == ["1,customer number 1,2.5", "2,customer number 2,5.0", "3,customer number 3,7.5"]
+    assert "Column summary" not in out
+
+
+def test_empty_result():
+    assert summarize_result(COLUMNS, [], token_budget=100) == "0 rows\nid,name,amount"
+    assert summarize_result([], [], token_budget=100) == "0 rows"
+
+
+def test_rows_past_max_rows_are_summarized_over_all_rows():
+    out = summarize_result(COLUMNS, _rows(50), token_budget=1000, max_rows=5)
+    lines = out.split("\n")
+    assert lines[0] == "50 rows, 3 columns (first 5 shown)"
+    assert lines[7] == "Column summary (all rows scanned):"
+    assert lines[8] == "id: min 1, max 50, 50 distinct"
+    assert lines[10] == "amount: min 2.5, max 125.0, 50 distinct"
+
+
+def test_scan_cap_reports_a_lower_bound_and_says_how_much_was_scanned():
+    out = summarize_result(COLUMNS, iter(_rows(500)), token_budget=1000, max_rows=3, max_scan=100)
+    assert out.startswith("100+ rows, 3 columns (first 3 shown)\n")
+    assert "Column summary (first 100 rows scanned):" in out
+    assert "all rows scanned" not in out
+    assert "id: min 1, max 100, 100 distinct" in out
+
+
+def test_budget_cut_reserves_room_for_the_summary():
+    # Every row fits max_rows, but not the budget: the summary must still fit whole
+    budget = 100
+    out = summarize_result(COLUMNS, _rows(20), token_budget=budget, max_rows=20)
+    assert not out.endswith("…")
+    assert len(out) <= budget * 4
+    lines = out.split("\n")
+    shown = int(lines[0].split("(first ", 1)[1].split(" ", 1)[0])
+    assert 1 <= shown < 20
+    assert lines[2 + shown] == "Column summary (all rows scanned):"
+    assert lines[-1] == "amount: min 2.5, max 50.0, 20 distinct"
+
+
+def test_results_that_fit_use_the_budget_without_reserving_for_a_summary():
+    rows = _rows(6)
+    full = summarize_result(COLUMNS, rows, token_budget=10_000)
+    out = summarize_result(COLUMNS, rows, token_budget=len(full) // 4 + 10)
+    assert out == full
+
+
+def test_at_least_one_row_is_shown_and_very_wide_results_are_cut():
+    wide = [tuple("x" * 90 for _ in range(30))]
+    out = summarize_result([f"c{i}" for i in range(30)], wide * 2, token_budget=50)
+    assert len(out) == 200 and out.endswith("…")
+
+
+def test_parse_row_count():
+    assert parse_row_count(summarize_result(COLUMNS, _rows(12))) == "12"
+    assert parse_row_count(summarize_result(COLUMNS, _rows(30), max_scan=10)) == "10+"
+    assert parse_row_count("0 rows") == "0"
+    assert parse_row_count("Error: no such table: x") is None
+    assert parse_row_count("") is None
+
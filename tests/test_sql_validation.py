@@ -0,0 +1,19 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from services.sql_validation import QueryValidator
+
+
+def test_failures_are_not_cached_and_successes_are():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    validator = QueryValidator(engine)
+    error = validator.validate("SELECT id FROM later")
+    assert error is not None and "no such table" in error
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE later (id INTEGER)"))
+    # The table exists now: the earlier failure must not be replayed
+    assert validator.validate("SELECT id FROM later WHERE id = 1") is None
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE later"))
+    # Same shape, different literal: validated once already
+    assert validator.validate("SELECT id FROM later WHERE id = 2") is None
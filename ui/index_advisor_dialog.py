@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, List, Optional
+
+from PySide6 import QtGui, QtWidgets
+from sqlalchemy.engine import Engine
+
+from services.index_advisor import IndexCandidate
+from ui.workers import _IndexAdvisorWorker
+
+
+class IndexAdvisorDialog(QtWidgets.QDialog):
+    """Lists CREATE INDEX suggestions for the slow queries run in a workspace.
+
+    Statements are only shown for copying; the dialog never executes them.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        quote: Callable[[str], str],
+        history: Callable[[], List[Dict[str, Any]]],
+        parent: Optional[QtWidgets.QWidget] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Index Advisor")
+        self.resize(820, 520)
+        self.engine = engine
+        self.quote = quote
+        self.history = history
+        self._candidates: List[IndexCandidate] = []
+        self._worker: Optional[_IndexAdvisorWorker] = None
+
+        root = QtWidgets.QVBoxLayout(self)
+        root.setContentsMargins(12, 12, 12, 12)
+        root.setSpacing(8)
+
+        top = QtWidgets.QHBoxLayout()
+        top.addWidget(QtWidgets.QLabel("Slow query threshold:"))
+        self.slow_ms = QtWidgets.QSpinBox()
+        self.slow_ms.setRange(0, 3_600_000)
+        self.slow_ms.setSingleStep(100)
+        self.slow_ms.setValue(200)
+        self.slow_ms.setSuffix(" ms")
+        top.addWidget(self.slow_ms)
+        self.btn_analyze = QtWidgets.QPushButton("Analyze")
+        self.btn_analyze.clicked.connect(self._on_analyze)
+        top.addWidget(self.btn_analyze)
+        top.addStretch(1)
+        root.addLayout(top)
+
+        self.status = QtWidgets.QLabel("Analyze the queries run in this workspace to find missing indexes.")
+        self.status.setObjectName("QueryMeta")
+        self.status.setWordWrap(True)
+        root.addWidget(self.status)
+
+        self.table = QtWidgets.QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(["Table", "Columns", "Observed", "Benefit", "Verification"])
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.itemSelectionChanged.connect(self._on_selected)
+        root.addWidget(self.table, 1)
+
+        self.statement = QtWidgets.QPlainTextEdit()
+        self.statement.setReadOnly(True)
+        self.statement.setMaximumHeight(120)
+        self.statement.setPlaceholderText("Select a suggestion to see its statement and the queries it helps.")
+        root.addWidget(self.statement)
+
+        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        self.btn_copy = btns.addButton("Copy Statement", QtWidgets.QDialogButtonBox.ActionRole)
+        self.btn_copy.setEnabled(False)
+        self.btn_copy.clicked.connect(self._on_copy)
+        btns.rejected.connect(self.reject)
+        root.addWidget(btns)
+
+    def _on_analyze(self) -> None:
+        if self._worker is not None and self._worker.isRunning():
+            return
+        history = self.history()
+        if not history:
+            self.status.setText("No timed queries yet. Run some queries in the workspace first.")
+            return
+        self.btn_analyze.setEnabled(False)
+        self.status.setText(f"Analyzing {len(history)} queries…")
+        worker = _IndexAdvisorWorker(self.engine, self.quote, history, float(self.slow_ms.value()))
+        worker.candidates_ready.connect(self._on_candidates)
+        worker.failed.connect(self._on_failed)
+        worker.finished.connect(lambda: self.btn_analyze.setEnabled(True))
+        self._worker = worker
+        worker.start()
+
+    def _on_candidates(self, candidates: List[IndexCandidate]) -> None:
+        self._candidates = list(candidates)
+        self.table.setRowCount(len(self._candidates))
+        for row, cand in enumerate(self._candidates):
+            if cand.verified is None:
+                check = cand.verification
+            else:
+                check = f"{'helps' if cand.verified else 'no gain'} ({cand.verification})"
+            values = [cand.table, ", ".join(cand.columns), f"{cand.observed_ms:.0f} ms", cand.benefit, check]
+            for col, value in enumerate(values):
+                self.table.setItem(row, col, QtWidgets.QTableWidgetItem(value))
+        self.table.resizeColumnsToContents()
+        if self._candidates:
+            self.status.setText(f"{len(self._candidates)} suggestion(s). Statements are not run; review and apply them yourself.")
+            self.table.selectRow(0)
+        else:
+            self.status.setText("No missing indexes found for queries slower than the threshold.")
+            self.statement.clear()
+            self.btn_copy.setEnabled(False)
+
+    def _on_failed(self, err: str) -> None:
+        self.status.setText(f"Analysis failed: {err}")
+
+    def _on_selected(self) -> None:
+        row = self.table.currentRow()
+        if not (0 <= row < len(self._candidates)):
+            self.btn_copy.setEnabled(False)
+            return
+        cand = self._candidates[row]
+        lines = [cand.statement + ";", "", "-- Slow queries that scan this table:"]
+        lines += [f"-- {' '.join(q.split())}" for q in cand.queries]
+        self.statement.setPlainText("\n".join(lines))
+        self.btn_copy.setEnabled(True)
+
+    def _on_copy(self) -> None:
+        row = self.table.currentRow()
+        if 0 <= row < len(self._candidates):
+            QtGui.QGuiApplication.clipboard().setText(self._candidates[row].statement + ";")
+
+    def done(self, result: int) -> None:  # type: ignore[override]
+        if self._worker is not None and self._worker.isRunning():
+            self._worker.wait(5000)
+        super().done(result)
@@ -3,13 +3,17 @@ from __future__ import annotations
 from typing import Optional
 from PySide6 import QtWidgets, QtCore
 
-from core.config_store import ConnectionManager, SettingsManager, RecentsManager
+from core.config_store import SLOW_QUERY_LOG_PATH, TRACES_PATH, ConnectionManager, SettingsManager, RecentsManager
 from services.db_service import build_engine
-from db_util import quick_test_connection
+from services.fast_sql import SchemaCache
+from services.tracing import configure_tracing, export_chrome_trace, recent_trace_ids
+from db_util import WAIT_BUCKETS_MS, configure_slow_query_log, engine_metrics, pool_metrics, quick_test_connection
 from ui.settings_dialog import SettingsDialog
 from ui.connection_editor import ConnectionEditor
 from ui.query_tab import QueryTab
 from ui.about_dialog import AboutDialog
+from ui.index_advisor_dialog import IndexAdvisorDialog
+from ui.watchdog import StallReportDialog, current_watchdog
 from ui.widgets import ConnectionListItemWidget
 
 
@@ -24,6 +28,7 @@ class MainWindow(QtWidgets.QMainWindow):
         self.recents = RecentsManager()
         self.current_config: Optional[dict] = None
         self.current_engine = None
+        self._apply_diagnostics_settings()
 
         self.stack = QtWidgets.QStackedWidget()
         self.setCentralWidget(self.stack)
@@ -41,7 +46,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.act_settings.triggered.connect(self._on_settings)
         self.act_back.triggered.connect(lambda: self._show_connections())
 
+        tools_menu = self.menuBar().addMenu("Tools")
+        self.act_index_advisor = tools_menu.addAction("Index Advisor…")
+        self.act_index_advisor.setEnabled(False)
+        self.act_index_advisor.triggered.connect(self._on_index_advisor)
+        tools_menu.addSeparator()
+        self.act_export_trace = tools_menu.addAction("Export Traces…")
+        self.act_export_trace.triggered.connect(self._on_export_traces)
+
         help_menu = self.menuBar().addMenu("Help")
+        self.act_stalls = help_menu.addAction("UI Stalls…")
+        self.act_stalls.triggered.connect(self._on_ui_stalls)
         self.act_about = help_menu.addAction("About AskDB…")
         self.act_about.triggered.connect(self._on_about)
 
@@ -115,6 +130,12 @@ class MainWindow(QtWidgets.QMainWindow):
                         w.shutdown()
                 except Exception:
                     pass
+                try:
+                    # Tables may have changed by the time this database is opened again
+                    if getattr(w, "engine", None) is not None:
+                        SchemaCache.invalidate(w.engine)
+                except Exception:
+                    pass
                 w.setParent(None)
                 w.deleteLater()
 
@@ -146,6 +167,8 @@ class MainWindow(QtWidgets.QMainWindow):
             url_text = " ".join(parts)
         self.header_meta.setText(url_text)
         self.header_meta.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        self.header_stats.setText("")
+        self.header_stats.setToolTip("")
 
     def _open_workspace(self, engine, cfg: dict) -> None:
         self._clear_workspace()
@@ -175,6 +198,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.header_title.setObjectName("WorkspaceHeaderTitle")
         top_row.addWidget(self.header_title, 0, QtCore.Qt.AlignLeft)
         top_row.addStretch(1)
+        self.header_stats = QtWidgets.QLabel("")
+        self.header_stats.setObjectName("WorkspaceHeaderMeta")
+        top_row.addWidget(self.header_stats, 0, QtCore.Qt.AlignRight)
         self.btn_reconnect = QtWidgets.QPushButton("Reconnect")
         self.btn_reconnect.clicked.connect(self._on_reconnect)
         top_row.addWidget(self.btn_reconnect, 0, QtCore.Qt.AlignRight)
@@ -198,20 +224,98 @@ class MainWindow(QtWidgets.QMainWindow):
         self.workspace_container_layout.setContentsMargins(0, 0, 0, 0)
         v.addWidget(self.workspace_container, 1)
         self.workspace_page = page
+        # Connection pool panel in the status bar (workspace only)
+        self.pool_status = QtWidgets.QLabel("")
+        self.pool_status.setObjectName("WorkspaceHeaderMeta")
+        self.statusBar().addPermanentWidget(self.pool_status)
+        self.pool_status.setVisible(False)
+        # Latency percentiles are polled rather than pushed from the DB threads
+        self._stats_timer = QtCore.QTimer(self)
+        self._stats_timer.setInterval(2000)
+        self._stats_timer.timeout.connect(self._refresh_query_stats)
+        self._stats_timer.start()
         self.stack.addWidget(page)
 
     def _show_workspace(self) -> None:
         self.stack.setCurrentIndex(1)
         self.act_back.setEnabled(True)
+        self.act_index_advisor.setEnabled(True)
 
     def _show_connections(self) -> None:
         self.stack.setCurrentIndex(0)
         self.act_back.setEnabled(False)
+        self.act_index_advisor.setEnabled(False)
 
     def _on_about(self) -> None:
         dlg = AboutDialog(self)
         dlg.exec()
 
+    def _on_ui_stalls(self) -> None:
+        watchdog = current_watchdog()
+        if watchdog is None:
+            QtWidgets.QMessageBox.information(self, "UI Stalls", "The stall watchdog is not running.")
+            return
+        dlg = StallReportDialog(watchdog, self)
+        dlg.exec()
+
+    def _current_query_tab(self) -> Optional[QueryTab]:
+        for i in range(self.workspace_container_layout.count()):
+            w = self.workspace_container_layout.itemAt(i).widget()
+            if isinstance(w, QueryTab):
+                return w
+        return None
+
+    def _on_index_advisor(self) -> None:
+        tab = self._current_query_tab()
+        if tab is None:
+            return
+        dlg = IndexAdvisorDialog(tab.engine, tab.quote_identifier, tab.slow_query_history, self)
+        dlg.exec()
+
+    def _on_export_traces(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export Traces", "askdb-trace.json", "Chrome trace (*.json)"
+        )
+        if not path:
+            return
+        try:
+            # The most recent questions/queries; open the file in chrome://tracing or Perfetto
+            count = export_chrome_trace(path, recent_trace_ids(50) or None, store_path=str(TRACES_PATH))
+            QtWidgets.QMessageBox.information(self, "Export Traces", f"Exported {count} spans to {path}.")
+        except Exception as ex:
+            QtWidgets.QMessageBox.warning(self, "Export Traces", str(ex))
+
+    def _refresh_pool_status(self) -> None:
+        try:
+            pm = pool_metrics(self.current_engine)
+        except Exception:
+            self.pool_status.setVisible(False)
+            return
+        parts = []
+        if pm.get("size") is not None:
+            parts.append(f"Pool {pm.get('checked_out') or 0}/{pm['size']}")
+            if pm.get("max_overflow"):
+                parts.append(f"overflow {pm.get('overflow') or 0}/{pm['max_overflow']}")
+        if pm.get("checkouts"):
+            parts.append(f"wait p95 <{pm['wait_p95_ms']:.0f} ms")
+        if pm.get("timeouts"):
+            parts.append(f"{pm['timeouts']} timeouts")
+        self.pool_status.setText(" · ".join(parts))
+        hist = ", ".join(
+            f"{'<' + format(bound, 'g') if bound is not None else '≥' + format(WAIT_BUCKETS_MS[-1], 'g')} ms: {count}"
+            for bound, count in pm.get("wait_histogram", [])
+        )
+        self.pool_status.setToolTip(
+            "Connection pool\n"
+            f"Checked out: {pm.get('checked_out')} of {pm.get('size')} (+{pm.get('overflow')} overflow, max {pm.get('max_overflow')})\n"
+            f"Checkouts: {pm.get('checkouts', 0)} · new connections: {pm.get('connects', 0)}\n"
+            f"Timeouts: {pm.get('timeouts', 0)} · invalidations: {pm.get('invalidations', 0)} · recycles: {pm.get('recycles', 0)}\n"
+            f"Checkout wait: {hist}\n"
+            f"Max wait: {pm.get('max_wait_ms', 0.0):.1f} ms\n"
+            f"Held: {pm.get('avg_hold_ms', 0.0):.1f} ms on average, max {pm.get('max_hold_ms', 0.0):.1f} ms"
+        )
+        self.pool_status.setVisible(bool(parts))
+
     def _reload_lists(self) -> None:
         self.saved_list.clear()
         for c in self.conn_mgr.connections:
@@ -253,6 +357,37 @@ class MainWindow(QtWidgets.QMainWindow):
     def _on_settings(self) -> None:
         dlg = SettingsDialog(self.settings, self)
         dlg.exec()
+        self._apply_diagnostics_settings()
+
+    def _apply_diagnostics_settings(self) -> None:
+        if self.settings.slow_query_log:
+            configure_slow_query_log(str(SLOW_QUERY_LOG_PATH), self.settings.slow_query_ms)
+        else:
+            configure_slow_query_log(None)
+        configure_tracing(str(TRACES_PATH) if self.settings.local_tracing else None)
+
+    def _refresh_query_stats(self) -> None:
+        metrics = engine_metrics(self.current_engine) if self.current_engine is not None else None
+        if metrics is None or self.stack.currentIndex() != 1:
+            self.pool_status.setVisible(False)
+            return
+        self._refresh_pool_status()
+        def ms(v: float) -> str:
+            return f"{v:.1f}" if v < 10 else f"{v:.0f}"
+
+        stats = metrics.latency_percentiles()
+        if not stats["count"]:
+            self.header_stats.setText("")
+            return
+        self.header_stats.setText(
+            f"{int(stats['count'])} queries · p50 {ms(stats['p50'])} ms · p95 {ms(stats['p95'])} ms"
+        )
+        agent, user = metrics.latency_percentiles("agent"), metrics.latency_percentiles("user")
+        self.header_stats.setToolTip(
+            "Statement latency over the last queries on this connection\n"
+            f"Agent: {int(agent['count'])} · p50 {ms(agent['p50'])} ms · p95 {ms(agent['p95'])} ms\n"
+            f"You: {int(user['count'])} · p50 {ms(user['p50'])} ms · p95 {ms(user['p95'])} ms"
+        )
 
     def _on_saved_selected(self) -> None:
         # ensure only one list has a selection
@@ -377,6 +512,8 @@ class MainWindow(QtWidgets.QMainWindow):
             url_text = " ".join(parts)
         self.header_meta.setText(url_text)
         self.header_meta.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
+        self.header_stats.setText("")
+        self.header_stats.setToolTip("")
         self._show_workspace()
         self._set_busy(False)
 
@@ -0,0 +1,326 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from PySide6 import QtCore
+
+from services.paging import ColumnFilter, filter_rows, sort_rows
+from ui.utils import markdown_to_html
+
+
+class ResultsTableModel(QtCore.QAbstractTableModel):
+    """Read-only table model for query results that grows page by page.
+
+    Cell text is produced lazily in data(), so only rows the view actually paints
+    are converted to strings. When more rows are available the view's scrolling
+    triggers fetchMore(), which is forwarded as ``fetch_more_requested`` for the
+    owner to satisfy (usually from an already prefetched page).
+
+    Once a result is fully loaded it can be sorted and filtered in memory with
+    apply_local_view(); the unfiltered rows are kept so views can be changed or
+    cleared without going back to the database.
+    """
+
+    fetch_more_requested = QtCore.Signal()
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._source_rows: List[Sequence[Any]] = []
+        self._rows: List[Sequence[Any]] = []
+        self._cols: List[str] = []
+        self._has_more = False
+        self._fetching = False
+
+    # Population ---------------------------------------------------------
+
+    def set_result(self, rows: List[Sequence[Any]], cols: Sequence[str], has_more: bool = False) -> None:
+        self.beginResetModel()
+        self._source_rows = list(rows)
+        self._rows = self._source_rows
+        self._cols = [str(c) for c in cols]
+        self._has_more = has_more
+        self._fetching = False
+        self.endResetModel()
+
+    def append_rows(self, rows: Sequence[Sequence[Any]], has_more: bool) -> None:
+        self._fetching = False
+        self._has_more = has_more
+        if not rows:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QtCore.QModelIndex(), start, start + len(rows) - 1)
+        if self._rows is not self._source_rows:
+            self._rows.extend(rows)
+        self._source_rows.extend(rows)
+        self.endInsertRows()
+
+    def apply_local_view(self, sort: Optional[Tuple[str, bool]] = None, filters: Sequence[ColumnFilter] = ()) -> None:
+        """Sort/filter the loaded rows client-side; ``sort`` is (column_name, descending)."""
+        self.beginResetModel()
+        rows = filter_rows(self._source_rows, self._cols, filters) if filters else self._source_rows
+        if sort is not None and sort[0] in self._cols:
+            rows = sort_rows(rows, self._cols.index(sort[0]), bool(sort[1]))
+        self._rows = rows
+        self.endResetModel()
+
+    def set_message(self, header: str, message: Optional[str] = None) -> None:
+        """Show a single status column (e.g. "Running…" or "Error") instead of results."""
+        self.set_result([[message]] if message is not None else [], [header])
+
+    def set_has_more(self, has_more: bool) -> None:
+        self._has_more = has_more
+        self._fetching = False
+
+    def columns(self) -> List[str]:
+        return list(self._cols)
+
+    def rows(self) -> List[Sequence[Any]]:
+        return self._rows
+
+    def source_row_count(self) -> int:
+        return len(self._source_rows)
+
+    # Qt model API -------------------------------------------------------
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._cols)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if not index.isValid() or role not in (QtCore.Qt.DisplayRole, QtCore.Qt.ToolTipRole):
+            return None
+        try:
+            return str(self._rows[index.row()][index.column()])
+        except IndexError:
+            return None
+
+    def headerData(self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self._cols[section] if 0 <= section < len(self._cols) else None
+        return str(section + 1)
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:  # type: ignore[override]
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        return QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
+
+    def canFetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:  # type: ignore[override]
+        return not parent.isValid() and self._has_more and not self._fetching
+
+    def fetchMore(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> None:  # type: ignore[override]
+        if parent.isValid() or not self._has_more or self._fetching:
+            return
+        self._fetching = True
+        self.fetch_more_requested.emit()
+
+
+class ChatModel(QtCore.QAbstractListModel):
+    """Chat transcript, one row per message.
+
+    Each message is a dict: role ("you", "ai" or "error"), text (markdown),
+    html (rendered), ai_index (for answers from this run), db_id (its row in
+    the chat store, if saved), footer (summary, details), footer_expanded and
+    a version that changes whenever its rendering does, which the delegate
+    uses to key its cached layout. New messages are appended; older saved ones
+    are prepended as they are loaded, and remove_front() trims the window.
+    """
+
+    MessageRole = QtCore.Qt.UserRole + 1
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._messages: List[Dict[str, Any]] = []
+        self._ai_rows: Dict[int, int] = {}
+
+    def _new_message(
+        self,
+        role: str,
+        text: str,
+        ai_index: Optional[int] = None,
+        html: Optional[str] = None,
+        db_id: Optional[int] = None,
+        footer: Optional[Tuple[str, str]] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "role": role,
+            "text": text,
+            "html": html if html is not None else markdown_to_html(text),
+            "ai_index": ai_index,
+            "db_id": db_id,
+            "footer": tuple(footer) if footer else None,
+            "footer_expanded": False,
+            "version": 0,
+        }
+
+    def append(
+        self,
+        role: str,
+        text: str,
+        ai_index: Optional[int] = None,
+        html: Optional[str] = None,
+        db_id: Optional[int] = None,
+        footer: Optional[Tuple[str, str]] = None,
+    ) -> int:
+        row = len(self._messages)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._messages.append(self._new_message(role, text, ai_index, html, db_id, footer))
+        if ai_index is not None:
+            self._ai_rows[ai_index] = row
+        self.endInsertRows()
+        return row
+
+    def prepend(self, records: List[Dict[str, Any]]) -> int:
+        """Insert saved messages ({role, text, id, footer}, oldest first) above the current ones."""
+        if not records:
+            return 0
+        count = len(records)
+        self.beginInsertRows(QtCore.QModelIndex(), 0, count - 1)
+        older = [self._new_message(r["role"], r["text"], db_id=r.get("id"), footer=r.get("footer")) for r in records]
+        self._messages[:0] = older
+        self._ai_rows = {ai: row + count for ai, row in self._ai_rows.items()}
+        self.endInsertRows()
+        return count
+
+    def remove_front(self, count: int) -> List[Dict[str, Any]]:
+        """Drop the ``count`` oldest rows and return their messages."""
+        count = min(count, len(self._messages))
+        if count <= 0:
+            return []
+        self.beginRemoveRows(QtCore.QModelIndex(), 0, count - 1)
+        removed = self._messages[:count]
+        del self._messages[:count]
+        self._ai_rows = {ai: row - count for ai, row in self._ai_rows.items() if row >= count}
+        self.endRemoveRows()
+        return removed
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._messages = []
+        self._ai_rows = {}
+        self.endResetModel()
+
+    def ai_row(self, ai_index: int) -> Optional[int]:
+        return self._ai_rows.get(ai_index)
+
+    def message(self, row: Optional[int]) -> Optional[Dict[str, Any]]:
+        return self._messages[row] if row is not None and 0 <= row < len(self._messages) else None
+
+    def set_text(self, row: Optional[int], text: str, html: Optional[str] = None) -> None:
+        msg = self.message(row)
+        if msg is None:
+            return
+        msg["text"] = text
+        msg["html"] = html if html is not None else markdown_to_html(text)
+        self._changed(row)
+
+    def set_footer(self, row: Optional[int], summary: str, details: str = "") -> None:
+        """One-line footer under an AI answer; ``details`` show when it is expanded."""
+        msg = self.message(row)
+        if msg is None:
+            return
+        msg["footer"] = (summary, details)
+        self._changed(row)  # type: ignore[arg-type]
+
+    def toggle_footer(self, row: int) -> bool:
+        """Expand/collapse the footer details; returns False if there is nothing to toggle."""
+        msg = self.message(row)
+        if msg is None or not msg["footer"] or not msg["footer"][1]:
+            return False
+        msg["footer_expanded"] = not msg["footer_expanded"]
+        self._changed(row)
+        return True
+
+    def _changed(self, row: int) -> None:
+        self._messages[row]["version"] += 1
+        idx = self.index(row, 0)
+        self.dataChanged.emit(idx, idx)
+
+    # Qt model API -------------------------------------------------------
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else len(self._messages)
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        msg = self.message(index.row()) if index.isValid() else None
+        if msg is None:
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return msg["text"]
+        if role == self.MessageRole:
+            return msg
+        return None
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlags:  # type: ignore[override]
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        # Messages are not selectable
+        return QtCore.Qt.ItemIsEnabled
+
+
+class QueryHistoryModel(QtCore.QAbstractListModel):
+    """Executed queries, one row per entry dict ({sql, ai_index, estimate, plan_change, ...}).
+
+    The entries list is shared with the owner, which only appends to it; sync()
+    inserts rows for the new tail, so adding a query never rebuilds the list.
+    Call entry_changed() after updating an entry in place (pre-flight estimate,
+    plan change) so the view repaints that row.
+    """
+
+    EntryRole = QtCore.Qt.UserRole + 1
+
+    def __init__(self, entries: List[Dict[str, Any]], parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._entries = entries
+        self._count = 0
+        self._rows: Dict[int, int] = {}  # id(entry) -> row
+
+    def sync(self) -> None:
+        count = len(self._entries)
+        if count < self._count:
+            # Entries were removed; start over
+            self.beginResetModel()
+            self._count = 0
+            self._rows.clear()
+            self.endResetModel()
+        if count == self._count:
+            return
+        self.beginInsertRows(QtCore.QModelIndex(), self._count, count - 1)
+        for row in range(self._count, count):
+            self._rows[id(self._entries[row])] = row
+        self._count = count
+        self.endInsertRows()
+
+    def set_entries(self, entries: List[Dict[str, Any]]) -> None:
+        """Replace the rows wholesale (e.g. with search results)."""
+        self.beginResetModel()
+        self._entries = entries
+        self._count = len(entries)
+        self._rows = {id(e): row for row, e in enumerate(entries)}
+        self.endResetModel()
+
+    def entry(self, row: int) -> Optional[Dict[str, Any]]:
+        return self._entries[row] if 0 <= row < self._count else None
+
+    def entry_changed(self, entry: Dict[str, Any]) -> None:
+        row = self._rows.get(id(entry))
+        if row is None or self.entry(row) is not entry:
+            return
+        idx = self.index(row, 0)
+        self.dataChanged.emit(idx, idx)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:  # type: ignore[override]
+        return 0 if parent.isValid() else self._count
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.DisplayRole) -> Any:  # type: ignore[override]
+        entry = self.entry(index.row()) if index.isValid() else None
+        if entry is None:
+            return None
+        if role == QtCore.Qt.DisplayRole:
+            return entry.get("sql", "")
+        if role == self.EntryRole:
+            return entry
+        return None
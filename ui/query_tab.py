@@ -1,15 +1,44 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from PySide6 import QtCore, QtWidgets
+from sqlalchemy import inspect as sa_inspect
 from sqlalchemy.engine import Engine
 
 from core.config_store import SettingsManager
-from ui.utils import markdown_to_html
-from ui.widgets import ChatMessageRowWidget, QueryListItemWidget
-from services.sql_utils import normalize_sql, format_sql
-from ui.workers import _AgentStreamWorker, _AgentInitWorker, _SQLExecWorker
+from core.chat_store import ChatStore
+from core.history_store import QueryHistoryStore
+from core.plan_store import PlanStore
+from db_util import ConnectorFactory
+from ui.utils import MarkdownRenderer
+from ui.models import ChatModel, QueryHistoryModel, ResultsTableModel
+from ui.widgets import ChatBubbleDelegate, QueryItemDelegate
+from services.accounting import QuestionStats, SessionStats
+from services.db_service import connection_key
+from services.memory import ConversationMemory
+from services.explain import PlanEstimate, check_estimate, detect_plan_regression, is_explainable
+from services.result_summary import parse_row_count
+from services.paging import (
+    PAGE_SIZE,
+    ColumnFilter,
+    ResultPager,
+    column_is_numeric,
+    parse_filter_expression,
+    wrap_limit,
+    wrap_view,
+)
+from services.sql_utils import fingerprint_sql, normalize_sql, format_sql
+from services.tracing import span
+from ui.workers import _AgentStreamWorker, _AgentInitWorker, _SQLExecWorker, _SQLExplainWorker
+
+# Minimum interval between chat bubble renders while answers stream (~30 fps)
+CHAT_RENDER_MS = 33
+# Chat messages kept in memory; older ones are reloaded from the chat store, CHAT_PAGE at a time, on scroll up
+CHAT_WINDOW = 200
+CHAT_PAGE = 50
   
 
 
@@ -25,25 +54,46 @@ class QueryTab(QtWidgets.QWidget):
         }
         self.agent: Optional[Any] = None  # created asynchronously
         self._pending_prompts: List[Tuple[int, str]] = []
-        self._ai_messages: List[Dict[str, Any]] = []  # {text, queries: [str], steps}
+        self._streaming: Set[int] = set()  # ai_index of answers still streaming
+        self._ai_messages: List[Dict[str, Any]] = []  # {text, queries: [str], prompt, stats}
         self.all_queries: List[Dict[str, Any]] = []  # {sql: str, ai_index: Optional[int]}
-        self._ai_items: List[QtWidgets.QListWidgetItem] = []
-        self._ai_widgets: List[Any] = []  # ChatMessageRowWidget aligned by ai index
+        self._session_stats = SessionStats()  # LLM/SQL accounting over this workspace's questions
+        # Streamed chat updates are coalesced: at most one bubble render per CHAT_RENDER_MS
+        self._chat_dirty: Set[int] = set()
+        self._md_renderers: Dict[int, MarkdownRenderer] = {}  # incremental HTML per streaming AI message
+        self._last_chat_render = 0.0
+        self._chat_render_timer = QtCore.QTimer(self)
+        self._chat_render_timer.setSingleShot(True)
+        self._chat_render_timer.timeout.connect(self._flush_chat_renders)
+        # Appends and renders in one event-loop pass share a single relayout + scroll
+        self._chat_scroll_timer = QtCore.QTimer(self)
+        self._chat_scroll_timer.setSingleShot(True)
+        self._chat_scroll_timer.setInterval(0)
+        self._chat_scroll_timer.timeout.connect(lambda: self.chat_list.scrollToBottom())
 
         root = QtWidgets.QVBoxLayout(self)
 
         # LEFT: Chat (upper 50%) + SQL Output (lower 50%)
         chat_wrap = QtWidgets.QWidget()
         chat_layout = QtWidgets.QVBoxLayout(chat_wrap)
-        self.chat_list = QtWidgets.QListWidget()
+        # Model/view transcript: bubbles are painted by the delegate, only visible rows are drawn
+        self.chat_model = ChatModel(self)
+        self.chat_list = QtWidgets.QListView()
         self.chat_list.setObjectName("ChatList")
         self.chat_list.setUniformItemSizes(False)
         self.chat_list.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
         self.chat_list.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
-        self.chat_list.installEventFilter(self)
+        self.chat_list.setResizeMode(QtWidgets.QListView.Adjust)
         self.chat_list.setSelectionMode(QtWidgets.QAbstractItemView.NoSelection)
+        self.chat_list.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         self.chat_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.chat_delegate = ChatBubbleDelegate(self.chat_list)
+        self.chat_delegate.set_model(self.chat_model)
+        self.chat_list.setItemDelegate(self.chat_delegate)
+        self.chat_list.setModel(self.chat_model)
         self.chat_list.customContextMenuRequested.connect(self._on_chat_context_menu)
+        self.chat_list.clicked.connect(self._on_chat_index_clicked)
+        self.chat_list.verticalScrollBar().valueChanged.connect(self._on_chat_scrolled)
         self.chat_input = QtWidgets.QLineEdit()
         self.chat_send = QtWidgets.QPushButton("Send")
         send_row = QtWidgets.QHBoxLayout()
@@ -51,7 +101,17 @@ class QueryTab(QtWidgets.QWidget):
         send_row.addWidget(self.chat_send)
         chat_title = QtWidgets.QLabel("Chat")
         chat_title.setObjectName("SectionTitle")
-        chat_layout.addWidget(chat_title)
+        chat_title_row = QtWidgets.QHBoxLayout()
+        chat_title_row.addWidget(chat_title)
+        chat_title_row.addStretch(1)
+        # Session totals (LLM round trips, tokens, LLM vs SQL time)
+        self.session_stats_label = QtWidgets.QLabel("")
+        self.session_stats_label.setObjectName("QueryMeta")
+        chat_title_row.addWidget(self.session_stats_label)
+        self.chat_new = QtWidgets.QPushButton("New Chat")
+        self.chat_new.setToolTip("Start a new chat session; earlier sessions stay saved")
+        chat_title_row.addWidget(self.chat_new)
+        chat_layout.addLayout(chat_title_row)
         self._chat_placeholder = QtWidgets.QLabel("Start a conversation. Type a question and press Send. The AI will reply and generate SQL you can run.")
         self._chat_placeholder.setObjectName("SectionSubtitle")
         self._chat_placeholder.setWordWrap(True)
@@ -71,12 +131,29 @@ class QueryTab(QtWidgets.QWidget):
         output_layout.addWidget(self._output_placeholder)
 
         output_layout.setObjectName("SQLOutputLayout")
-        self.output_table = QtWidgets.QTableWidget()
+        self._results_view_label = QtWidgets.QLabel("")
+        self._results_view_label.setObjectName("SectionSubtitle")
+        self._results_view_label.setWordWrap(True)
+        self._results_view_label.setVisible(False)
+        output_layout.addWidget(self._results_view_label)
+        # Results grid: rows arrive page by page as the user scrolls
+        self.output_model = ResultsTableModel(self)
+        self.output_model.fetch_more_requested.connect(self._on_fetch_more_rows)
+        self.output_table = QtWidgets.QTableView()
+        self.output_table.setModel(self.output_model)
         # Make results table read-only
         try:
             self.output_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
         except Exception:
             pass
+        # Header click sorts, header context menu filters; both are pushed down into SQL
+        # unless the whole result is already in memory
+        results_header = self.output_table.horizontalHeader()
+        results_header.setSectionsClickable(True)
+        results_header.setSortIndicatorShown(False)
+        results_header.sectionClicked.connect(self._on_results_header_clicked)
+        results_header.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        results_header.customContextMenuRequested.connect(self._on_results_header_menu)
         output_layout.addWidget(self.output_table)
 
         left_splitter = QtWidgets.QSplitter()
@@ -93,16 +170,58 @@ class QueryTab(QtWidgets.QWidget):
         queries_title = QtWidgets.QLabel("Queries Executed")
         queries_title.setObjectName("SectionTitle")
         queries_panel_layout.addWidget(queries_title)
-        self._queries_placeholder = QtWidgets.QLabel("AI-generated and custom queries will be listed here. Right-click a query to copy it or click to run.")
+        self._queries_placeholder = QtWidgets.QLabel("AI-generated and custom queries will be listed here. Right-click a query to copy it or click to run. Search to find queries from earlier sessions.")
         self._queries_placeholder.setObjectName("SectionSubtitle")
         self._queries_placeholder.setWordWrap(True)
         queries_panel_layout.addWidget(self._queries_placeholder)
 
-        self.query_list = QtWidgets.QListWidget()
+        # all_queries is append-only; the model inserts rows for new entries instead of rebuilding
+        self.query_model = QueryHistoryModel(self.all_queries, self)
+        self.query_list = QtWidgets.QListView()
+        self.query_list.setObjectName("QueryList")
+        self.query_list.setUniformItemSizes(False)
+        self.query_list.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.query_list.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.query_list.setResizeMode(QtWidgets.QListView.Adjust)
+        self.query_list.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.query_list.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.query_delegate = QueryItemDelegate(self.query_list)
+        self.query_delegate.set_model(self.query_model)
+        self.query_list.setItemDelegate(self.query_delegate)
+        self.query_list.setModel(self.query_model)
         self.query_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
         self.query_list.customContextMenuRequested.connect(self._on_query_context_menu)
         queries_panel_layout.addWidget(self.query_list)
 
+        # Search over every query ever run on this connection (persistent history)
+        self.history_search = QtWidgets.QLineEdit()
+        self.history_search.setPlaceholderText("Search query history…")
+        self.history_search.setClearButtonEnabled(True)
+        queries_panel_layout.insertWidget(queries_panel_layout.indexOf(self.query_list), self.history_search)
+        self._history_results: List[Dict[str, Any]] = []
+        self.history_model = QueryHistoryModel(self._history_results, self)
+        self.history_list = QtWidgets.QListView()
+        self.history_list.setObjectName("QueryList")
+        self.history_list.setUniformItemSizes(False)
+        self.history_list.setVerticalScrollMode(QtWidgets.QAbstractItemView.ScrollPerPixel)
+        self.history_list.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
+        self.history_list.setResizeMode(QtWidgets.QListView.Adjust)
+        self.history_list.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.history_list.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.history_delegate = QueryItemDelegate(self.history_list)
+        self.history_delegate.set_model(self.history_model)
+        self.history_list.setItemDelegate(self.history_delegate)
+        self.history_list.setModel(self.history_model)
+        self.history_list.setContextMenuPolicy(QtCore.Qt.CustomContextMenu)
+        self.history_list.customContextMenuRequested.connect(self._on_history_context_menu)
+        self.history_list.setVisible(False)
+        queries_panel_layout.addWidget(self.history_list)
+        self._history_search_timer = QtCore.QTimer(self)
+        self._history_search_timer.setSingleShot(True)
+        self._history_search_timer.setInterval(150)
+        self._history_search_timer.timeout.connect(self._run_history_search)
+        self.history_search.textChanged.connect(lambda _text: self._history_search_timer.start())
+
         custom_panel = QtWidgets.QWidget()
         custom_panel_layout = QtWidgets.QVBoxLayout(custom_panel)
         custom_title = QtWidgets.QLabel("Custom Query")
@@ -142,9 +261,57 @@ class QueryTab(QtWidgets.QWidget):
 
         # Wire signals
         self.chat_send.clicked.connect(self._on_send)
-        self.query_list.itemSelectionChanged.connect(self._on_query_selected)
+        self.chat_new.clicked.connect(self._on_new_chat)
+        self.query_list.selectionModel().selectionChanged.connect(self._on_query_selected)
+        self.history_list.selectionModel().selectionChanged.connect(self._on_history_selected)
         self.custom_query_run.clicked.connect(self._on_run_custom_query)
         self._sql_worker: Optional[_SQLExecWorker] = None
+        # Paging state for the results grid (see _start_sql_in_thread)
+        self._pager: Optional[ResultPager] = None
+        self._page_worker: Optional[_SQLExecWorker] = None
+        self._page_generation = 0
+        # Workers of superseded queries run to completion (their results are dropped by generation)
+        self._stale_workers: List[QtCore.QThread] = []
+        self._unique_key_cache: Dict[str, List[List[str]]] = {}
+        self._prefetched_rows: Optional[List[List[Any]]] = None
+        self._want_more_rows = False
+        # Sort/filter view over the last executed query
+        self._results_base_sql: Optional[str] = None
+        self._results_is_view = False
+        self._results_ready = False
+        self._base_in_memory = False
+        self._view_sort: Optional[Tuple[str, bool]] = None
+        self._view_filters: List[ColumnFilter] = []
+        # Whether each result column held numbers when last seen (a filtered view may have no rows)
+        self._numeric_columns: Dict[str, bool] = {}
+        # Optional EXPLAIN pre-flight before running a query
+        self._explain_worker: Optional[_SQLExplainWorker] = None
+        self._preflight_generation = 0
+        # Plan capture per query fingerprint, used to flag plan regressions on re-runs
+        try:
+            self.plan_store: Optional[PlanStore] = PlanStore()
+        except Exception:
+            self.plan_store = None
+        try:
+            self.history_store: Optional[QueryHistoryStore] = QueryHistoryStore()
+        except Exception:
+            self.history_store = None
+        self._connection_key = connection_key(engine)
+        # Chat sessions are saved per connection; the latest one is reopened with its newest messages
+        try:
+            self.chat_store: Optional[ChatStore] = ChatStore()
+            self._chat_session: Optional[int] = self.chat_store.latest_session(self._connection_key)
+        except Exception:
+            self.chat_store = None
+            self._chat_session = None
+        self._chat_older_exhausted = True
+        # Context from earlier questions in this chat, sent with follow-ups
+        self.memory = ConversationMemory(self.settings.memory_token_budget)
+        self._restore_chat()
+        self._pending_capture: Optional[Dict[str, Any]] = None
+        self._capture_worker: Optional[_SQLExplainWorker] = None
+        # Captures waiting for the capture worker; the oldest are dropped after a burst of queries
+        self._capture_queue: deque = deque(maxlen=50)
 
         # Kick off agent initialization in the background
         self._agent_init_worker: Optional[_AgentInitWorker] = None
@@ -153,32 +320,6 @@ class QueryTab(QtWidgets.QWidget):
         self._worker: Optional[_AgentStreamWorker] = None
 
 
-    def eventFilter(self, obj: QtCore.QObject, ev: QtCore.QEvent) -> bool:  # type: ignore[override]
-        try:
-            if obj is self.chat_list and ev.type() == QtCore.QEvent.Resize:
-                self._fit_chat_bubbles()
-        except Exception:
-            pass
-        return super().eventFilter(obj, ev)
-
-    def _fit_chat_bubbles(self) -> None:
-        try:
-            avail = max(120, self.chat_list.viewport().width() - 40)
-            for i in range(self.chat_list.count()):
-                it = self.chat_list.item(i)
-                w = self.chat_list.itemWidget(it)
-                if hasattr(w, "bubble"):
-                    try:
-                        w.bubble.setMaximumWidth(avail)
-                        w.bubble.adjustSize()
-                        w.adjustSize()
-                        it.setSizeHint(w.sizeHint())
-                    except Exception:
-                        continue
-            self.chat_list.updateGeometries()
-        except Exception:
-            pass
-
     def _normalize_sql(self, q: str) -> str:
         return normalize_sql(q)
 
@@ -191,24 +332,110 @@ class QueryTab(QtWidgets.QWidget):
         return format_sql(q)
 
     def _append_chat(self, role: str, text: str, ai_index: Optional[int] = None) -> None:
-        row_widget = ChatMessageRowWidget(text, role=role.lower())
-        item = QtWidgets.QListWidgetItem()
-        item.setData(QtCore.Qt.UserRole, {"role": role.lower(), "ai_index": ai_index})
-        # Chat messages are not selectable
-        item.setFlags(QtCore.Qt.ItemIsEnabled)
-        item.setSizeHint(row_widget.sizeHint())
-        self.chat_list.addItem(item)
-        self.chat_list.setItemWidget(item, row_widget)
-        # Recompute size hint to avoid truncation
-        row_widget.adjustSize()
-        item.setSizeHint(row_widget.sizeHint())
-        self.chat_list.updateGeometries()
-        self.chat_list.scrollToBottom()
+        db_id = self._save_chat_message(role.lower(), text)
+        self.chat_model.append(role.lower(), text, ai_index=ai_index, db_id=db_id)
+        self._trim_chat()
+        self._chat_scroll_timer.start()
+
+    def _save_chat_message(self, role: str, text: str) -> Optional[int]:
+        if self.chat_store is None:
+            return None
+        try:
+            if self._chat_session is None:
+                self._chat_session = self.chat_store.new_session(self._connection_key)
+            return self.chat_store.add_message(self._chat_session, role, text)
+        except Exception:
+            return None
+
+    def _restore_chat(self) -> None:
+        if self.chat_store is None or self._chat_session is None:
+            return
         try:
-            self._fit_chat_bubbles()
+            records = self.chat_store.messages(self._chat_session, limit=CHAT_PAGE)
+        except Exception:
+            return
+        self._chat_older_exhausted = len(records) < CHAT_PAGE
+        self.chat_model.prepend(records)
+        self._chat_scroll_timer.start()
+        # A reopened session continues with the SQL its answers ran
+        question = ""
+        for record in records:
+            if record["role"] == "you":
+                question = record["text"]
+            elif record["role"] == "ai" and question:
+                self.memory.add_turn(question, record["text"], queries=record.get("queries"))
+                question = ""
+
+    def _on_chat_scrolled(self, value: int) -> None:
+        # Reaching the top loads the previous page of saved messages
+        if value > self.chat_list.verticalScrollBar().minimum() or self._chat_older_exhausted:
+            return
+        if self.chat_store is None or self._chat_session is None:
+            return
+        first = self.chat_model.message(0)
+        if first is None or first.get("db_id") is None:
+            return
+        try:
+            records = self.chat_store.messages(self._chat_session, before_id=first["db_id"], limit=CHAT_PAGE)
+        except Exception:
+            records = []
+        self._chat_older_exhausted = len(records) < CHAT_PAGE
+        if not records:
+            return
+        bar = self.chat_list.verticalScrollBar()
+        old_max, old_value = bar.maximum(), bar.value()
+        self.chat_model.prepend(records)
+        # Lay out now so the view stays on the message that was at the top
+        self.chat_list.doItemsLayout()
+        bar.setValue(old_value + bar.maximum() - old_max)
+
+    def _trim_chat(self) -> None:
+        # Keep the newest CHAT_WINDOW messages in memory while the user follows the conversation;
+        # everything trimmed is saved and reloads on scroll up
+        if self.chat_store is None or self.chat_model.rowCount() <= CHAT_WINDOW + CHAT_PAGE:
+            return
+        bar = self.chat_list.verticalScrollBar()
+        if bar.maximum() - bar.value() > self.chat_list.viewport().height():
+            return
+        removed = self.chat_model.remove_front(self.chat_model.rowCount() - CHAT_WINDOW)
+        self._chat_older_exhausted = False
+        for msg in removed:
+            ai_index = msg.get("ai_index")
+            if ai_index is not None and 0 <= ai_index < len(self._ai_messages):
+                self._ai_messages[ai_index] = {"text": "", "queries": [], "prompt": ""}
+
+    def _persist_answer(self, ai_index: int) -> None:
+        if self.chat_store is None or not (0 <= ai_index < len(self._ai_messages)):
+            return
+        msg = self.chat_model.message(self.chat_model.ai_row(ai_index))
+        if msg is None or msg.get("db_id") is None:
+            return
+        try:
+            answer = self._ai_messages[ai_index]
+            self.chat_store.update_message(msg["db_id"], text=answer.get("text", ""), queries=answer.get("queries", []))
         except Exception:
             pass
 
+    def _on_new_chat(self) -> None:
+        # Disabled while an answer is pending: it would stream into a transcript that no longer shows it
+        if self._streaming or self._pending_prompts:
+            return
+        # The next message starts a new session; the current one stays on disk
+        self._chat_session = None
+        self._chat_older_exhausted = True
+        self.chat_model.clear()
+        self.memory.clear()
+        # Blank rather than drop answers: Queries Executed still refers to them by ai_index
+        self._ai_messages = [{"text": "", "queries": [], "prompt": ""} for _ in self._ai_messages]
+        self._md_renderers.clear()
+        self._chat_dirty.clear()
+        self._session_stats = SessionStats()
+        self.session_stats_label.setText("")
+        self.session_stats_label.setToolTip("")
+
+    def _update_new_chat_enabled(self) -> None:
+        self.chat_new.setEnabled(not self._streaming and not self._pending_prompts)
+
     def _extract_queries(self, steps: List[Any]) -> List[str]:
         queries: List[str] = []
         for tup in steps:
@@ -236,26 +463,10 @@ class QueryTab(QtWidgets.QWidget):
         self._append_chat("You", text)
 
         # Create placeholder AI message and stream updates
-        self._ai_messages.append({"text": "", "queries": [], "steps": []})
+        self._ai_messages.append({"text": "", "queries": [], "prompt": text})
         ai_idx = len(self._ai_messages) - 1
         # Append placeholder row to chat
-        row_widget = ChatMessageRowWidget("…", role="ai")
-        item = QtWidgets.QListWidgetItem()
-        item.setData(QtCore.Qt.UserRole, {"role": "ai", "ai_index": ai_idx})
-        item.setFlags(QtCore.Qt.ItemIsEnabled)
-        item.setSizeHint(row_widget.sizeHint())
-        self.chat_list.addItem(item)
-        self.chat_list.setItemWidget(item, row_widget)
-        row_widget.adjustSize()
-        item.setSizeHint(row_widget.sizeHint())
-        self.chat_list.updateGeometries()
-        self.chat_list.scrollToBottom()
-        self._ai_items.append(item)
-        self._ai_widgets.append(row_widget)
-        try:
-            self._fit_chat_bubbles()
-        except Exception:
-            pass
+        self._append_chat("AI", "…", ai_index=ai_idx)
 
         # If agent ready, start stream; otherwise queue until init completes
         if self.agent is not None:
@@ -263,23 +474,29 @@ class QueryTab(QtWidgets.QWidget):
         else:
             # show a brief initializing hint
             try:
-                w = self._ai_widgets[ai_idx]
-                w.bubble.label.setText("Initializing model…")
+                self.chat_model.set_text(self.chat_model.ai_row(ai_idx), "Initializing model…")
             except Exception:
                 pass
             self._pending_prompts.append((ai_idx, text))
+            self._update_new_chat_enabled()
             self._start_agent_init()
 
     def _start_stream_for(self, ai_index: int, prompt: str) -> None:
-        worker = _AgentStreamWorker(self.agent, prompt, ai_index)
+        self.memory.token_budget = self.settings.memory_token_budget
+        worker = _AgentStreamWorker(self.agent, prompt, ai_index, self.memory)
         worker.add_query.connect(self._on_stream_query)
+        worker.query_ran.connect(self._on_agent_query_ran)
         worker.set_output.connect(self._on_stream_output)
+        worker.set_status.connect(self._on_stream_status)
+        worker.stats_ready.connect(self._on_question_stats)
         worker.failed.connect(self._on_agent_failed)
         worker.finished.connect(lambda ai=ai_index: self._on_stream_finished(ai))
         try:
-            worker.finished.connect(lambda: setattr(self, "_worker", None))
+            worker.finished.connect(lambda w=worker: self._worker is w and setattr(self, "_worker", None))
         except Exception:
             pass
+        self._streaming.add(ai_index)
+        self._update_new_chat_enabled()
         worker.start()
         self._worker = worker
 
@@ -293,7 +510,20 @@ class QueryTab(QtWidgets.QWidget):
             "api_key": self.settings.langsmith_api_key,
             "project": self.settings.langsmith_project,
         }
-        w = _AgentInitWorker(self.engine, self.settings.model_name, self.settings.api_key, tracing)
+        backend = {
+            "name": self.settings.llm_backend,
+            "base_url": self.settings.openai_base_url,
+            "latency_ms": self.settings.fake_llm_latency_ms,
+        }
+        w = _AgentInitWorker(
+            self.engine,
+            self.settings.model_name,
+            self.settings.api_key,
+            tracing,
+            backend,
+            self.settings.fast_mode,
+            self.settings.observation_token_budget,
+        )
         w.ready.connect(self._on_agent_init_ready)
         w.failed.connect(self._on_agent_init_failed)
         self._agent_init_worker = w
@@ -312,29 +542,63 @@ class QueryTab(QtWidgets.QWidget):
 
     def _on_agent_init_failed(self, err: str) -> None:
         self._append_chat("Error", err)
+        # Queued questions are not retried; the next send starts init again
+        for ai_index, _ in self._pending_prompts:
+            try:
+                self._ai_messages[ai_index]["text"] = "Not answered: the model could not be initialized."
+                self.chat_model.set_text(self.chat_model.ai_row(ai_index), self._ai_messages[ai_index]["text"])
+                self._persist_answer(ai_index)
+            except Exception:
+                pass
+        self._pending_prompts.clear()
+        self._update_new_chat_enabled()
 
     def _on_chat_context_menu(self, pos: QtCore.QPoint) -> None:
         try:
-            item = self.chat_list.itemAt(pos)
-            if not item:
-                return
-            widget = self.chat_list.itemWidget(item)
-            text = ""
-            try:
-                if hasattr(widget, "bubble") and hasattr(widget.bubble, "label"):
-                    text = widget.bubble.label.text()
-            except Exception:
-                text = ""
+            index = self.chat_list.indexAt(pos)
+            msg = self.chat_model.message(index.row()) if index.isValid() else None
+            text = msg["text"] if msg else ""
             if not text:
                 return
+            # Painted bubbles have no mouse text selection; copying goes through this menu
             menu = QtWidgets.QMenu(self)
-            act_copy = menu.addAction("Copy Message")
+            act_copy = menu.addAction("Copy Text")
+            act_markdown = menu.addAction("Copy Markdown")
             chosen = menu.exec_(self.chat_list.viewport().mapToGlobal(pos))
             if chosen == act_copy:
+                QtWidgets.QApplication.clipboard().setText(self.chat_delegate.plain_text(msg))
+            elif chosen == act_markdown:
                 QtWidgets.QApplication.clipboard().setText(text)
         except Exception:
             pass
 
+    def _on_chat_index_clicked(self, index: QtCore.QModelIndex) -> None:
+        # Clicking an answer expands/collapses its accounting footer
+        try:
+            self.chat_model.toggle_footer(index.row())
+        except Exception:
+            pass
+
+    def _on_question_stats(self, ai_index: int, stats: QuestionStats) -> None:
+        if not (0 <= ai_index < len(self._ai_messages)):
+            return
+        self._ai_messages[ai_index]["stats"] = stats
+        self._session_stats.add(stats)
+        self.session_stats_label.setText(self._session_stats.summary())
+        self.session_stats_label.setToolTip(self._session_stats.details())
+        try:
+            row = self.chat_model.ai_row(ai_index)
+            self.chat_model.set_footer(row, stats.summary(), stats.details())
+            msg = self.chat_model.message(row)
+            if self.chat_store is not None and msg is not None and msg.get("db_id") is not None:
+                self.chat_store.update_message(msg["db_id"], footer=[stats.summary(), stats.details()])
+        except Exception:
+            pass
+
+    def session_stats(self) -> SessionStats:
+        """LLM/SQL accounting aggregated over the questions asked in this workspace."""
+        return self._session_stats
+
     def _on_agent_failed(self, err: str) -> None:
         self._append_chat("Error", err)
 
@@ -343,9 +607,11 @@ class QueryTab(QtWidgets.QWidget):
         output = result.get("output", "")
         steps = result.get("intermediate_steps", [])
         queries = self._extract_queries(steps)
-        self._ai_messages.append({"text": output, "queries": queries, "steps": steps})
+        # Intermediate steps are not kept once the queries are extracted
+        self._ai_messages.append({"text": output, "queries": queries})
         ai_idx = len(self._ai_messages) - 1
         self._append_chat("AI", output, ai_index=ai_idx)
+        self._persist_answer(ai_idx)
         for q in queries:
             self.all_queries.append({"sql": q, "ai_index": ai_idx})
         self._refresh_query_list()
@@ -363,68 +629,67 @@ class QueryTab(QtWidgets.QWidget):
         self.all_queries.append({"sql": norm, "ai_index": ai_index})
         self._refresh_query_list()
 
+    def _on_stream_status(self, ai_index: int, text: str) -> None:
+        if not (0 <= ai_index < len(self._ai_messages)):
+            return
+        # Progress lines accumulate under the bubble; "Running: …" replaces them
+        prev = self._ai_messages[ai_index].get("text", "")
+        if text.startswith("Thinking") or text.startswith("Analyzing") or text.startswith("Planning"):
+            text = (prev + ("\n" if prev else "") + text).strip()
+        self._on_stream_output(ai_index, text)
+
     def _on_stream_output(self, ai_index: int, text: str) -> None:
-        if 0 <= ai_index < len(self._ai_messages):
-            # Append status lines, replace for final content
-            prev = self._ai_messages[ai_index].get("text", "")
-            if text.startswith("Thinking") or text.startswith("Analyzing") or text.startswith("Planning"):
-                new_text = (prev + ("\n" if prev else "") + text).strip()
-            else:
-                new_text = text
-            self._ai_messages[ai_index]["text"] = new_text
-            # Update bubble widget text and resize
-            w = self._ai_widgets[ai_index]
-            item = self._ai_items[ai_index]
-            try:
-                w.bubble.label.setText(markdown_to_html(new_text))
-                w.bubble.adjustSize()
-                w.adjustSize()
-                item.setSizeHint(w.sizeHint())
-                self.chat_list.updateGeometries()
-                self.chat_list.scrollToBottom()
-            except Exception:
-                pass
+        if not (0 <= ai_index < len(self._ai_messages)):
+            return
+        # Answer text arrives cumulative (the whole answer so far), so it always replaces
+        self._ai_messages[ai_index]["text"] = text
+        self._chat_dirty.add(ai_index)
+        if self._chat_render_timer.isActive():
+            return
+        # Render right away if the last render was a frame ago, else once the frame is over
+        wait_ms = CHAT_RENDER_MS - (time.perf_counter() - self._last_chat_render) * 1000.0
+        if wait_ms <= 0:
+            self._flush_chat_renders()
+        else:
+            self._chat_render_timer.start(int(wait_ms) + 1)
+
+    def _flush_chat_renders(self) -> None:
+        self._chat_render_timer.stop()
+        dirty = sorted(self._chat_dirty)
+        self._chat_dirty.clear()
+        if not dirty:
+            return
+        self._last_chat_render = time.perf_counter()
+        with span("ui.render_chat", "ui", messages=len(dirty)):
+            for ai_index in dirty:
+                # Only this row is laid out again; the delegate keeps the others cached
+                try:
+                    row = self.chat_model.ai_row(ai_index)
+                    renderer = self._md_renderers.setdefault(ai_index, MarkdownRenderer())
+                    text = self._ai_messages[ai_index].get("text", "")
+                    self.chat_model.set_text(row, text, html=renderer.render(text))
+                except Exception:
+                    pass
+            self._chat_scroll_timer.start()
 
 
     def _refresh_query_list(self) -> None:
-        self.query_list.clear()
-        for idx, entry in enumerate(self.all_queries, start=1):
-            ai_idx = entry.get("ai_index")
-            source_text = f"Source: AI #{ai_idx + 1}" if ai_idx is not None else "Source: Custom"
-            widget = QueryListItemWidget(idx, entry["sql"], source_text)
-            item = QtWidgets.QListWidgetItem()
-            item.setData(QtCore.Qt.UserRole, entry)
-            item.setFlags(item.flags() | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable)
-            item.setSizeHint(widget.sizeHint())
-            self.query_list.addItem(item)
-            self.query_list.setItemWidget(item, widget)
-        # Sync selection style on refresh
-        self._sync_query_item_selection()
-
-    def _on_query_selected(self) -> None:
-        items = self.query_list.selectedItems()
-        if not items:
-            self._sync_query_item_selection()
-            return
-        self._sync_query_item_selection()
-        data = items[0].data(QtCore.Qt.UserRole) or {}
-        sql = data.get("sql") if isinstance(data, dict) else items[0].text()
-        self._start_sql_in_thread(sql)
+        # Only entries appended since the last refresh are inserted
+        self.query_model.sync()
+
+    def _on_query_selected(self, *args: Any) -> None:
+        indexes = self.query_list.selectionModel().selectedIndexes()
+        if not indexes:
+            return
+        entry = self.query_model.entry(indexes[0].row())
+        if entry and entry.get("sql"):
+            self._run_sql_and_show(entry["sql"], entry)
 
     def _on_query_context_menu(self, pos: QtCore.QPoint) -> None:
         try:
-            item = self.query_list.itemAt(pos)
-            if not item:
-                return
-            data = item.data(QtCore.Qt.UserRole) or {}
-            sql = data.get("sql") if isinstance(data, dict) else ""
-            if not sql:
-                widget = self.query_list.itemWidget(item)
-                try:
-                    if hasattr(widget, "code"):
-                        sql = widget.code.text()
-                except Exception:
-                    sql = ""
+            index = self.query_list.indexAt(pos)
+            entry = self.query_model.entry(index.row()) if index.isValid() else None
+            sql = entry.get("sql", "") if entry else ""
             if not sql:
                 return
             menu = QtWidgets.QMenu(self)
@@ -436,6 +701,12 @@ class QueryTab(QtWidgets.QWidget):
             pass
 
     def _on_stream_finished(self, ai_index: int) -> None:
+        # Show the final answer now rather than at the next frame
+        self._flush_chat_renders()
+        self._md_renderers.pop(ai_index, None)
+        self._persist_answer(ai_index)
+        self._streaming.discard(ai_index)
+        self._update_new_chat_enabled()
         try:
             if 0 <= ai_index < len(self._ai_messages):
                 queries = self._ai_messages[ai_index].get("queries", [])
@@ -444,14 +715,6 @@ class QueryTab(QtWidgets.QWidget):
         except Exception:
             pass
 
-    def _sync_query_item_selection(self) -> None:
-        for i in range(self.query_list.count()):
-            it = self.query_list.item(i)
-            w = self.query_list.itemWidget(it)
-            if hasattr(w, "set_selected"):
-                w.set_selected(it.isSelected())
-
-
     def _on_run_custom_query(self) -> None:
         sql = self.custom_query_edit.toPlainText().strip()
         if not sql:
@@ -460,35 +723,397 @@ class QueryTab(QtWidgets.QWidget):
         self._refresh_query_list()
         self._run_sql_and_show(sql)
 
-    def _run_sql_and_show(self, sql: str) -> None:
+    def _run_sql_and_show(self, sql: str, entry: Optional[Dict[str, Any]] = None) -> None:
         try:
-            self._start_sql_in_thread(sql)
+            entry = entry if entry is not None else self._entry_for_sql(sql)
+            if self.settings.preflight_enabled and is_explainable(sql):
+                self._start_preflight(sql, entry)
+            else:
+                self._start_sql_in_thread(sql, entry)
         except Exception as ex:
             self._on_sql_error(str(ex))
 
-    def _start_sql_in_thread(self, sql: str) -> None:
-        # Show loading state
-        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
-        self.output_table.clear()
-        self.output_table.setRowCount(0)
-        self.output_table.setColumnCount(1)
-        self.output_table.setHorizontalHeaderLabels(["Running…"])
-        # Stop previous worker if any
-        if getattr(self, "_sql_worker", None) is not None and self._sql_worker.isRunning():
+    def _entry_for_sql(self, sql: str) -> Optional[Dict[str, Any]]:
+        return next((e for e in reversed(self.all_queries) if e.get("sql") == sql), None)
+
+    def _update_query_item(self, entry: Dict[str, Any]) -> None:
+        self.query_model.entry_changed(entry)
+        self.history_model.entry_changed(entry)
+
+    def _run_history_search(self) -> None:
+        text = self.history_search.text().strip()
+        searching = bool(text) and self.history_store is not None
+        if searching:
             try:
-                self._sql_worker.terminate()
+                records = self.history_store.search(text, self._connection_key)
             except Exception:
-                pass
-        worker = _SQLExecWorker(self.engine, sql)
-        worker.result_ready.connect(self._on_sql_result)
-        worker.failed.connect(self._on_sql_error)
+                records = []
+            self._history_results = [self._history_entry(r) for r in records]
+            self.history_model.set_entries(self._history_results)
+        self.history_list.setVisible(searching)
+        self.query_list.setVisible(not searching)
+
+    def _history_entry(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(record.get("executed_at") or 0))
+        origin = {"ai": "AI", "agent": "Agent", "custom": "Custom", "history": "Re-run"}.get(record.get("origin") or "", "")
+        parts: List[str] = []
+        if record.get("error"):
+            parts.append("failed")
+        if record.get("row_count") is not None:
+            parts.append(f"{record['row_count']}{'+' if record.get('has_more') else ''} rows")
+        if record.get("duration_ms") is not None:
+            parts.append(f"{record['duration_ms']:.0f} ms")
+        return {
+            "sql": record.get("sql") or "",
+            "ai_index": None,
+            "origin": "history",
+            "prompt": record.get("prompt") or "",
+            "title": f"{when} · {origin}" if origin else when,
+            "recorded": " · ".join(parts),
+        }
+
+    def _on_history_selected(self, *args: Any) -> None:
+        indexes = self.history_list.selectionModel().selectedIndexes()
+        if not indexes:
+            return
+        entry = self.history_model.entry(indexes[0].row())
+        if entry and entry.get("sql"):
+            # Straight to execution; the re-run is recorded in history, not in this session's list
+            self._run_sql_and_show(entry["sql"], entry)
+
+    def _on_history_context_menu(self, pos: QtCore.QPoint) -> None:
+        try:
+            index = self.history_list.indexAt(pos)
+            entry = self.history_model.entry(index.row()) if index.isValid() else None
+            if not entry or not entry.get("sql"):
+                return
+            menu = QtWidgets.QMenu(self)
+            act_copy = menu.addAction("Copy SQL")
+            act_edit = menu.addAction("Open in Custom Query")
+            chosen = menu.exec_(self.history_list.viewport().mapToGlobal(pos))
+            if chosen == act_copy:
+                QtWidgets.QApplication.clipboard().setText(entry["sql"])
+            elif chosen == act_edit:
+                self.custom_query_edit.setPlainText(entry["sql"])
+        except Exception:
+            pass
+
+    def _record_history(
+        self, capture: Dict[str, Any], row_count: Optional[int], has_more: bool, error: Optional[str] = None
+    ) -> None:
+        if self.history_store is None:
+            return
+        try:
+            entry = capture.get("entry") or {}
+            ai_index = entry.get("ai_index")
+            prompt = entry.get("prompt") or ""
+            if ai_index is not None and 0 <= ai_index < len(self._ai_messages):
+                prompt = self._ai_messages[ai_index].get("prompt", "")
+            origin = entry.get("origin") or ("ai" if ai_index is not None else "custom")
+            self.history_store.add(
+                self._connection_key,
+                capture["sql"],
+                duration_ms=capture.get("duration_ms"),
+                row_count=row_count,
+                has_more=has_more,
+                prompt=prompt,
+                origin=origin,
+                error=error,
+            )
+        except Exception:
+            pass
+
+    def _on_agent_query_ran(self, ai_index: int, sql: str, observation: str) -> None:
+        # The agent's own sql_db_query calls; its last query also runs in the grid and is recorded again there
+        if self.history_store is None:
+            return
         try:
-            worker.finished.connect(lambda: setattr(self, "_sql_worker", None))
+            prompt = self._ai_messages[ai_index].get("prompt", "") if 0 <= ai_index < len(self._ai_messages) else ""
+            failed = observation.startswith("Error")
+            count = None if failed else parse_row_count(observation)
+            self.history_store.add(
+                self._connection_key,
+                self._format_sql(sql),
+                row_count=int(count.rstrip("+")) if count else None,
+                has_more=bool(count and count.endswith("+")),
+                prompt=prompt,
+                origin="agent",
+                error=observation.splitlines()[0][:500] if failed else None,
+            )
+        except Exception:
+            pass
+
+    def _start_preflight(self, sql: str, entry: Optional[Dict[str, Any]]) -> None:
+        # A running EXPLAIN holds a pooled connection: let it finish, its estimate fails the generation check
+        self._stale_workers = [w for w in self._stale_workers if w.isRunning()]
+        if self._explain_worker is not None and self._explain_worker.isRunning():
+            self._stale_workers.append(self._explain_worker)
+        self._preflight_generation += 1
+        generation = self._preflight_generation
+        self.output_model.set_message("Estimating…")
+        worker = _SQLExplainWorker(self.engine, sql)
+        worker.estimate_ready.connect(lambda est, g=generation: self._on_preflight_estimate(g, sql, entry, est))
+        worker.failed.connect(lambda msg, g=generation: self._on_preflight_failed(g, sql, entry))
+        self._explain_worker = worker
+        worker.start()
+
+    def _on_preflight_estimate(self, generation: int, sql: str, entry: Optional[Dict[str, Any]], est: PlanEstimate) -> None:
+        # The worker is still returning from run(); _explain_worker keeps it alive until the next pre-flight
+        if generation != self._preflight_generation:
+            return
+        reason = check_estimate(est, self.settings.preflight_max_rows, self.settings.preflight_max_cost)
+        action = self.settings.preflight_action if reason else ""
+        if entry is not None:
+            entry["estimate"] = est.summary() + {"block": " · blocked", "limit": " · limited"}.get(action, "")
+            self._update_query_item(entry)
+        if reason is None:
+            self._start_sql_in_thread(sql, entry, est)
+        elif action == "limit":
+            self._start_sql_in_thread(wrap_limit(sql, self.settings.preflight_limit_rows), entry, est, plan_sql=sql)
+        else:
+            self.output_model.set_message(
+                "Blocked",
+                f"{reason} Adjust the thresholds under Settings → Query Safety to run it.",
+            )
+
+    def _on_preflight_failed(self, generation: int, sql: str, entry: Optional[Dict[str, Any]]) -> None:
+        # EXPLAIN can fail for reasons that don't matter here (permissions, dialect quirks);
+        # the query itself still runs and reports its own errors.
+        if generation != self._preflight_generation:
+            return
+        self._start_sql_in_thread(sql, entry)
+
+    def _start_sql_in_thread(
+        self,
+        sql: str,
+        entry: Optional[Dict[str, Any]] = None,
+        estimate: Optional[PlanEstimate] = None,
+        plan_sql: Optional[str] = None,
+    ) -> None:
+        # Supersede any pending pre-flight estimate
+        self._preflight_generation += 1
+        # Remember what to capture once the first page is back (timing + plan)
+        plan_sql = plan_sql or sql
+        self._pending_capture = {
+            "sql": plan_sql,
+            "entry": entry,
+            "estimate": estimate,
+            "started": time.perf_counter(),
+            "explain": self.settings.capture_plans and is_explainable(plan_sql),
+        }
+        # A new query starts with no sort/filter view
+        self._results_base_sql = sql
+        self._base_in_memory = False
+        self._view_sort = None
+        self._view_filters = []
+        self._numeric_columns = {}
+        self._update_results_view_state()
+        self._run_results_query(sql)
+
+    def _run_results_query(self, sql: str, params: Optional[Dict[str, Any]] = None, is_view: bool = False) -> None:
+        # Show loading state
+        QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.WaitCursor)
+        self._results_is_view = is_view
+        self._results_ready = False
+        self.output_model.set_message("Running…")
+        # Earlier workers finish on their own and release their connections; their results are ignored
+        self._stale_workers = [w for w in self._stale_workers if w.isRunning()]
+        for attr in ("_sql_worker", "_page_worker"):
+            w = getattr(self, attr, None)
+            if w is not None and w.isRunning():
+                self._stale_workers.append(w)
+            setattr(self, attr, None)
+        # Results are fetched a page at a time; later pages are prefetched in the background
+        self._page_generation += 1
+        generation = self._page_generation
+        self._prefetched_rows = None
+        self._want_more_rows = False
+        self._pager = ResultPager(sql, self.quote_identifier, PAGE_SIZE, params, self._unique_keys)
+        page_sql, params = self._pager.next_page()
+        worker = _SQLExecWorker(self.engine, page_sql, params)
+        worker.result_ready.connect(lambda rows, cols, g=generation: self._on_sql_result(rows, cols, g))
+        worker.failed.connect(lambda msg, g=generation: self._on_sql_error(msg, g))
+        try:
+            worker.finished.connect(lambda w=worker: self._sql_worker is w and setattr(self, "_sql_worker", None))
         except Exception:
             pass
         self._sql_worker = worker
         worker.start()
 
+    def _unique_keys(self, table: str) -> List[List[str]]:
+        """Primary key and unique column sets of ``table`` ("schema.table" allowed), for keyset paging."""
+        cached = self._unique_key_cache.get(table)
+        if cached is not None:
+            return cached
+        schema, _, name = table.rpartition(".")
+        found: List[List[str]] = []
+        try:
+            insp = sa_inspect(self.engine)
+            pk = insp.get_pk_constraint(name, schema=schema or None).get("constrained_columns") or []
+            if pk:
+                found.append(list(pk))
+            for uc in insp.get_unique_constraints(name, schema=schema or None):
+                found.append(list(uc.get("column_names") or []))
+            for ix in insp.get_indexes(name, schema=schema or None):
+                if ix.get("unique"):
+                    found.append([c for c in ix.get("column_names") or [] if c])
+        except Exception:
+            found = []
+        self._unique_key_cache[table] = found
+        return found
+
+    def quote_identifier(self, name: str) -> str:
+        return ConnectorFactory.get_adapter_for_engine(self.engine).quote_identifier(name)
+
+    def _more_rows_available(self) -> bool:
+        pager = self._pager
+        return self._prefetched_rows is not None or (pager is not None and pager.has_more)
+
+    def _prefetch_next_page(self) -> None:
+        pager = self._pager
+        if pager is None or not pager.has_more or self._prefetched_rows is not None:
+            return
+        if self._page_worker is not None and self._page_worker.isRunning():
+            return
+        generation = self._page_generation
+        page_sql, params = pager.next_page()
+        worker = _SQLExecWorker(self.engine, page_sql, params)
+        worker.result_ready.connect(lambda rows, cols, g=generation: self._on_page_prefetched(g, rows, cols))
+        worker.failed.connect(lambda msg, g=generation: self._on_page_failed(g, msg))
+        self._page_worker = worker
+        worker.start()
+
+    def _on_page_prefetched(self, generation: int, rows: List[List[Any]], cols: List[str]) -> None:
+        if generation != self._page_generation or self._pager is None:
+            return
+        self._page_worker = None
+        self._pager.advance(rows, cols)
+        self._prefetched_rows = rows
+        if self._want_more_rows:
+            self._on_fetch_more_rows()
+
+    def _on_page_failed(self, generation: int, msg: str) -> None:
+        if generation != self._page_generation:
+            return
+        self._page_worker = None
+        if self._pager is not None:
+            self._pager.has_more = False
+        self._want_more_rows = False
+        self.output_model.set_has_more(self._more_rows_available())
+
+    def _on_fetch_more_rows(self) -> None:
+        if self._prefetched_rows is None:
+            # Page still in flight; append as soon as it lands
+            self._want_more_rows = True
+            self._prefetch_next_page()
+            return
+        rows = self._prefetched_rows
+        self._prefetched_rows = None
+        self._want_more_rows = False
+        self.output_model.append_rows(rows, has_more=self._more_rows_available())
+        self._mark_base_in_memory()
+        self._prefetch_next_page()
+
+    def _mark_base_in_memory(self) -> None:
+        if not self._results_is_view and not self._more_rows_available():
+            self._base_in_memory = True
+
+    def _on_results_header_clicked(self, section: int) -> None:
+        cols = self.output_model.columns()
+        if not self._results_ready or not 0 <= section < len(cols):
+            return
+        name = cols[section]
+        descending = False
+        if self._view_sort is not None and self._view_sort[0] == name:
+            descending = not self._view_sort[1]
+        self._view_sort = (name, descending)
+        self._apply_results_view()
+
+    def _on_results_header_menu(self, pos: QtCore.QPoint) -> None:
+        try:
+            header = self.output_table.horizontalHeader()
+            section = header.logicalIndexAt(pos)
+            cols = self.output_model.columns()
+            # A failed pushed-down view still offers Reset View to get back to the base query
+            if not 0 <= section < len(cols) or not (self._results_ready or self._results_is_view):
+                return
+            name = cols[section]
+            current = next((f for f in self._view_filters if f.column == name), None)
+            menu = QtWidgets.QMenu(self)
+            act_filter = menu.addAction(f"Filter “{name}”…")
+            act_filter.setEnabled(self._results_ready)
+            act_clear = menu.addAction(f"Clear Filter on “{name}”")
+            act_clear.setEnabled(current is not None)
+            menu.addSeparator()
+            act_clear_sort = menu.addAction("Clear Sort")
+            act_clear_sort.setEnabled(self._view_sort is not None)
+            act_reset = menu.addAction("Reset View")
+            act_reset.setEnabled(self._view_sort is not None or bool(self._view_filters))
+            chosen = menu.exec_(header.mapToGlobal(pos))
+            if chosen == act_filter:
+                default = "" if current is None else current.describe()[len(name) + 1:]
+                expr, ok = QtWidgets.QInputDialog.getText(
+                    self,
+                    "Filter Column",
+                    f"Filter “{name}” (e.g. = value, > 10, contains text, is null):",
+                    text=default,
+                )
+                if not ok:
+                    return
+                rows = self.output_model.rows()
+                index = self.output_model.columns().index(name)
+                if any(r[index] is not None for r in rows[:1000]):
+                    self._numeric_columns[name] = column_is_numeric(rows, index)
+                flt = parse_filter_expression(name, expr, self._numeric_columns.get(name, False))
+                self._view_filters = [f for f in self._view_filters if f.column != name]
+                if flt is not None:
+                    self._view_filters.append(flt)
+                self._apply_results_view()
+            elif chosen == act_clear:
+                self._view_filters = [f for f in self._view_filters if f.column != name]
+                self._apply_results_view()
+            elif chosen == act_clear_sort:
+                self._view_sort = None
+                self._apply_results_view()
+            elif chosen == act_reset:
+                self._view_sort = None
+                self._view_filters = []
+                self._apply_results_view()
+        except Exception:
+            pass
+
+    def _apply_results_view(self) -> None:
+        base = self._results_base_sql
+        if base is None:
+            return
+        if self._base_in_memory:
+            # Everything is already loaded: sort/filter client-side
+            self.output_model.apply_local_view(self._view_sort, self._view_filters)
+        elif self._view_sort is None and not self._view_filters:
+            self._run_results_query(base)
+        else:
+            sql, params = wrap_view(base, self.quote_identifier, self._view_sort, self._view_filters)
+            self._run_results_query(sql, params, is_view=True)
+        self._update_results_view_state()
+
+    def _update_results_view_state(self) -> None:
+        header = self.output_table.horizontalHeader()
+        cols = self.output_model.columns()
+        if self._view_sort is not None and self._view_sort[0] in cols:
+            order = QtCore.Qt.DescendingOrder if self._view_sort[1] else QtCore.Qt.AscendingOrder
+            header.setSortIndicatorShown(True)
+            header.setSortIndicator(cols.index(self._view_sort[0]), order)
+        else:
+            header.setSortIndicatorShown(False)
+        parts: List[str] = []
+        if self._view_sort is not None:
+            parts.append(f"sorted by {self._view_sort[0]} {'↓' if self._view_sort[1] else '↑'}")
+        parts.extend(f.describe() for f in self._view_filters)
+        if parts:
+            where = "in memory" if self._base_in_memory else "in the database"
+            self._results_view_label.setText(f"View: {' · '.join(parts)} ({where})")
+        self._results_view_label.setVisible(bool(parts))
+
     def shutdown(self) -> None:
         """Stop any running background threads to avoid QThread destruction errors."""
         try:
@@ -498,6 +1123,23 @@ class QueryTab(QtWidgets.QWidget):
                     workers.append(self._sql_worker)
             except Exception:
                 pass
+            try:
+                if getattr(self, "_page_worker", None) is not None:
+                    workers.append(self._page_worker)
+                workers.extend(getattr(self, "_stale_workers", []))
+            except Exception:
+                pass
+            try:
+                if getattr(self, "_explain_worker", None) is not None:
+                    workers.append(self._explain_worker)
+            except Exception:
+                pass
+            try:
+                getattr(self, "_capture_queue", deque()).clear()
+                if getattr(self, "_capture_worker", None) is not None:
+                    workers.append(self._capture_worker)
+            except Exception:
+                pass
             try:
                 if getattr(self, "_worker", None) is not None:
                     workers.append(self._worker)
@@ -521,29 +1163,134 @@ class QueryTab(QtWidgets.QWidget):
         except Exception:
             pass
 
-    def _on_sql_result(self, rows: List[List[Any]], cols: List[str]) -> None:
-        try:
-            self.output_table.setRowCount(len(rows))
-            self.output_table.setColumnCount(len(cols))
-            self.output_table.setHorizontalHeaderLabels([str(c) for c in cols])
-            for r, row in enumerate(rows):
-                for c, val in enumerate(row):
-                    self.output_table.setItem(r, c, QtWidgets.QTableWidgetItem(str(val)))
-            self.output_table.resizeColumnsToContents()
-        finally:
+    def _on_sql_result(self, rows: List[List[Any]], cols: List[str], generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self._page_generation:
+            # A newer query replaced this one; balance its wait cursor and drop the rows
             QtWidgets.QApplication.restoreOverrideCursor()
+            return
+        with span("ui.render_results", "ui", rows=len(rows), columns=len(cols)):
+            try:
+                if self._pager is not None:
+                    self._pager.advance(rows, cols)
+                self.output_model.set_result(rows, cols, has_more=self._more_rows_available())
+                self._results_ready = True
+                self._mark_base_in_memory()
+                self._update_results_view_state()
+                self.output_table.resizeColumnsToContents()
+            finally:
+                QtWidgets.QApplication.restoreOverrideCursor()
+        self._prefetch_next_page()
+        self._capture_plan(len(rows), self._more_rows_available())
 
-    def _on_sql_error(self, msg: str) -> None:
+    def _capture_plan(self, row_count: int = 0, has_more: bool = False) -> None:
+        capture = self._pending_capture
+        self._pending_capture = None
+        if capture is None or self._results_is_view:
+            return
+        capture["duration_ms"] = (time.perf_counter() - capture["started"]) * 1000.0
+        # With more pages left the time covers the first page only; the index advisor re-times those
+        capture["partial"] = has_more
+        self._record_history(capture, row_count, has_more)
+        # Run times feed the index advisor even when plan capture is off
+        if capture.get("entry") is not None:
+            capture["entry"]["duration_ms"] = capture["duration_ms"]
+            capture["entry"]["partial"] = has_more
+        if not capture.get("explain") or self.plan_store is None:
+            return
+        if capture.get("estimate") is not None:
+            self._record_plan(capture, capture["estimate"])
+            return
+        # No pre-flight estimate for this run: plan it in the background, one EXPLAIN at a time
+        self._capture_queue.append(capture)
+        self._start_next_capture()
+
+    def _start_next_capture(self) -> None:
+        if self._capture_worker is not None and self._capture_worker.isRunning():
+            return
+        if not self._capture_queue or self.engine is None:
+            return
+        capture = self._capture_queue.popleft()
+        worker = _SQLExplainWorker(self.engine, capture["sql"])
+        worker.estimate_ready.connect(lambda est, c=capture: self._record_plan(c, est))
+        worker.finished.connect(lambda w=worker: self._on_capture_finished(w))
+        self._capture_worker = worker
+        worker.start()
+
+    def _on_capture_finished(self, worker: "_SQLExplainWorker") -> None:
+        if self._capture_worker is worker:
+            self._capture_worker = None
+        self._start_next_capture()
+
+    def _record_plan(self, capture: Dict[str, Any], est: PlanEstimate) -> None:
+        if self.plan_store is None:
+            return
         try:
-            self.output_table.setRowCount(0)
-            self.output_table.setColumnCount(1)
-            self.output_table.setHorizontalHeaderLabels(["Error"])
-            self.output_table.setRowCount(1)
-            self.output_table.setItem(0, 0, QtWidgets.QTableWidgetItem(msg))
+            sql = capture["sql"]
+            duration_ms = capture.get("duration_ms")
+            record = est.to_dict()
+            record.update({"duration_ms": duration_ms, "partial": bool(capture.get("partial")), "sql": normalize_sql(sql)})
+            previous = self.plan_store.record(self._connection_key, fingerprint_sql(sql), record)
+            entry = capture.get("entry")
+            if entry is None or previous is None:
+                return
+            change = detect_plan_regression(previous, est)
+            if change:
+                before_ms = previous.get("duration_ms")
+                timing = f"{before_ms:.0f} ms → {duration_ms:.0f} ms" if before_ms is not None else f"{duration_ms:.0f} ms"
+                entry["plan_change"] = f"{change} · {timing}"
+            else:
+                entry.pop("plan_change", None)
+            self._update_query_item(entry)
+        except Exception:
+            pass
+
+    def slow_query_history(self) -> List[Dict[str, Any]]:
+        """Executed queries with their last run time and plan shape, for the index advisor.
+
+        Includes this session's queries plus plans captured on this connection earlier.
+        """
+        history: List[Dict[str, Any]] = []
+        seen = set()
+        plans = self.plan_store.entries(self._connection_key) if self.plan_store is not None else {}
+        for item in self.all_queries:
+            sql = item.get("sql") or ""
+            if not sql or item.get("duration_ms") is None:
+                continue
+            fp = fingerprint_sql(sql)
+            seen.add(fp)
+            stored = plans.get(fp) or {}
+            history.append(
+                {"sql": sql, "duration_ms": item["duration_ms"], "partial": item.get("partial"), "shape": stored.get("shape")}
+            )
+        for fp, stored in plans.items():
+            if fp not in seen and stored.get("sql") and stored.get("duration_ms") is not None:
+                history.append(
+                    {
+                        "sql": stored["sql"],
+                        "duration_ms": stored["duration_ms"],
+                        "partial": stored.get("partial"),
+                        "shape": stored.get("shape"),
+                    }
+                )
+        return history
+
+    def _on_sql_error(self, msg: str, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self._page_generation:
+            QtWidgets.QApplication.restoreOverrideCursor()
+            return
+        try:
+            # A first page that failed is a failed run; record it like a successful one
+            capture = self._pending_capture
+            self._pending_capture = None
+            if capture is not None and not self._results_is_view:
+                capture["duration_ms"] = (time.perf_counter() - capture["started"]) * 1000.0
+                self._record_history(capture, None, False, error=msg.splitlines()[0][:500] if msg else "error")
+            self._pager = None
+            if not self._results_is_view:
+                self._results_base_sql = None
+            self.output_model.set_message("Error", msg)
         finally:
             QtWidgets.QApplication.restoreOverrideCursor()
 
 
  
-
-
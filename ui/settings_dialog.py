@@ -63,8 +63,51 @@ class SettingsDialog(QtWidgets.QDialog):
         api_row_w = QtWidgets.QWidget()
         api_row_w.setLayout(api_row)
 
+        self.backend_combo = QtWidgets.QComboBox()
+        self.backend_combo.addItem("OpenAI (or compatible server)", "openai")
+        self.backend_combo.addItem("Offline scripted model (testing)", "fake")
+        self.backend_combo.setCurrentIndex(max(0, self.backend_combo.findData(self.settings.llm_backend)))
+        self.base_url_edit = QtWidgets.QLineEdit(self.settings.openai_base_url)
+        self.base_url_edit.setPlaceholderText("Default OpenAI endpoint, or e.g. http://localhost:8000/v1")
+        self.base_url_edit.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
+        self.fake_latency = QtWidgets.QSpinBox()
+        self.fake_latency.setRange(0, 60_000)
+        self.fake_latency.setSingleStep(50)
+        self.fake_latency.setSuffix(" ms per call")
+        self.fake_latency.setValue(self.settings.fake_llm_latency_ms)
+        self.fast_mode_check = QtWidgets.QCheckBox("Answer with a single LLM call over cached schema (falls back to the full agent)")
+        self.fast_mode_check.setChecked(self.settings.fast_mode)
+        self.memory_budget = QtWidgets.QSpinBox()
+        self.memory_budget.setRange(0, 8000)
+        self.memory_budget.setSingleStep(100)
+        self.memory_budget.setSuffix(" tokens")
+        self.memory_budget.setSpecialValueText("Off")
+        self.memory_budget.setToolTip("Earlier questions, SQL, result shapes and known schema sent with follow-ups")
+        self.memory_budget.setValue(self.settings.memory_token_budget)
+        self.observation_budget = QtWidgets.QSpinBox()
+        self.observation_budget.setRange(0, 32_000)
+        self.observation_budget.setSingleStep(250)
+        self.observation_budget.setSuffix(" tokens")
+        self.observation_budget.setSpecialValueText("Full results")
+        self.observation_budget.setToolTip("Row count, first rows and column statistics the agent sees for each query")
+        self.observation_budget.setValue(self.settings.observation_token_budget)
+
+        def _sync_backend() -> None:
+            is_fake = self.backend_combo.currentData() == "fake"
+            for w in (self.model_combo, self.key_edit, show_api, self.base_url_edit):
+                w.setEnabled(not is_fake)
+            self.fake_latency.setEnabled(is_fake)
+        _sync_backend()
+        self.backend_combo.currentIndexChanged.connect(lambda _i: _sync_backend())
+
+        provider_form.addRow(mk_label("Backend", self.backend_combo), self.backend_combo)
         provider_form.addRow(mk_label("Model", self.model_combo), self.model_combo)
         provider_form.addRow(mk_label("OpenAI API Key", api_row_w), api_row_w)
+        provider_form.addRow(mk_label("Base URL", self.base_url_edit), self.base_url_edit)
+        provider_form.addRow(mk_label("Scripted latency", self.fake_latency), self.fake_latency)
+        provider_form.addRow(mk_label("Fast mode", self.fast_mode_check), self.fast_mode_check)
+        provider_form.addRow(mk_label("Conversation memory", self.memory_budget), self.memory_budget)
+        provider_form.addRow(mk_label("Query result summary", self.observation_budget), self.observation_budget)
 
         # Observability group
         obs_box = QtWidgets.QGroupBox("Observability (LangSmith)")
@@ -96,9 +139,78 @@ class SettingsDialog(QtWidgets.QDialog):
         obs_form.addRow(mk_label("LangSmith API Key", self.langsmith_key), self.langsmith_key)
         obs_form.addRow(mk_label("LangSmith Project", self.langsmith_project), self.langsmith_project)
 
+        # Query safety group (EXPLAIN pre-flight)
+        safety_box = QtWidgets.QGroupBox("Query Safety")
+        safety_form = QtWidgets.QFormLayout(safety_box)
+        safety_form.setLabelAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        safety_form.setFormAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        safety_form.setHorizontalSpacing(14)
+        safety_form.setVerticalSpacing(10)
+
+        self.preflight_check = QtWidgets.QCheckBox("Estimate queries with EXPLAIN before running them")
+        self.preflight_check.setChecked(self.settings.preflight_enabled)
+        self.preflight_rows = QtWidgets.QSpinBox()
+        self.preflight_rows.setRange(0, 2_000_000_000)
+        self.preflight_rows.setSingleStep(100_000)
+        self.preflight_rows.setSpecialValueText("No limit")
+        self.preflight_rows.setValue(self.settings.preflight_max_rows)
+        self.preflight_cost = QtWidgets.QDoubleSpinBox()
+        self.preflight_cost.setRange(0, 1e12)
+        self.preflight_cost.setDecimals(0)
+        self.preflight_cost.setSingleStep(100_000)
+        self.preflight_cost.setSpecialValueText("No limit")
+        self.preflight_cost.setValue(self.settings.preflight_max_cost)
+        self.preflight_action = QtWidgets.QComboBox()
+        self.preflight_action.addItem("Block the query", "block")
+        self.preflight_action.addItem("Run with a row limit", "limit")
+        self.preflight_action.setCurrentIndex(max(0, self.preflight_action.findData(self.settings.preflight_action)))
+        self.preflight_limit = QtWidgets.QSpinBox()
+        self.preflight_limit.setRange(1, 1_000_000)
+        self.preflight_limit.setValue(self.settings.preflight_limit_rows)
+
+        def _sync_preflight(enabled: bool) -> None:
+            for w in (self.preflight_rows, self.preflight_cost, self.preflight_action, self.preflight_limit):
+                w.setEnabled(enabled)
+        _sync_preflight(self.preflight_check.isChecked())
+        self.preflight_check.toggled.connect(_sync_preflight)
+
+        safety_form.addRow(self.preflight_check)
+        safety_form.addRow(mk_label("Max estimated rows", self.preflight_rows), self.preflight_rows)
+        safety_form.addRow(mk_label("Max estimated cost", self.preflight_cost), self.preflight_cost)
+        safety_form.addRow(mk_label("When exceeded", self.preflight_action), self.preflight_action)
+        safety_form.addRow(mk_label("Row limit", self.preflight_limit), self.preflight_limit)
+        self.capture_plans_check = QtWidgets.QCheckBox("Capture plans and flag plan changes on re-runs")
+        self.capture_plans_check.setChecked(self.settings.capture_plans)
+        safety_form.addRow(self.capture_plans_check)
+
+        # Diagnostics group
+        diag_box = QtWidgets.QGroupBox("Diagnostics")
+        diag_form = QtWidgets.QFormLayout(diag_box)
+        diag_form.setLabelAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
+        diag_form.setFormAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
+        diag_form.setHorizontalSpacing(14)
+        diag_form.setVerticalSpacing(10)
+
+        self.slow_log_check = QtWidgets.QCheckBox("Write slow queries to ~/.askdb/slow_queries.log")
+        self.slow_log_check.setChecked(self.settings.slow_query_log)
+        self.slow_query_ms = QtWidgets.QSpinBox()
+        self.slow_query_ms.setRange(0, 3_600_000)
+        self.slow_query_ms.setSingleStep(100)
+        self.slow_query_ms.setSuffix(" ms")
+        self.slow_query_ms.setValue(self.settings.slow_query_ms)
+        self.slow_query_ms.setEnabled(self.slow_log_check.isChecked())
+        self.slow_log_check.toggled.connect(self.slow_query_ms.setEnabled)
+        diag_form.addRow(self.slow_log_check)
+        diag_form.addRow(mk_label("Slow query threshold", self.slow_query_ms), self.slow_query_ms)
+        self.local_tracing_check = QtWidgets.QCheckBox("Record local traces (agent, LLM, tool, SQL and UI spans)")
+        self.local_tracing_check.setChecked(self.settings.local_tracing)
+        diag_form.addRow(self.local_tracing_check)
+
         # Add groups to body
         body.addWidget(provider_box)
         body.addWidget(obs_box)
+        body.addWidget(safety_box)
+        body.addWidget(diag_box)
         body.addStretch(1)
 
         # Buttons pinned at bottom
@@ -120,9 +232,24 @@ class SettingsDialog(QtWidgets.QDialog):
     def accept(self) -> None:  # type: ignore[override]
         self.settings.data["model_name"] = self.model_combo.currentText()
         self.settings.data["openai_api_key"] = self.key_edit.text().strip()
+        self.settings.data["llm_backend"] = self.backend_combo.currentData() or "openai"
+        self.settings.data["openai_base_url"] = self.base_url_edit.text().strip()
+        self.settings.data["fake_llm_latency_ms"] = int(self.fake_latency.value())
+        self.settings.data["fast_mode"] = self.fast_mode_check.isChecked()
+        self.settings.data["memory_token_budget"] = int(self.memory_budget.value())
+        self.settings.data["observation_token_budget"] = int(self.observation_budget.value())
         self.settings.data["enable_tracing"] = bool(self.tracing_check.isChecked())
         self.settings.data["langsmith_api_key"] = self.langsmith_key.text().strip()
         self.settings.data["langsmith_project"] = self.langsmith_project.text().strip()
+        self.settings.data["preflight_enabled"] = bool(self.preflight_check.isChecked())
+        self.settings.data["preflight_max_rows"] = int(self.preflight_rows.value())
+        self.settings.data["preflight_max_cost"] = float(self.preflight_cost.value())
+        self.settings.data["preflight_action"] = self.preflight_action.currentData() or "block"
+        self.settings.data["preflight_limit_rows"] = int(self.preflight_limit.value())
+        self.settings.data["capture_plans"] = bool(self.capture_plans_check.isChecked())
+        self.settings.data["slow_query_log"] = bool(self.slow_log_check.isChecked())
+        self.settings.data["slow_query_ms"] = int(self.slow_query_ms.value())
+        self.settings.data["local_tracing"] = bool(self.local_tracing_check.isChecked())
         self.settings.save()
         super().accept()
 
@@ -71,7 +71,7 @@ def app_stylesheet() -> str:
     }
     QPushButton:hover { background: %(PRIMARY_DARK)s; }
     QPushButton:disabled { background: %(SURFACE_ALT)s; color: %(TEXT_MUTED)s; }
-    QListWidget {
+    QListWidget, QListView#ChatList, QListView#QueryList {
         background: %(SURFACE)s;
         border: 1px solid %(BORDER)s;
         border-radius: 8px;
@@ -82,8 +82,8 @@ def app_stylesheet() -> str:
     QListWidget#SideList::item:selected { background: %(PRIMARY)s; color: white; border: 1px solid %(PRIMARY)s; border-radius: 10px; }
 
     /* Chat list rows: no outer border, rely on bubble */
-    QListWidget#ChatList::item { padding: 2px; margin: 2px; border: none; background: transparent; }
-    QListWidget#ChatList::item:selected { background: transparent; border: none; }
+    QListView#ChatList::item { padding: 0px; margin: 0px; border: none; background: transparent; }
+    QListView#ChatList::item:selected { background: transparent; border: none; }
     QTabWidget::pane { border-top: 1px solid %(SURFACE_ALT)s; }
     QTabBar::tab {
         background: %(SURFACE)s;
@@ -127,31 +127,6 @@ def app_stylesheet() -> str:
 
 
 
-    /* Chat bubbles */
-    #ChatBubbleUser {
-        background: %(SUCCESS)s; color: white; border-top-left-radius: 14px; border-top-right-radius: 14px; border-bottom-left-radius: 14px; border-bottom-right-radius: 4px; padding: 0px;
-    }
-    #ChatBubbleAI {
-        background: %(PRIMARY)s; color: %(TEXT)s; border-top-left-radius: 14px; border-top-right-radius: 14px; border-bottom-left-radius: 4px; border-bottom-right-radius: 14px; padding: 0px;
-    }
-    #ChatBubbleAISelected {
-        background: %(PRIMARY)s; color: white; border-top-left-radius: 14px; border-top-right-radius: 14px; border-bottom-left-radius: 4px; border-bottom-right-radius: 14px; padding: 0px;
-    }
-    #ChatBubbleError {
-        background: %(ERROR)s; color: white; border-radius: 12px; padding: 0px;
-    }
-
-    /* Code-like query items */
-    #QueryItem {
-        background: transparent;
-        padding: 8px 8px;
-        font-family: ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace;
-        color: %(TEXT)s;
-    }
-    #QueryItem[selected="true"] {
-        background: %(PRIMARY)s;
-        color: white;
-    }
     #QueryMeta { color: %(TEXT_MUTED)s; font-size: 12px; }
     #ConnMeta { color: #ffffff; font-size: 12px; }
     #ConnItem { background: transparent; }
@@ -1,4 +1,7 @@
  
+from functools import lru_cache
+from typing import List, Tuple
+
 from PySide6 import QtWidgets, QtCore
 import re
 
@@ -20,9 +23,205 @@ def mk_label(text: str, buddy: QtWidgets.QWidget) -> QtWidgets.QLabel:
     lbl.setSizePolicy(QtWidgets.QSizePolicy.Preferred, QtWidgets.QSizePolicy.Fixed)
     return lbl
 
-def markdown_to_html(text):
-    # Convert **bold** to <b>bold</b>
-    text = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', text)
-    # Convert newlines to <br> so QLabel shows them
-    text = text.replace('\n', '<br>')
-    return text
\ No newline at end of file
+# -----------------
+# Markdown rendering
+# -----------------
+#
+# Messages are split into blocks (paragraphs, lists, headings, code fences,
+# tables). A block is "finished" once a complete line (or a blank line) after
+# it shows it cannot grow any more; the HTML of finished blocks never changes,
+# so MarkdownRenderer keeps it while a message streams in and only re-renders
+# the trailing block(s).
+
+_FENCE_RE = re.compile(r"^\s*(```|~~~)")
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+_LIST_RE = re.compile(r"^\s*([-*+]|\d+[.)])\s+(.*)$")
+_TABLE_SEP_RE = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_CODE_SPAN_RE = re.compile(r"`([^`\n]+)`")
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+# Qt's default paragraph margins are large for chat bubbles
+_PARA = '<p style="margin-top:0; margin-bottom:6px">'
+_ITALIC_RE = re.compile(r"(?<![\w*])\*(?!\s)(.+?)(?<!\s)\*(?![\w*])")
+
+
+def _escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _inline(text: str) -> str:
+    """Escape and apply inline markup: `code`, **bold**, *italic*."""
+    spans: List[str] = []
+
+    def _keep(m: "re.Match[str]") -> str:
+        spans.append(f"<code>{m.group(1)}</code>")
+        return f"\x00{len(spans) - 1}\x00"
+
+    out = _CODE_SPAN_RE.sub(_keep, _escape(text))
+    out = _BOLD_RE.sub(r"<b>\1</b>", out)
+    out = _ITALIC_RE.sub(r"<i>\1</i>", out)
+    return re.sub("\x00(\\d+)\x00", lambda m: spans[int(m.group(1))], out)
+
+
+def _block_kind(line: str) -> str:
+    if _FENCE_RE.match(line):
+        return "code"
+    if _HEADING_RE.match(line):
+        return "heading"
+    if line.lstrip().startswith("|"):
+        return "table"
+    if _LIST_RE.match(line):
+        return "list"
+    return "para"
+
+
+def _ordered(line: str) -> bool:
+    m = _LIST_RE.match(line)
+    return bool(m and m.group(1)[0].isdigit())
+
+
+def _split_blocks(text: str, pos: int = 0) -> List[Tuple[str, List[str], int, bool]]:
+    """Split ``text[pos:]`` into (kind, lines, end offset, finished) blocks."""
+    lines: List[Tuple[str, int, bool]] = []  # (line, end offset incl. newline, complete)
+    while pos < len(text):
+        nl = text.find("\n", pos)
+        if nl < 0:
+            lines.append((text[pos:], len(text), False))
+            break
+        lines.append((text[pos:nl], nl + 1, True))
+        pos = nl + 1
+
+    blocks: List[Tuple[str, List[str], int, bool]] = []
+    i = 0
+    while i < len(lines):
+        line, end, complete = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+        kind = _block_kind(line)
+        body = [line]
+        i += 1
+        finished = False
+        if kind == "code":
+            while i < len(lines):
+                line, end, complete = lines[i]
+                i += 1
+                if _FENCE_RE.match(line):
+                    finished = complete
+                    break
+                body.append(line)
+        elif kind == "heading":
+            finished = complete
+        else:
+            while i < len(lines):
+                nxt, nxt_end, nxt_complete = lines[i]
+                if not nxt.strip():
+                    finished = nxt_complete
+                    break
+                nxt_kind = _block_kind(nxt)
+                continues = nxt_kind == kind or (kind == "list" and nxt.startswith((" ", "\t")))
+                if kind == "list" and nxt_kind == "list" and _ordered(nxt) != _ordered(body[0]):
+                    continues = False
+                if kind == "para":
+                    continues = nxt_kind == "para"
+                if not continues:
+                    # Only a complete line can prove what the next block is
+                    finished = nxt_complete
+                    break
+                body.append(nxt)
+                end = nxt_end
+                i += 1
+        blocks.append((kind, body, end, finished))
+    return blocks
+
+
+def _render_table(lines: List[str]) -> str:
+    def cells(row: str) -> List[str]:
+        row = row.strip()
+        if row.startswith("|"):
+            row = row[1:]
+        if row.endswith("|"):
+            row = row[:-1]
+        return [c.strip() for c in row.split("|")]
+
+    if len(lines) < 2 or not _TABLE_SEP_RE.match(lines[1]):
+        return _PARA + "<br>".join(_inline(l) for l in lines) + "</p>"
+    aligns = []
+    for spec in cells(lines[1]):
+        if spec.startswith(":") and spec.endswith(":"):
+            aligns.append("center")
+        elif spec.endswith(":"):
+            aligns.append("right")
+        else:
+            aligns.append("left")
+    out = ['<table border="1" cellspacing="0" cellpadding="4">']
+    for r, row in enumerate([lines[0]] + lines[2:]):
+        tag = "th" if r == 0 else "td"
+        out.append("<tr>")
+        for c, cell in enumerate(cells(row)):
+            align = aligns[c] if c < len(aligns) else "left"
+            out.append(f'<{tag} align="{align}">{_inline(cell)}</{tag}>')
+        out.append("</tr>")
+    out.append("</table>")
+    return "".join(out)
+
+
+@lru_cache(maxsize=4096)
+def _render_block(kind: str, body: Tuple[str, ...]) -> str:
+    lines = list(body)
+    if kind == "code":
+        code = _escape("\n".join(lines[1:]))
+        return f'<table width="100%" cellpadding="6" bgcolor="#1E1E1E"><tr><td><pre>{code}</pre></td></tr></table>'
+    if kind == "heading":
+        m = _HEADING_RE.match(lines[0])
+        level = min(6, len(m.group(1)) + 2) if m else 4
+        return f"<h{level}>{_inline(m.group(2) if m else lines[0])}</h{level}>"
+    if kind == "table":
+        return _render_table(lines)
+    if kind == "list":
+        tag = "ol" if _ordered(lines[0]) else "ul"
+        items: List[str] = []
+        for line in lines:
+            m = _LIST_RE.match(line)
+            if m:
+                items.append(_inline(m.group(2)))
+            elif items:
+                items[-1] += "<br>" + _inline(line.strip())
+        return f"<{tag}>" + "".join(f"<li>{item}</li>" for item in items) + f"</{tag}>"
+    return _PARA + "<br>".join(_inline(l) for l in lines) + "</p>"
+
+
+class MarkdownRenderer:
+    """Incremental markdown → HTML for one message that grows as it streams.
+
+    When the new text extends the previous one, only blocks from the first
+    unfinished one onward are re-parsed and re-rendered; finished blocks' HTML
+    is kept. Any other change (e.g. a status line replaced by the answer)
+    starts over.
+    """
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self._text = ""
+        self._done_html = ""
+        self._done_end = 0
+
+    def render(self, text: str) -> str:
+        if not text.startswith(self._text):
+            self.reset()
+        self._text = text
+        tail: List[str] = []
+        for kind, body, end, finished in _split_blocks(text, self._done_end):
+            html = _render_block(kind, tuple(body))
+            if finished and not tail:
+                self._done_html += html
+                self._done_end = end
+            else:
+                tail.append(html)
+        return self._done_html + "".join(tail)
+
+
+def markdown_to_html(text: str) -> str:
+    """Render markdown (paragraphs, **bold**, *italic*, `code`, lists, headings, code fences, tables) for a QLabel."""
+    return "".join(_render_block(kind, tuple(body)) for kind, body, _end, _finished in _split_blocks(text or ""))
\ No newline at end of file
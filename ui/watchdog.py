@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from PySide6 import QtCore, QtGui, QtWidgets
+
+
+_APP_ROOT = str(Path(__file__).resolve().parents[1])
+
+
+@dataclass
+class StallSite:
+    """Stalls attributed to one call site (the innermost AskDB frame on the UI thread)."""
+
+    site: str
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    stack: List[str] = field(default_factory=list)
+
+
+class StallWatchdog(QtCore.QObject):
+    """Detects when the Qt event loop stops ticking and records where the UI thread was.
+
+    A QTimer on the UI thread stamps a heartbeat every ``interval_ms``; a daemon
+    thread checks it and, while the heartbeat is late by more than
+    ``threshold_ms``, samples the UI thread's Python stack with
+    sys._current_frames(). When the loop resumes the stall is attributed to the
+    most frequently sampled call site.
+    """
+
+    def __init__(self, threshold_ms: float = 100.0, interval_ms: int = 25, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.threshold_ms = threshold_ms
+        self.interval_ms = interval_ms
+        self._main_ident = threading.get_ident()
+        self._last_tick = time.perf_counter()
+        self._lock = threading.Lock()
+        self._sites: Dict[str, StallSite] = {}
+        self._stalls = 0
+        self._started_at = time.time()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._last_tick = time.perf_counter()
+        self._timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="askdb-stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._timer.stop()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _tick(self) -> None:
+        self._last_tick = time.perf_counter()
+
+    # Watchdog thread ------------------------------------------------------
+
+    def _run(self) -> None:
+        poll = max(0.01, self.interval_ms / 2000.0)
+        stall_from: Optional[float] = None
+        samples: List[List[traceback.FrameSummary]] = []
+        while not self._stop.wait(poll):
+            last = self._last_tick
+            late_ms = (time.perf_counter() - last) * 1000.0 - self.interval_ms
+            if late_ms >= self.threshold_ms:
+                if stall_from is None or last != stall_from:
+                    stall_from, samples = last, []
+                stack = self._sample()
+                if stack:
+                    samples.append(stack)
+            elif stall_from is not None:
+                duration = (self._last_tick - stall_from) * 1000.0 - self.interval_ms
+                self._record(max(duration, self.threshold_ms), samples)
+                stall_from, samples = None, []
+
+    def _sample(self) -> List[traceback.FrameSummary]:
+        frame = sys._current_frames().get(self._main_ident)
+        if frame is None:
+            return []
+        return list(traceback.extract_stack(frame, limit=40))
+
+    @staticmethod
+    def _call_site(stack: List[traceback.FrameSummary]) -> str:
+        # Innermost frame in AskDB's own code; library frames (Qt, SQLAlchemy) are too generic
+        for fs in reversed(stack):
+            if fs.filename.startswith(_APP_ROOT) and "site-packages" not in fs.filename:
+                return f"{os.path.relpath(fs.filename, _APP_ROOT)}:{fs.lineno} in {fs.name}"
+        fs = stack[-1]
+        return f"{os.path.basename(fs.filename)}:{fs.lineno} in {fs.name}"
+
+    def _record(self, duration_ms: float, samples: List[List[traceback.FrameSummary]]) -> None:
+        if samples:
+            sites = Counter(self._call_site(s) for s in samples)
+            site = sites.most_common(1)[0][0]
+            stack = next(s for s in samples if self._call_site(s) == site)
+            formatted = [f"{os.path.relpath(fs.filename, _APP_ROOT) if fs.filename.startswith(_APP_ROOT) else fs.filename}:{fs.lineno} in {fs.name}" for fs in stack[-12:]]
+        else:
+            # The loop resumed before the first sample was taken
+            site, formatted = "(not sampled)", []
+        with self._lock:
+            self._stalls += 1
+            entry = self._sites.setdefault(site, StallSite(site))
+            entry.count += 1
+            entry.total_ms += duration_ms
+            if duration_ms >= entry.max_ms:
+                entry.max_ms = duration_ms
+                entry.stack = formatted or entry.stack
+
+    # Report ---------------------------------------------------------------
+
+    def sites(self) -> List[StallSite]:
+        with self._lock:
+            return sorted(
+                (StallSite(s.site, s.count, s.total_ms, s.max_ms, list(s.stack)) for s in self._sites.values()),
+                key=lambda s: s.total_ms,
+                reverse=True,
+            )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+            self._stalls = 0
+            self._started_at = time.time()
+
+    def report(self) -> str:
+        sites = self.sites()
+        since = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self._started_at))
+        lines = [f"UI stalls over {self.threshold_ms:.0f} ms since {since}: {self._stalls}", ""]
+        if not sites:
+            lines.append("No stalls recorded.")
+        for s in sites:
+            lines.append(f"{s.count:>4}×  total {s.total_ms:>8.0f} ms  max {s.max_ms:>6.0f} ms  {s.site}")
+            for frame in s.stack:
+                lines.append(f"        {frame}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+_watchdog: Optional[StallWatchdog] = None
+
+
+def install_watchdog(threshold_ms: float = 100.0) -> StallWatchdog:
+    """Start the process-wide watchdog (call on the UI thread after creating the QApplication)."""
+    global _watchdog
+    if _watchdog is None:
+        _watchdog = StallWatchdog(threshold_ms, parent=QtWidgets.QApplication.instance())
+        _watchdog.start()
+        QtWidgets.QApplication.instance().aboutToQuit.connect(_watchdog.stop)
+    return _watchdog
+
+
+def current_watchdog() -> Optional[StallWatchdog]:
+    return _watchdog
+
+
+class StallReportDialog(QtWidgets.QDialog):
+    def __init__(self, watchdog: StallWatchdog, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("UI Stalls")
+        self.resize(760, 480)
+        self.watchdog = watchdog
+
+        root = QtWidgets.QVBoxLayout(self)
+        root.setContentsMargins(12, 12, 12, 12)
+        root.setSpacing(8)
+        hint = QtWidgets.QLabel("Times the window stopped responding, grouped by where it was busy. Copy this report when reporting a freeze.")
+        hint.setObjectName("QueryMeta")
+        hint.setWordWrap(True)
+        root.addWidget(hint)
+        self.text = QtWidgets.QPlainTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
+        root.addWidget(self.text, 1)
+
+        btns = QtWidgets.QDialogButtonBox(QtWidgets.QDialogButtonBox.Close)
+        btn_copy = btns.addButton("Copy", QtWidgets.QDialogButtonBox.ActionRole)
+        btn_copy.clicked.connect(lambda: QtGui.QGuiApplication.clipboard().setText(self.text.toPlainText()))
+        btn_reset = btns.addButton("Reset", QtWidgets.QDialogButtonBox.ResetRole)
+        btn_reset.clicked.connect(self._on_reset)
+        btns.rejected.connect(self.reject)
+        root.addWidget(btns)
+        self._refresh()
+
+    def _refresh(self) -> None:
+        self.text.setPlainText(self.watchdog.report())
+
+    def _on_reset(self) -> None:
+        self.watchdog.reset()
+        self._refresh()
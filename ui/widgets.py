@@ -1,79 +1,140 @@
 from __future__ import annotations
 
-from typing import Optional
+import math
+from typing import Any, Dict, Optional
 from pathlib import Path
 from PySide6 import QtCore, QtGui, QtWidgets
 
-from .utils import markdown_to_html
+from .models import ChatModel, QueryHistoryModel
+from .theme import BORDER, ERROR, PRIMARY, SUCCESS, SURFACE_ALT, TEXT, TEXT_MUTED
 
 
-class ChatBubbleWidget(QtWidgets.QFrame):
-    def __init__(self, text: str, role: str = "ai", parent: Optional[QtWidgets.QWidget] = None) -> None:
-        super().__init__(parent)
-        layout = QtWidgets.QHBoxLayout(self)
-        layout.setContentsMargins(10, 10, 10, 10)
-        self.label = QtWidgets.QLabel("")
-        self.label.setWordWrap(True)
-        self.label.setText(markdown_to_html(text))
-        self.label.setTextFormat(QtCore.Qt.RichText)
-        self.label.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
-        self.label.setAlignment(QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter)
-        
-        # Allow horizontal growth to compute proper height for wrapping
-        self.label.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
-        
-        layout.addWidget(self.label)
-        # extra spacer at bottom to ensure descenders never clip
-        if role == "you":
-            self.setObjectName("ChatBubbleUser")
-            # Ensure text is visible regardless of theme inheritance
-            self.label.setStyleSheet("color: white;")
-        elif role == "error":
-            self.setObjectName("ChatBubbleError")
-            self.label.setStyleSheet("color: white;")
-        else:
-            self.setObjectName("ChatBubbleAI")
-            self.label.setStyleSheet("color: #E0E0E0;")
+class QueryItemDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints QueryHistoryModel rows as cards: a title ("Query #n" unless the entry has one), the pre-flight estimate, the SQL and any plan warning.
 
-    def sizeHint(self) -> QtCore.QSize:  # compute based on label plus margins
-        sh = self.label.sizeHint()
-        m = self.layout().contentsMargins()
-        return QtCore.QSize(sh.width() + m.left() + m.right(), sh.height() + m.top() + m.bottom() + 8)
+    Layouts are cached per row and viewport width and dropped when the model
+    reports the entry changed. Selection is drawn here from the option state, so
+    selecting a row only repaints it.
+    """
 
+    MARGIN = 4
+    PADDING = (6, 4, 6, 6)  # left, top, right, bottom
+    SPACING = 4
+    RADIUS = 8
 
-class QueryListItemWidget(QtWidgets.QFrame):
-    def __init__(self, index: int, sql: str, source_text: str, parent: Optional[QtWidgets.QWidget] = None) -> None:
-        super().__init__(parent)
-        self.setObjectName("QueryItem")
-        outer = QtWidgets.QVBoxLayout(self)
-        outer.setContentsMargins(6, 4, 6, 6)
-        outer.setSpacing(4)
-
-        # Small title on top: "Query #n"
-        self.title = QtWidgets.QLabel(f"Query #{index}")
-        self.title.setObjectName("QueryMeta")
-        self.title.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Fixed)
-        outer.addWidget(self.title)
-
-        self.code = QtWidgets.QLabel(sql)
-        self.code.setTextInteractionFlags(QtCore.Qt.TextSelectableByMouse)
-        self.code.setWordWrap(True)
-        self.code.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
-        self.code.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
-        self.code.setMargin(0)
-        self.code.setContentsMargins(0, 0, 0, 0)
-        outer.addWidget(self.code)
-        # Let clicks fall-through so QListWidget row gets selected on any inner click
-        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, True)
+    def __init__(self, view: QtWidgets.QAbstractItemView) -> None:
+        super().__init__(view)
+        self._view = view
+        self._model: Optional[QueryHistoryModel] = None
+        self._cache: Dict[int, Dict[str, Any]] = {}  # row -> {width, code, warning, size}
+        self._code_font = QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont)
 
-    def sizeHint(self) -> QtCore.QSize:
-        # Compute size: title + spacing + code
-        code_sh = self.code.sizeHint()
-        title_sh = self.title.sizeHint()
-        m = self.layout().contentsMargins()
-        total_h = title_sh.height() + self.layout().spacing() + code_sh.height() + m.top() + m.bottom()
-        total_w = max(title_sh.width(), code_sh.width()) + m.left() + m.right()
-        return QtCore.QSize(total_w, total_h)
+    def set_model(self, model: QueryHistoryModel) -> None:
+        self._model = model
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self.clear_cache)
+
+    def clear_cache(self, *args: Any) -> None:
+        self._cache.clear()
+
+    def _on_data_changed(self, top_left: QtCore.QModelIndex, bottom_right: QtCore.QModelIndex, *args: Any) -> None:
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self._cache.pop(row, None)
+            self.sizeHintChanged.emit(top_left.sibling(row, 0))
+
+    def _meta_font(self) -> QtGui.QFont:
+        font = QtGui.QFont(self._view.font())
+        font.setPixelSize(12)
+        return font
+
+    def _entry(self, index: QtCore.QModelIndex) -> Optional[Dict[str, Any]]:
+        if self._model is not None:
+            return self._model.entry(index.row())
+        return index.data(QueryHistoryModel.EntryRole)
+
+    def _doc(self, text: str, font: QtGui.QFont, width: int) -> QtGui.QTextDocument:
+        doc = QtGui.QTextDocument()
+        doc.setDocumentMargin(0)
+        doc.setDefaultFont(font)
+        option = QtGui.QTextOption()
+        option.setWrapMode(QtGui.QTextOption.WrapAtWordBoundaryOrAnywhere)
+        doc.setDefaultTextOption(option)
+        doc.setPlainText(text)
+        doc.setTextWidth(width)
+        return doc
+
+    def _layout(self, row: int, entry: Dict[str, Any], width: int) -> Dict[str, Any]:
+        cached = self._cache.get(row)
+        if cached is not None and cached["width"] == width:
+            return cached
+        left, top, right, bottom = self.PADDING
+        inner = max(40, width - 2 * self.MARGIN - 2 - left - right)
+        code = self._doc(entry.get("sql", ""), self._code_font, inner)
+        warning_text = entry.get("plan_change", "")
+        warning = self._doc(warning_text, self._meta_font(), inner) if warning_text else None
+        height = top + QtGui.QFontMetrics(self._meta_font()).height() + self.SPACING + math.ceil(code.size().height())
+        if warning is not None:
+            height += self.SPACING + math.ceil(warning.size().height())
+        height += bottom + 2 + 2 * self.MARGIN
+        cached = {"width": width, "code": code, "warning": warning, "size": QtCore.QSize(width, height)}
+        self._cache[row] = cached
+        return cached
+
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> QtCore.QSize:  # type: ignore[override]
+        width = self._view.viewport().width()
+        cached = self._cache.get(index.row())
+        if cached is not None and cached["width"] == width:
+            return cached["size"]
+        entry = self._entry(index)
+        if entry is None:
+            return super().sizeHint(option, index)
+        return self._layout(index.row(), entry, width)["size"]
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> None:  # type: ignore[override]
+        entry = self._entry(index)
+        if entry is None:
+            return
+        layout = self._layout(index.row(), entry, self._view.viewport().width())
+        selected = bool(option.state & QtWidgets.QStyle.State_Selected)
+        card = QtCore.QRectF(option.rect).adjusted(self.MARGIN + 0.5, self.MARGIN + 0.5, -self.MARGIN - 0.5, -self.MARGIN - 0.5)
+        left, top, right, _ = self.PADDING
+        text_color = QtGui.QColor("white") if selected else QtGui.QColor(TEXT)
+        meta_color = QtGui.QColor("white") if selected else QtGui.QColor(TEXT_MUTED)
+
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        painter.setPen(QtGui.QPen(QtGui.QColor(PRIMARY if selected else BORDER), 1))
+        painter.setBrush(QtGui.QColor(PRIMARY if selected else SURFACE_ALT))
+        painter.drawRoundedRect(card, self.RADIUS, self.RADIUS)
+
+        # Title row: "Query #n" on the left, the pre-flight estimate on the right
+        meta_font = self._meta_font()
+        metrics = QtGui.QFontMetrics(meta_font)
+        painter.setFont(meta_font)
+        painter.setPen(meta_color)
+        x = card.left() + left
+        inner = card.width() - left - right
+        title_rect = QtCore.QRectF(x, card.top() + top, inner, metrics.height())
+        title = entry.get("title") or f"Query #{index.row() + 1}"
+        painter.drawText(title_rect, QtCore.Qt.AlignLeft | QtCore.Qt.AlignVCenter, title)
+        # History cards: what the recorded run returned, then any pre-flight estimate of a re-run
+        estimate = " · ".join(t for t in (entry.get("recorded", ""), entry.get("estimate", "")) if t)
+        if estimate:
+            room = int(inner) - metrics.horizontalAdvance(title) - 12
+            painter.drawText(title_rect, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter, metrics.elidedText(estimate, QtCore.Qt.ElideLeft, max(0, room)))
+
+        y = title_rect.bottom() + self.SPACING
+        for doc, color in ((layout["code"], text_color), (layout["warning"], QtGui.QColor("white") if selected else QtGui.QColor(ERROR))):
+            if doc is None:
+                continue
+            ctx = QtGui.QAbstractTextDocumentLayout.PaintContext()
+            ctx.palette.setColor(QtGui.QPalette.Text, color)
+            painter.save()
+            painter.translate(x, y)
+            doc.documentLayout().draw(painter, ctx)
+            painter.restore()
+            y += math.ceil(doc.size().height()) + self.SPACING
+        painter.restore()
 
 
 def _icon_path_for_db(db_type: str) -> Path:
@@ -147,53 +208,240 @@ class ConnectionListItemWidget(QtWidgets.QFrame):
         return QtCore.QSize(total_w, total_h + 8)
 
 
-class ChatMessageRowWidget(QtWidgets.QWidget):
-    def __init__(self, text: str, role: str = "ai", parent: Optional[QtWidgets.QWidget] = None) -> None:
-        super().__init__(parent)
-        row = QtWidgets.QHBoxLayout(self)
-        row.setContentsMargins(6, 2, 6, 2)
-        row.setSpacing(8)
-
-        icon_label = QtWidgets.QLabel()
-        icon_label.setFixedSize(20, 20)
-        icon_label.setScaledContents(True)
-        # Simple circle avatar via stylesheet
+def _bubble_path(rect: QtCore.QRectF, tl: float, tr: float, br: float, bl: float) -> QtGui.QPainterPath:
+    # Rounded rectangle with a radius per corner (the small one is the bubble's tail)
+    path = QtGui.QPainterPath()
+    path.moveTo(rect.left() + tl, rect.top())
+    path.lineTo(rect.right() - tr, rect.top())
+    path.arcTo(rect.right() - 2 * tr, rect.top(), 2 * tr, 2 * tr, 90, -90)
+    path.lineTo(rect.right(), rect.bottom() - br)
+    path.arcTo(rect.right() - 2 * br, rect.bottom() - 2 * br, 2 * br, 2 * br, 0, -90)
+    path.lineTo(rect.left() + bl, rect.bottom())
+    path.arcTo(rect.left(), rect.bottom() - 2 * bl, 2 * bl, 2 * bl, 270, -90)
+    path.lineTo(rect.left(), rect.top() + tl)
+    path.arcTo(rect.left(), rect.top(), 2 * tl, 2 * tl, 180, -90)
+    path.closeSubpath()
+    return path
+
+
+class ChatBubbleDelegate(QtWidgets.QStyledItemDelegate):
+    """Paints ChatModel rows as chat bubbles, without a widget per message.
+
+    The text layout (a QTextDocument) and size of each message are cached, keyed
+    by the message (so rows can be prepended or trimmed without invalidating
+    the others), its version and the viewport width, so scrolling and relayouts of
+    the list reuse them and only messages whose text changed are laid out
+    again. After a resize, rows that are not on screen report an estimated
+    height; they are laid out exactly when first painted, and the view is told
+    if the estimate was off.
+    """
+
+    MARGIN_H = 6
+    MARGIN_V = 2
+    AVATAR = 20
+    SPACING = 8
+    PADDING = 10
+    FOOTER_GAP = 2
+    AVATAR_COLORS = {"you": "#2E7D32", "error": "#EF5350", "ai": "#FFFFFF"}
+
+    def __init__(self, view: QtWidgets.QAbstractItemView) -> None:
+        super().__init__(view)
+        self._view = view
+        self._model: Optional[ChatModel] = None
+        # id(message) -> {msg, version, width, doc, footer, ideal, footer_ideal, size}
+        self._cache: Dict[int, Dict[str, Any]] = {}
+        self._estimated: Dict[int, QtCore.QSize] = {}  # id(message) -> last size hint, if it was an estimate
+
+    def set_model(self, model: ChatModel) -> None:
+        self._model = model
+        model.dataChanged.connect(self._on_data_changed)
+        model.modelReset.connect(self.clear_cache)
+        model.rowsAboutToBeRemoved.connect(self._on_rows_removed)
+
+    def clear_cache(self, *args: Any) -> None:
+        self._cache.clear()
+        self._estimated.clear()
+
+    def _forget(self, row: int) -> None:
+        msg = self._model.message(row) if self._model is not None else None
+        if msg is not None:
+            self._cache.pop(id(msg), None)
+            self._estimated.pop(id(msg), None)
+
+    def _on_rows_removed(self, parent: QtCore.QModelIndex, first: int, last: int) -> None:
+        for row in range(first, last + 1):
+            self._forget(row)
+
+    def _on_data_changed(self, top_left: QtCore.QModelIndex, bottom_right: QtCore.QModelIndex, *args: Any) -> None:
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            self._forget(row)
+            # The view only resizes rows it is told about
+            self.sizeHintChanged.emit(top_left.sibling(row, 0))
+
+    def _available(self) -> int:
+        # Widest a bubble (or footer) may be in the current viewport
+        return max(120, self._view.viewport().width() - 40)
+
+    def _colors(self, role: str) -> tuple:
         if role == "you":
-            icon_label.setStyleSheet("background:#2E7D32;border-radius:10px;")
-        elif role == "error":
-            icon_label.setStyleSheet("background:#EF5350;border-radius:10px;")
-        else:
-            icon_label.setStyleSheet("background:#FFFFFF;border-radius:10px;")
+            return QtGui.QColor(SUCCESS), QtGui.QColor("white")
+        if role == "error":
+            return QtGui.QColor(ERROR), QtGui.QColor("white")
+        return QtGui.QColor(PRIMARY), QtGui.QColor(TEXT)
+
+    def _footer_text(self, msg: Dict[str, Any]) -> str:
+        summary, details = msg["footer"]
+        if not details:
+            return summary
+        if msg["footer_expanded"]:
+            return f"▾ {summary}\n{details}"
+        return f"▸ {summary}"
+
+    def plain_text(self, msg: Dict[str, Any]) -> str:
+        """The message as shown, without markdown markup; bubbles are painted, so text cannot be mouse-selected."""
+        entry = self._cache.get(id(msg))
+        if entry is not None and entry["msg"] is msg and entry["version"] == msg["version"]:
+            return entry["doc"].toPlainText()
+        doc = QtGui.QTextDocument()
+        doc.setHtml(msg["html"])
+        return doc.toPlainText()
+
+    def _layout(self, msg: Dict[str, Any], width: int) -> Dict[str, Any]:
+        entry = self._cache.get(id(msg))
+        if entry is not None and entry["msg"] is msg and entry["version"] == msg["version"] and entry["width"] == width:
+            return entry
+        avail = self._available()
+        limit = max(20, avail - 2 * self.PADDING)
+        doc = QtGui.QTextDocument()
+        doc.setDocumentMargin(0)
+        doc.setDefaultFont(self._view.font())
+        doc.setHtml(msg["html"])
+        doc.setTextWidth(limit)
+        ideal = min(float(limit), doc.idealWidth())
+        # Shrink short messages to their text
+        doc.setTextWidth(math.ceil(ideal))
+        bubble_h = math.ceil(doc.size().height()) + 2 * self.PADDING
+        content_h = bubble_h
+        footer = None
+        footer_ideal = 0.0
+        if msg.get("footer"):
+            footer = QtGui.QTextDocument()
+            footer.setDocumentMargin(0)
+            font = QtGui.QFont(self._view.font())
+            font.setPixelSize(11)
+            footer.setDefaultFont(font)
+            footer.setPlainText(self._footer_text(msg))
+            footer.setTextWidth(avail - 4)
+            footer_ideal = min(float(avail - 4), footer.idealWidth())
+            content_h += self.FOOTER_GAP + math.ceil(footer.size().height())
+        size = QtCore.QSize(
+            math.ceil(ideal) + 2 * self.PADDING + self.AVATAR + self.SPACING + 2 * self.MARGIN_H,
+            max(content_h, self.AVATAR) + 2 * self.MARGIN_V,
+        )
+        entry = {
+            "msg": msg,
+            "version": msg["version"],
+            "width": width,
+            "limit": limit,
+            "doc": doc,
+            "footer": footer,
+            "ideal": ideal,
+            "footer_ideal": footer_ideal,
+            "bubble_h": bubble_h,
+            "size": size,
+        }
+        self._cache[id(msg)] = entry
+        return entry
+
+    def _estimate(self, entry: Dict[str, Any]) -> QtCore.QSize:
+        # Size at the current width without laying the text out
+        limit = max(20, self._available() - 2 * self.PADDING)
+        # The footer may be as wide as the bubble including its padding, less a 4px indent
+        footer_limit = entry["limit"] + 2 * self.PADDING - 4
+        wrapped = entry["ideal"] >= entry["limit"] - 1 or entry["footer_ideal"] >= footer_limit - 1
+        if not wrapped and entry["ideal"] <= limit and entry["footer_ideal"] <= limit + 2 * self.PADDING - 4:
+            # Nothing wrapped before and nothing has to wrap now: the layout is unchanged
+            return entry["size"]
+        # Wrapped text keeps roughly its area
+        scale = entry["limit"] / float(limit)
+        size = entry["size"]
+        height = max(self.AVATAR + 2 * self.MARGIN_V, int(math.ceil(size.height() * scale)))
+        return QtCore.QSize(size.width(), height)
 
-        self.role = role
-        self.bubble = ChatBubbleWidget(text, role=role)
-        self.bubble.setSizePolicy(QtWidgets.QSizePolicy.Expanding, QtWidgets.QSizePolicy.Preferred)
-        self.bubble.setMaximumWidth(500)
+    def _message(self, index: QtCore.QModelIndex) -> Optional[Dict[str, Any]]:
+        # Straight from the model: data() would convert the dict through a QVariant on every call
+        if self._model is not None:
+            return self._model.message(index.row())
+        return index.data(ChatModel.MessageRole)
 
+    def sizeHint(self, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> QtCore.QSize:  # type: ignore[override]
+        # Called for every row on each relayout of the list, so cached rows return right away
+        msg = self._message(index)
+        if not msg:
+            return super().sizeHint(option, index)
+        width = self._view.viewport().width()
+        entry = self._cache.get(id(msg))
+        if entry is not None and entry["msg"] is msg and entry["version"] == msg["version"]:
+            if entry["width"] == width:
+                return entry["size"]
+            estimate = self._estimate(entry)
+            if estimate == entry["size"]:
+                entry["width"] = width
+                return estimate
+            self._estimated[id(msg)] = estimate
+            return estimate
+        return self._layout(msg, width)["size"]
+
+    def paint(self, painter: QtGui.QPainter, option: QtWidgets.QStyleOptionViewItem, index: QtCore.QModelIndex) -> None:  # type: ignore[override]
+        msg = self._message(index)
+        if not msg:
+            return
+        entry = self._layout(msg, self._view.viewport().width())
+        estimate = self._estimated.pop(id(msg), None)
+        if estimate is not None and estimate != entry["size"]:
+            self.sizeHintChanged.emit(index)
+
+        role = msg["role"]
+        # Rows are as wide as their content; user messages align to the viewport's right edge
+        rect = QtCore.QRect(option.rect.left(), option.rect.top(), self._view.viewport().width(), option.rect.height())
+        rect = rect.adjusted(self.MARGIN_H, self.MARGIN_V, -self.MARGIN_H, -self.MARGIN_V)
+        doc = entry["doc"]
+        bubble_w = math.ceil(entry["ideal"]) + 2 * self.PADDING
+        bubble_h = entry["bubble_h"]
         if role == "you":
-            row.addStretch(1)
-            row.addWidget(self.bubble, 0)
-            row.addWidget(icon_label, 0, QtCore.Qt.AlignBottom)
+            avatar_x = rect.right() - self.AVATAR + 1
+            bubble_x = avatar_x - self.SPACING - bubble_w
+            radii = (14, 14, 4, 14)
         else:
-            row.addWidget(icon_label, 0, QtCore.Qt.AlignBottom)
-            row.addWidget(self.bubble, 0)
-            row.addStretch(1)
-        
-        # Let clicks fall-through so QListWidget row gets selected on any inner click
-        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents, True)
-
-    def sizeHint(self) -> QtCore.QSize:  # ensure enough height
-        m = self.layout().contentsMargins()
-        # Ensure height accommodates the bubble and the 20px avatar
-        h = max(self.bubble.sizeHint().height(), 20) + m.top() + m.bottom()
-        return QtCore.QSize(self.bubble.sizeHint().width() + m.left() + m.right(), h)
+            avatar_x = rect.left()
+            bubble_x = avatar_x + self.AVATAR + self.SPACING
+            radii = (12, 12, 12, 12) if role == "error" else (14, 14, 14, 4)
+        bubble = QtCore.QRectF(bubble_x, rect.top(), bubble_w, bubble_h)
+        background, foreground = self._colors(role)
 
-    def set_selected(self, selected: bool) -> None:
-        if self.role != "you":
-            # Toggle AI bubble selection style
-            self.bubble.setObjectName("ChatBubbleAISelected" if selected else "ChatBubbleAI")
-            # Force style refresh
-            self.bubble.style().unpolish(self.bubble)
-            self.bubble.style().polish(self.bubble)
+        painter.save()
+        painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        painter.setPen(QtCore.Qt.NoPen)
+        # Avatar sits level with the bottom of the bubble
+        painter.setBrush(QtGui.QColor(self.AVATAR_COLORS.get(role, self.AVATAR_COLORS["ai"])))
+        painter.drawEllipse(QtCore.QRectF(avatar_x, bubble.bottom() - self.AVATAR, self.AVATAR, self.AVATAR))
+        painter.setBrush(background)
+        painter.drawPath(_bubble_path(bubble, *radii))
 
+        ctx = QtGui.QAbstractTextDocumentLayout.PaintContext()
+        ctx.palette.setColor(QtGui.QPalette.Text, foreground)
+        # Lines that cannot wrap (long code) are cut at the bubble's edge
+        ctx.clip = QtCore.QRectF(0, 0, bubble_w - 2 * self.PADDING, bubble_h - 2 * self.PADDING)
+        painter.setClipRect(ctx.clip.translated(bubble.left() + self.PADDING, bubble.top() + self.PADDING))
+        painter.translate(bubble.left() + self.PADDING, bubble.top() + self.PADDING)
+        doc.documentLayout().draw(painter, ctx)
+        painter.restore()
 
+        footer = entry["footer"]
+        if footer is not None:
+            painter.save()
+            ctx = QtGui.QAbstractTextDocumentLayout.PaintContext()
+            ctx.palette.setColor(QtGui.QPalette.Text, QtGui.QColor(TEXT_MUTED))
+            painter.translate(bubble.left() + 4, bubble.bottom() + self.FOOTER_GAP)
+            footer.documentLayout().draw(painter, ctx)
+            painter.restore()
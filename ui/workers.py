@@ -1,72 +1,118 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from PySide6 import QtCore
-from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
+from db_util import query_source
+from services.accounting import AccountingCallbackHandler
 from services.agent_service import create_agent
+from services.db_service import fetch_rows
+from services.explain import explain_sql
+from services.index_advisor import IndexAdvisor
+from services.memory import ConversationMemory, action_queries
+from services.streaming import AnswerStreamHandler
+from services.tracing import TracingCallbackHandler, span
 
 
 class _AgentStreamWorker(QtCore.QThread):
     add_query = QtCore.Signal(int, str)  # (ai_index, sql)
-    set_output = QtCore.Signal(int, str)  # (ai_index, output_text)
+    query_ran = QtCore.Signal(int, str, str)  # (ai_index, sql, observation) for each sql_db_query the agent ran
+    set_output = QtCore.Signal(int, str)  # (ai_index, output_text): the answer so far, always replaces
+    set_status = QtCore.Signal(int, str)  # (ai_index, status line) while tools run
+    stats_ready = QtCore.Signal(int, object)  # (ai_index, QuestionStats)
     failed = QtCore.Signal(str)
 
-    def __init__(self, agent, prompt: str, ai_index: int) -> None:
+    def __init__(self, agent, prompt: str, ai_index: int, memory: Optional[ConversationMemory] = None) -> None:
         super().__init__()
         self.agent = agent
         self.prompt = prompt
         self.ai_index = ai_index
+        self.memory = memory
 
     def run(self) -> None:  # type: ignore[override]
-        try:
-            final_output: Optional[str] = None
-            for chunk in self.agent.stream({"input": self.prompt}):
-                try:
-                    if isinstance(chunk, dict):
-                        actions = chunk.get("actions")
-                        if actions:
-                            try:
-                                tools = ", ".join(getattr(a, "tool", "") for a in actions)
-                                self.set_output.emit(self.ai_index, f"Running: {tools}…")
-                            except Exception:
-                                pass
-                            for a in actions:
-                                self._maybe_emit_query_from_action(a)
-
-                        steps = chunk.get("steps") or chunk.get("next_step")
-                        if steps:
-                            for s in steps:
-                                action = s[0] if isinstance(s, (list, tuple)) and s else s
+        query_source.set("agent")
+        with span("agent.question", "agent", ai_index=self.ai_index, prompt=self.prompt[:500]) as root:
+            accounting = AccountingCallbackHandler()
+            try:
+                final_output: Optional[str] = None
+                taken: List[Any] = []
+                # Follow-ups carry what earlier questions established (tables, columns, SQL, result shapes)
+                agent_input = self.memory.build_input(self.prompt) if self.memory is not None else self.prompt
+                # Final answer tokens, coalesced, arrive through set_output before the step completes
+                answer = AnswerStreamHandler(lambda text: self.set_output.emit(self.ai_index, text))
+                callbacks: List[Any] = [accounting, answer]
+                if root is not None:
+                    callbacks.append(TracingCallbackHandler(root))
+                for chunk in self.agent.stream({"input": agent_input}, config={"callbacks": callbacks}):
+                    try:
+                        if isinstance(chunk, dict):
+                            actions = chunk.get("actions")
+                            if actions:
                                 try:
-                                    tool_name = getattr(action, "tool", "")
-                                    if tool_name:
-                                        self.set_output.emit(self.ai_index, f"Running: {tool_name}…")
+                                    tools = ", ".join(getattr(a, "tool", "") for a in actions)
+                                    self.set_status.emit(self.ai_index, f"Running: {tools}…")
                                 except Exception:
                                     pass
-                                self._maybe_emit_query_from_action(action)
-                                try:
-                                    obs = s[1] if isinstance(s, (list, tuple)) and len(s) > 1 else None
-                                    if obs is not None:
-                                        snippet = str(obs).replace("\n", " ")
-                                        if len(snippet) > 80:
-                                            snippet = snippet[:77] + "…"
-                                        if snippet:
-                                            self.set_output.emit(self.ai_index, f"Analyzing: {snippet}")
-                                except Exception:
-                                    pass
-
-                        if isinstance(chunk.get("output"), str):
-                            final_output = chunk["output"]
-                            self.set_output.emit(self.ai_index, final_output)
-                except Exception:
-                    continue
-            if final_output is not None:
-                self.set_output.emit(self.ai_index, final_output)
-        except Exception as ex:  # noqa: BLE001
-            self.failed.emit(str(ex))
+                                for a in actions:
+                                    self._maybe_emit_query_from_action(a)
+
+                            steps = chunk.get("steps") or chunk.get("next_step")
+                            if steps:
+                                taken.extend(steps)
+                                for s in steps:
+                                    action = s[0] if isinstance(s, (list, tuple)) and s else s
+                                    try:
+                                        tool_name = getattr(action, "tool", "")
+                                        if tool_name:
+                                            self.set_status.emit(self.ai_index, f"Running: {tool_name}…")
+                                    except Exception:
+                                        pass
+                                    self._maybe_emit_query_from_action(action)
+                                    self._maybe_emit_query_ran(s)
+                                    try:
+                                        obs = s[1] if isinstance(s, (list, tuple)) and len(s) > 1 else None
+                                        if obs is not None:
+                                            snippet = str(obs).replace("\n", " ")
+                                            if len(snippet) > 80:
+                                                snippet = snippet[:77] + "…"
+                                            if snippet:
+                                                self.set_status.emit(self.ai_index, f"Analyzing: {snippet}")
+                                    except Exception:
+                                        pass
+
+                            if isinstance(chunk.get("output"), str):
+                                final_output = chunk["output"]
+                                self.set_output.emit(self.ai_index, final_output)
+                    except Exception:
+                        continue
+                if final_output is not None:
+                    self.set_output.emit(self.ai_index, final_output)
+                    if self.memory is not None:
+                        self.memory.add_turn(self.prompt, final_output, steps=taken)
+            except Exception as ex:  # noqa: BLE001
+                if root is not None:
+                    root.error = str(ex)
+                self.failed.emit(str(ex))
+            stats = accounting.finish()
+            if root is not None:
+                if stats.usage_reported:
+                    root.set(llm_calls=stats.round_trips, prompt_tokens=stats.prompt_tokens, completion_tokens=stats.completion_tokens)
+                else:
+                    root.set(llm_calls=stats.round_trips)
+            self.stats_ready.emit(self.ai_index, stats)
+
+    def _maybe_emit_query_ran(self, step: Any) -> None:
+        try:
+            action = step[0] if isinstance(step, (list, tuple)) and step else getattr(step, "action", step)
+            obs = step[1] if isinstance(step, (list, tuple)) and len(step) > 1 else getattr(step, "observation", "")
+            if getattr(action, "tool", "") != "sql_db_query":
+                return
+            for q in action_queries(action):
+                self.query_ran.emit(self.ai_index, str(q), str(obs or ""))
+        except Exception:
+            return
 
     def _maybe_emit_query_from_action(self, action: Any) -> None:
         try:
@@ -92,16 +138,38 @@ class _AgentInitWorker(QtCore.QThread):
     ready = QtCore.Signal(object)
     failed = QtCore.Signal(str)
 
-    def __init__(self, engine: Engine, model_name: str, api_key: str, tracing: Dict[str, Any]) -> None:
+    def __init__(
+        self,
+        engine: Engine,
+        model_name: str,
+        api_key: str,
+        tracing: Dict[str, Any],
+        backend: Optional[Dict[str, Any]] = None,
+        fast: bool = False,
+        observation_token_budget: int = 1000,
+    ) -> None:
         super().__init__()
         self.engine = engine
         self.model_name = model_name
         self.api_key = api_key
         self.tracing = tracing
+        self.backend = backend
+        self.fast = fast
+        self.observation_token_budget = observation_token_budget
 
     def run(self) -> None:  # type: ignore[override]
+        query_source.set("agent")
         try:
-            agent = create_agent(self.engine, self.model_name, self.api_key, self.tracing)
+            with span("agent.init", "agent", model=self.model_name, fast=self.fast):
+                agent = create_agent(
+                    self.engine,
+                    self.model_name,
+                    self.api_key,
+                    self.tracing,
+                    self.backend,
+                    self.fast,
+                    self.observation_token_budget,
+                )
             self.ready.emit(agent)
         except Exception as ex:  # noqa: BLE001
             self.failed.emit(str(ex))
@@ -111,18 +179,57 @@ class _SQLExecWorker(QtCore.QThread):
     result_ready = QtCore.Signal(list, list)  # rows, cols
     failed = QtCore.Signal(str)
 
-    def __init__(self, engine: Engine, sql: str) -> None:
+    def __init__(self, engine: Engine, sql: str, params: Optional[Dict[str, Any]] = None) -> None:
         super().__init__()
         self.engine = engine
         self.sql = sql
+        self.params = params or {}
 
     def run(self) -> None:  # type: ignore[override]
+        query_source.set("user")
         try:
             sql_str = self.sql.strip()
-            with self.engine.connect() as conn:
-                res = conn.execute(text(sql_str))
-                cols = list(res.keys())
-                rows = [list(row) for row in res.fetchall()]
+            with span("sql.fetch", "sql", sql=sql_str[:500]) as sp:
+                rows, cols = fetch_rows(self.engine, sql_str, self.params)
+                if sp is not None:
+                    sp.set(rows=len(rows))
             self.result_ready.emit(rows, cols)
         except Exception as ex:  # noqa: BLE001
             self.failed.emit(str(ex))
+
+
+class _SQLExplainWorker(QtCore.QThread):
+    estimate_ready = QtCore.Signal(object)  # PlanEstimate
+    failed = QtCore.Signal(str)
+
+    def __init__(self, engine: Engine, sql: str) -> None:
+        super().__init__()
+        self.engine = engine
+        self.sql = sql
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            self.estimate_ready.emit(explain_sql(self.engine, self.sql))
+        except Exception as ex:  # noqa: BLE001
+            self.failed.emit(str(ex))
+
+
+class _IndexAdvisorWorker(QtCore.QThread):
+    candidates_ready = QtCore.Signal(list)  # List[IndexCandidate]
+    failed = QtCore.Signal(str)
+
+    def __init__(
+        self, engine: Engine, quote: Callable[[str], str], history: List[Dict[str, Any]], slow_ms: float
+    ) -> None:
+        super().__init__()
+        self.engine = engine
+        self.quote = quote
+        self.history = history
+        self.slow_ms = slow_ms
+
+    def run(self) -> None:  # type: ignore[override]
+        try:
+            advisor = IndexAdvisor(self.engine, self.quote, self.slow_ms)
+            self.candidates_ready.emit(advisor.analyze(self.history))
+        except Exception as ex:  # noqa: BLE001
+            self.failed.emit(str(ex))